@@ -0,0 +1,356 @@
+from array import array
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from chess_engine import Position
+from chess_pgn import game_pgn, game_result, read_games, replay_game
+
+"""
+Binary game archive, games are stored as a packed starting position and 16 bit moves with an offset index for random access by id
+
+Data file: MAGIC, then one record per game
+    RECORD header (record size, plies, tag bytes, result code)
+    Position.pack() of the starting position (38 bytes)
+    plies big endian 16 bit moves, from square | to square << 6 | promotion << 12 (squares are y * 8 + x)
+    tags as UTF-8 JSON
+Index file (<archive>.idx): big endian 64 bit offset of every record, rebuilt from the data file when it is missing or stale
+"""
+
+MAGIC = b'CHESSGA1'
+RECORD = struct.Struct('>IHHB')
+POSITION_BYTES = 38
+RESULTS = ['*', '1-0', '0-1', '1/2-1/2'] #Result by result code
+PROMOTIONS = [None, 'n', 'b', 'r', 'q'] #Promotion part by promotion code
+
+"""
+Input: cp - tuple containing the current x,y cordinate of the peice
+       np - tuple containing the next x,y cordinate of the peice
+       promotion - string representing the promotion part (Default=None) [OPTIONAL]
+Description: pack a move into 16 bits
+Output: integer representing the move
+"""
+def encode_move(cp, np, promotion=None):
+    return (cp[1] * 8 + cp[0]) | (np[1] * 8 + np[0]) << 6 | PROMOTIONS.index(promotion) << 12
+
+"""
+Input: move - integer returned by encode_move
+Description: unpack a 16 bit move
+Output: tuple of (current x,y cordinate, next x,y cordinate, promotion part or None)
+"""
+def decode_move(move):
+    start, end = move & 63, move >> 6 & 63
+    return (start % 8, start // 8), (end % 8, end // 8), PROMOTIONS[move >> 12 & 7]
+
+"""
+Input: position - Position object of the starting position
+       moves - list of (current x,y cordinate, next x,y cordinate, promotion part or None) such as Chess.move_list
+       result - string representing the PGN result (Default='*') [OPTIONAL]
+       tags - dictionary of metadata stored with the game (Default=None) [OPTIONAL]
+Description: serialise one game
+Output: bytes representing the record, ValueError is raised if the moves or the tags do not fit the 16 bit counts
+"""
+def pack_record(position, moves, result='*', tags=None):
+    meta = json.dumps(tags, separators=(',', ':')).encode('utf-8') if tags else b''
+    if len(moves) > 65535 or len(meta) > 65535:
+        raise ValueError(f'a record holds at most 65535 plies and 65535 tag bytes, got {len(moves)} and {len(meta)}')
+    body = position.pack() + struct.pack(f'>{len(moves)}H', *[encode_move(*m) for m in moves]) + meta
+    return RECORD.pack(RECORD.size + len(body), len(moves), len(meta), RESULTS.index(result)) + body
+
+class GameArchive:
+    """
+    Input: path - string representing the archive file
+           mode - string, 'r' to read or 'a' to read and append, a missing archive is created (Default='r') [OPTIONAL]
+    Description: GameArchive initail variables
+    Output: None
+    """
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.mode = mode
+        if mode == 'a' and not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(MAGIC)
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+        self.data = open(path, 'rb' if mode == 'r' else 'r+b')
+        if self.data.read(len(MAGIC)) != MAGIC:
+            self.data.close()
+            raise ValueError(f'{path} is not a game archive')
+        self.size = os.path.getsize(path)
+        self.map = None #mmap of the data file, remapped after appends
+        self.offsets = array('Q') #Record offset by game id
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                self.offsets.frombytes(f.read())
+            if sys.byteorder == 'little':
+                self.offsets.byteswap()
+        if not self.index_valid():
+            self.rebuild_index()
+
+    """
+    Input: None
+    Description: check that the index ends exactly where the data file does
+    Output: boolean representing if the index can be used
+    """
+    def index_valid(self):
+        if not self.offsets:
+            return self.size == len(MAGIC)
+        last = self.offsets[-1]
+        if last + RECORD.size > self.size:
+            return False
+        self.data.seek(last)
+        return last + RECORD.unpack(self.data.read(RECORD.size))[0] == self.size
+
+    """
+    Input: None
+    Description: rebuild the offset index by walking the records of the data file, a torn record at the end is cut off
+    Output: None
+    """
+    def rebuild_index(self):
+        self.offsets = array('Q')
+        offset = len(MAGIC)
+        self.data.seek(offset)
+        while True:
+            header = self.data.read(RECORD.size)
+            if len(header) < RECORD.size:
+                break
+            size = RECORD.unpack(header)[0]
+            if offset + size > self.size:
+                break
+            self.offsets.append(offset)
+            offset += size
+            self.data.seek(offset)
+        if offset != self.size and self.mode == 'a':
+            self.data.truncate(offset)
+            self.size = offset
+        if self.mode == 'a':
+            self.write_index()
+
+    """
+    Input: None
+    Description: write the whole offset index
+    Output: None
+    """
+    def write_index(self):
+        offsets = array('Q', self.offsets)
+        if sys.byteorder == 'little':
+            offsets.byteswap()
+        with open(self.index_path, 'wb') as f:
+            f.write(offsets.tobytes())
+
+    """
+    Input: None
+    Description: memory map of the data file covering every record
+    Output: mmap object
+    """
+    def mapped(self):
+        if self.map == None or len(self.map) < self.size:
+            if self.map != None:
+                self.map.close()
+            self.map = mmap.mmap(self.data.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map
+
+    def __len__(self):
+        return len(self.offsets)
+
+    """
+    Input: offset - integer representing where the record starts
+    Description: decode the record at an offset of the data file
+    Output: tuple of (record dictionary without id, offset of the next record)
+    """
+    def decode(self, offset):
+        data = self.mapped()
+        size, plies, meta_len, result = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        moves = struct.unpack_from(f'>{plies}H', data, start + POSITION_BYTES)
+        meta = data[start + POSITION_BYTES + 2 * plies:start + POSITION_BYTES + 2 * plies + meta_len]
+        return {'position': Position.unpack(data[start:start + POSITION_BYTES]),
+                'moves': [decode_move(m) for m in moves],
+                'result': RESULTS[result],
+                'tags': json.loads(meta) if meta else {}}, offset + size
+
+    """
+    Input: game_id - integer representing the game, negative ids count from the end
+    Description: load one game without reading any other record
+    Output: dictionary containing the id, starting Position, moves, result and tags
+    """
+    def read(self, game_id):
+        game_id = range(len(self.offsets))[game_id] #IndexError for unknown ids
+        record, _ = self.decode(self.offsets[game_id])
+        record['id'] = game_id
+        return record
+
+    """
+    Input: game_id - integer representing the game
+    Description: replay a stored game through the integer move path of Chess
+    Output: Chess object after the last move, ValueError is raised if a stored move is illegal
+    """
+    def game(self, game_id):
+        return self.replay(self.read(game_id))
+
+    """
+    Input: record - dictionary returned by read or iteration
+    Description: replay a record through the integer move path of Chess
+    Output: Chess object after the last move, ValueError is raised if a stored move is illegal
+    """
+    def replay(self, record):
+        game = record['position'].to_game()
+        for move in record['moves']:
+            if not game.play(*move):
+                raise ValueError(f"illegal move {move} in game {record.get('id')}")
+        return game
+
+    """
+    Input: start - integer representing the first game id (Default=0) [OPTIONAL]
+    Description: read the games in order, each record is decoded straight from the memory map
+    Output: generator of record dictionaries
+    """
+    def iterate(self, start=0):
+        for game_id in range(start, len(self.offsets)):
+            record, _ = self.decode(self.offsets[game_id])
+            record['id'] = game_id
+            yield record
+
+    def __iter__(self):
+        return self.iterate()
+
+    """
+    Input: records - iterable of (starting Position, moves, result, tags) tuples
+           batch - integer representing how many records are written at once (Default=1000) [OPTIONAL]
+    Description: bulk append games, records are buffered and written in batches with one index write per batch
+    Output: list of the new game ids
+    """
+    def extend(self, records, batch=1000):
+        if self.mode != 'a':
+            raise ValueError('archive is opened read only')
+        ids = []
+        chunk = []
+        offsets = array('Q')
+        offset = self.size
+        for position, moves, result, tags in records:
+            data = pack_record(position, moves, result, tags)
+            chunk.append(data)
+            offsets.append(offset)
+            offset += len(data)
+            if len(chunk) >= batch:
+                ids += self.write(chunk, offsets)
+                chunk, offsets = [], array('Q')
+        if chunk:
+            ids += self.write(chunk, offsets)
+        return ids
+
+    """
+    Input: chunk - list of packed records
+           offsets - array of the offset of each record
+    Description: write packed records to the end of the data file and index
+    Output: list of the new game ids
+    """
+    def write(self, chunk, offsets):
+        self.data.seek(self.size)
+        self.data.write(b''.join(chunk))
+        self.data.flush()
+        first = len(self.offsets)
+        self.offsets.extend(offsets)
+        self.size = offsets[-1] + len(chunk[-1])
+        if sys.byteorder == 'little':
+            offsets.byteswap()
+        with open(self.index_path, 'ab') as f: #Data is written first, a crash in between leaves an index that is rebuilt
+            f.write(offsets.tobytes())
+        return list(range(first, len(self.offsets)))
+
+    """
+    Input: game - Chess object
+           tags - dictionary of metadata stored with the game (Default=None) [OPTIONAL]
+           result - string representing the PGN result (Default=None, from the game state) [OPTIONAL]
+    Description: append one game
+    Output: integer representing the game id
+    """
+    def append(self, game, tags=None, result=None):
+        if result == None:
+            result = game_result(game)
+        return self.extend([(Position.from_fen(game.init_pos), game.move_list, result, tags)])[0]
+
+    """
+    Input: None
+    Description: close the archive files
+    Output: None
+    """
+    def close(self):
+        if self.map != None:
+            self.map.close()
+            self.map = None
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+"""
+Input: pgn_path - string representing the PGN file
+       archive_path - string representing the archive games are appended to
+       progress - function called with (games, errors, seconds) every 1000 games (Default=None) [OPTIONAL]
+Description: convert a PGN file, every game is replayed so only legal games are stored
+Output: dictionary containing the games, errors and seconds
+"""
+def import_pgn(pgn_path, archive_path, progress=None):
+    totals = {'games': 0, 'errors': 0}
+    start = time.perf_counter()
+
+    def records(f):
+        for tags, moves in read_games(f):
+            try:
+                game = replay_game(tags, moves)
+            except ValueError:
+                totals['errors'] += 1
+                continue
+            totals['games'] += 1
+            if progress != None and totals['games'] % 1000 == 0:
+                progress(totals['games'], totals['errors'], time.perf_counter() - start)
+            result = tags.pop('Result', '*')
+            yield Position.from_fen(game.init_pos), game.move_list, result if result in RESULTS else '*', tags
+
+    with open(pgn_path, encoding='utf-8', errors='replace') as f, GameArchive(archive_path, 'a') as archive:
+        archive.extend(records(f))
+    totals['seconds'] = time.perf_counter() - start
+    return totals
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Binary game archive tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('import', help='append the games of a PGN file to an archive')
+    command.add_argument('pgn')
+    command.add_argument('archive')
+    command = commands.add_parser('export', help='write archived games as PGN')
+    command.add_argument('archive')
+    command.add_argument('--games', type=int, nargs='+', help='game ids (default: all)')
+    command = commands.add_parser('info', help='scan an archive and count games, plies and results')
+    command.add_argument('archive')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        totals = import_pgn(args.pgn, args.archive, lambda g, e, s: sys.stderr.write(f'\r{g} games {g / max(s, 1e-9):.1f} games/s'))
+        sys.stderr.write('\n')
+        print(f"{totals['games']} games imported, {totals['errors']} with illegal moves skipped, "
+              f"{totals['games'] / max(totals['seconds'], 1e-9):.1f} games/s")
+    elif args.command == 'export':
+        with GameArchive(args.archive) as archive:
+            for record in (archive.read(i) for i in args.games) if args.games else archive:
+                sys.stdout.write(game_pgn(archive.replay(record), dict(record['tags'], Result=record['result'])))
+    else:
+        start = time.perf_counter()
+        plies = 0
+        results = dict.fromkeys(RESULTS, 0)
+        with GameArchive(args.archive) as archive:
+            for record in archive:
+                plies += len(record['moves'])
+                results[record['result']] += 1
+            games = len(archive)
+        seconds = time.perf_counter() - start
+        print(f"{games} games, {plies} plies, {os.path.getsize(args.archive)} bytes, scanned at {games / max(seconds, 1e-9):.0f} games/s")
+        print('  '.join(f'{r} {n}' for r, n in results.items()))
@@ -0,0 +1,225 @@
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tracemalloc
+from chess_engine import Chess, SearchStats, TranspositionTable
+
+"""
+Benchmark suite for the three move engines with a JSON history and regression comparison
+"""
+
+#Search settings benchmarked for each algorithm, alpha-beta is timed at every depth up to depth
+SETTINGS = {'alpha-beta': {'depth': 3},
+            'evolutionary': {'population_size': 20, 'generations': 5},
+            'pso': {'num_particles': 20, 'iterations': 10}}
+
+"""
+Input: path - string representing the EPD file, lines starting with # are skipped
+Description: read benchmark positions, the id and c0 operations name and categorise a position
+Output: list of dictionaries containing the id, category and EPD of each position
+"""
+def load_positions(path):
+    positions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            game = Chess(EPD=line, interactive=False)
+            ops = game.EPD_ops
+            positions.append({'id': (ops.get('id') or [str(len(positions))])[0], 'category': (ops.get('c0') or [''])[0], 'epd': game.EPD_hash()})
+    return positions
+
+"""
+Input: epd - string representing the position
+       algorithm - string representing the algorithm to use (Choices=['alpha-beta','evolutionary','pso'])
+       settings - dictionary containing the keyword arguments of the algorithm
+       seed - integer the random module is seeded with
+Description: run one search from a fresh game and transposition table
+Output: tuple of (move, SearchStats)
+"""
+def run_search(epd, algorithm, settings, seed):
+    random.seed(seed)
+    game = Chess(EPD=epd, interactive=False)
+    stats = SearchStats()
+    if algorithm == 'alpha-beta':
+        game.tt = TranspositionTable()
+        for depth in range(1, settings['depth'] + 1): #Iterative deepening gives the time to each depth
+            move = game.get_alpha_beta_move(depth, settings.get('quiescence', False), stats=stats)
+    elif algorithm == 'evolutionary':
+        move = game.evolutionary_algorithm(stats=stats, **settings)
+    else:
+        move = game.particle_swarm_optimization(stats=stats, **settings)
+    return move, stats
+
+"""
+Input: position - dictionary returned by load_positions
+       algorithm - string representing the algorithm to use
+       settings - dictionary containing the keyword arguments of the algorithm
+       seed - integer the random module is seeded with
+       memory - boolean representing if peak memory is measured in a second, untimed run (Default=True) [OPTIONAL]
+Description: benchmark one algorithm on one position
+Output: dictionary containing the move, time, time to each depth, nodes, nodes per second, peak memory and bytes per search node
+"""
+def bench_position(position, algorithm, settings, seed, memory=True):
+    move, stats = run_search(position['epd'], algorithm, settings, seed)
+    elapsed = sum(i['time'] for i in stats.iterations)
+    result = {'move': list(move), 'time': elapsed, 'nodes': stats.nodes + stats.qnodes,
+              'nps': int((stats.nodes + stats.qnodes) / max(elapsed, 1e-9)), 'peak_kb': None}
+    if algorithm == 'alpha-beta':
+        done = 0.0
+        result['time_to_depth'] = []
+        for i in stats.iterations:
+            done += i['time']
+            result['time_to_depth'].append(round(done, 6))
+        result['ebf'] = stats.effective_branching_factor
+    if memory:
+        #tracemalloc slows the search down, so memory comes from a repeat of the same seeded search
+        tracemalloc.start()
+        run_search(position['epd'], algorithm, settings, seed)
+        result['peak_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+        result['node_bytes'] = Chess(EPD=position['epd'], interactive=False).node_bytes()
+    return result
+
+"""
+Input: None
+Description: short hash of the checked out commit
+Output: string representing the commit or None outside a git checkout
+"""
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+"""
+Input: positions - list of position dictionaries
+       algorithms - list of algorithm names (Default=all) [OPTIONAL]
+       settings - dictionary of algorithm name to keyword arguments overriding SETTINGS (Default=None) [OPTIONAL]
+       seed - integer, position i is searched with seed + i (Default=0) [OPTIONAL]
+       memory - boolean representing if peak memory is measured (Default=True) [OPTIONAL]
+       label - string stored with the run (Default=None) [OPTIONAL]
+       progress - function called with (algorithm, position id, result) (Default=None) [OPTIONAL]
+Description: benchmark every algorithm on every position, one at a time so timings are not disturbed
+Output: dictionary representing the run
+"""
+def run_benchmark(positions, algorithms=None, settings=None, seed=0, memory=True, label=None, progress=None):
+    algorithms = list(SETTINGS) if algorithms == None else algorithms
+    settings = {a: dict(SETTINGS[a], **(settings or {}).get(a, {})) for a in algorithms}
+    run = {'date': datetime.now(timezone.utc).isoformat(timespec='seconds'), 'commit': git_commit(), 'label': label,
+           'python': sys.version.split()[0], 'seed': seed, 'settings': settings, 'results': {}, 'totals': {}}
+    for algorithm in algorithms:
+        results = run['results'][algorithm] = {}
+        for i, position in enumerate(positions):
+            results[position['id']] = bench_position(position, algorithm, settings[algorithm], seed + i, memory)
+            if progress != None:
+                progress(algorithm, position['id'], results[position['id']])
+        time_total = sum(r['time'] for r in results.values())
+        nodes_total = sum(r['nodes'] for r in results.values())
+        peaks = [r['peak_kb'] for r in results.values() if r['peak_kb'] != None]
+        run['totals'][algorithm] = {'time': time_total, 'nodes': nodes_total, 'nps': int(nodes_total / max(time_total, 1e-9)),
+                                    'peak_kb': max(peaks) if peaks else None}
+    return run
+
+"""
+Input: path - string representing the history file
+Description: read the benchmark history
+Output: list of runs, oldest first
+"""
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+"""
+Input: path - string representing the history file
+       run - dictionary returned by run_benchmark
+Description: append a run to the benchmark history
+Output: None
+"""
+def save_run(path, run):
+    history = load_history(path)
+    history.append(run)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=1)
+
+"""
+Input: old - dictionary representing the baseline run
+       new - dictionary representing the run being checked
+       threshold - float representing the allowed slowdown as a fraction (Default=0.1) [OPTIONAL]
+       min_time - float representing the baseline seconds below which a single position is too noisy to time (Default=0.1) [OPTIONAL]
+Description: compare two runs by algorithm totals and position by position, only positions and algorithms benchmarked with the same settings are compared
+Output: list of strings describing each regression
+"""
+def compare_runs(old, new, threshold=0.1, min_time=0.1):
+    regressions = []
+    for algorithm, results in new['results'].items():
+        if algorithm not in old['results'] or old['settings'].get(algorithm) != new['settings'].get(algorithm):
+            continue
+        common = [pid for pid in results if pid in old['results'][algorithm]]
+        base_time = sum(old['results'][algorithm][pid]['time'] for pid in common)
+        new_time = sum(results[pid]['time'] for pid in common)
+        if base_time > 0 and new_time > base_time * (1 + threshold):
+            regressions.append(f"{algorithm} total: time {base_time:.3f}s -> {new_time:.3f}s ({new_time / base_time - 1:+.0%})")
+        for pid in common:
+            r, base = results[pid], old['results'][algorithm][pid]
+            timed = base['time'] >= min_time
+            if timed and r['time'] > base['time'] * (1 + threshold):
+                regressions.append(f"{algorithm} {pid}: time {base['time']:.3f}s -> {r['time']:.3f}s ({r['time'] / base['time'] - 1:+.0%})")
+            if timed and r['nps'] < base['nps'] * (1 - threshold):
+                regressions.append(f"{algorithm} {pid}: nps {base['nps']} -> {r['nps']} ({r['nps'] / max(base['nps'], 1) - 1:+.0%})")
+            if r['peak_kb'] != None and base['peak_kb'] != None and r['peak_kb'] > base['peak_kb'] * (1 + threshold):
+                regressions.append(f"{algorithm} {pid}: peak memory {base['peak_kb']}KB -> {r['peak_kb']}KB")
+            if new['seed'] == old['seed'] and r['move'] != base['move']:
+                regressions.append(f"{algorithm} {pid}: move changed {base['move']} -> {r['move']} (same seed)")
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark Alpha-Beta, Evolutionary and PSO move engines')
+    parser.add_argument('--positions', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench.epd'))
+    parser.add_argument('--algorithms', nargs='+', choices=list(SETTINGS), default=list(SETTINGS))
+    parser.add_argument('--depth', type=int, default=SETTINGS['alpha-beta']['depth'], help='alpha-beta depth')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory measurement')
+    parser.add_argument('--history', default='bench_history.json')
+    parser.add_argument('--label', help='name stored with the run, e.g. a branch')
+    parser.add_argument('--compare', action='store_true', help='compare the run with the previous one in the history')
+    parser.add_argument('--compare-only', action='store_true', help='compare the last two runs in the history without benchmarking')
+    parser.add_argument('--threshold', type=float, default=10, help='allowed slowdown in percent before a regression is flagged')
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    if args.compare_only:
+        if len(history) < 2:
+            sys.exit('Need at least two runs in the history to compare')
+        old, new = history[-2], history[-1]
+    else:
+        def progress(algorithm, pid, r):
+            memory = '' if r['peak_kb'] == None else f"{r['peak_kb']:>8}KB"
+            print(f"{algorithm:<13}{pid:<24}{r['time']:>8.3f}s {r['nodes']:>8} nodes {r['nps']:>7} nps{memory}")
+
+        run = run_benchmark(load_positions(args.positions), args.algorithms, {'alpha-beta': {'depth': args.depth}}, args.seed,
+                            not args.no_memory, args.label, progress)
+        save_run(args.history, run)
+        print()
+        for algorithm, t in run['totals'].items():
+            print(f"{algorithm:<13}total {t['time']:.3f}s {t['nodes']} nodes {t['nps']} nps" + ('' if t['peak_kb'] == None else f" peak {t['peak_kb']}KB"))
+        print(f'\nRun appended to {args.history}')
+        old, new = (history[-1] if history else None), run
+    if args.compare or args.compare_only:
+        if old == None:
+            print('No previous run to compare with')
+        else:
+            regressions = compare_runs(old, new, args.threshold / 100)
+            print(f"\nCompared with {old['date']} ({old['commit'] or 'unknown commit'}): {len(regressions)} regression(s)")
+            for r in regressions:
+                print(f'  {r}')
+            if regressions:
+                sys.exit(1)
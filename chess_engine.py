@@ -1,38 +1,74 @@
-from copy import deepcopy
+from copy import copy, deepcopy
+import json
+import os
 import random
+import struct
+import sys
+import threading
+import time
+import tracemalloc
+try:
+    import resource #Peak RSS, not available on Windows
+except ImportError:
+    resource = None
 
 """
 Comparing Evolutionary Algorithms to Alpha-Beta pruning in chess
 """
+
+MATE_SCORE = 50000 #Score of a checkmate, the same scale chess_tablebase scores wins on
+
 class Chess:
     """
-    Input: EPD - string representing the EPD hash you want to start the game with
+    Input: EPD - string representing the EPD hash you want to start the game with, or a Position object
                  (Default='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -') [OPTIONAL]
+           interactive - boolean representing if the game may ask for input on stdin, set to False for
+                         batch and server use where pawns auto promote to a queen (Default=True) [OPTIONAL]
+           draw_claim - string or dictionary of string by rule ('50M', '3F') representing the draw claim policy
+                        (Default='ask') (Choices=['ask','yes','no']), 'ask' claims the draw when not interactive [OPTIONAL]
     Description: Chess initail variables
     Output: None
     """
-    def __init__(self, EPD='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -'):
+    def __init__(self, EPD='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -', interactive=True, draw_claim='ask'):
         self.x = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'] #Board x representation
         self.y = ['8', '7', '6', '5', '4', '3', '2', '1'] #Board y representation
         self.notation = {'p':1, 'n':2, 'b':3, 'r':4, 'q':5, 'k':6} #Map of notation to part number
         self.parts = {1:'Pawn', 2:'Knight', 3:'Bishop', 4:'Rook', 5:'Queen', 6:'King'} #Map of number to part
+        self.values = {1:100, 2:320, 3:330, 4:500, 5:900, 6:20000} #Map of part number to material value
+        self.pst = None #Map of part number to 64 piece-square bonuses (a8 ... h1) for white, black uses the mirrored square (None = material only)
         self.c_escape = {} #Possible check escapes
+        self.interactive = interactive #Allow asking for input on stdin
+        self.draw_claim = draw_claim if isinstance(draw_claim, dict) else {'50M':draw_claim, '3F':draw_claim} #Draw claim policy by rule
+        self.stop_search = None #Plain function called once per search node, returning True aborts the search (None = never abort)
+        self.tt = None #TranspositionTable shared by every copy of the game during search (None = off)
+        self.stats = None #SearchStats shared by every copy of the game during search (None = off)
+        self.book = None #Opening book consulted before every search, any object with choose(game) such as chess_book.OpeningBook (None = off)
+        self.tablebase = None #Endgame tablebases probed at the root and for every searched move, such as chess_tablebase.Tablebases (None = off)
+        self.delta_margin = None #Quiescence skips captures that can not raise the score to alpha even with this margin (None = off)
+        if EVAL_PARAMS != None: #Tuned with chess_texel or chess_tune
+            self.values, self.pst, self.delta_margin = dict(EVAL_PARAMS['values']), EVAL_PARAMS['pst'], EVAL_PARAMS['delta_margin']
         self.reset(EPD=EPD) #Reset game board and state
 
     """
-    Input: EPD - string representing the EPD hash you want to start the game with
+    Input: EPD - string representing the EPD hash you want to start the game with, or a Position object
                  (Default='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -') [OPTIONAL]
     Description: reset game board to desired EPD hash
     Output: None
     """
     def reset(self, EPD='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -'):
         self.log = [] #Game log
-        self.init_pos = EPD #Inital position
+        self.init_pos = EPD if isinstance(EPD, str) else EPD.fen() #Inital position
         self.EPD_table = {} #EPD hashtable
         self.p_move = 1 #Current players move white = 1 black = -1
         self.castling = [1, 1, 1, 1] #Castling control
         self.en_passant = None #En passant control
         self.prev_move = None #Previous move
+        self.status = None #Cached game status, cleared whenever the position changes
+        self.halfmove = 0 #Halfmove clock, plies since the last capture or pawn move
+        self.fullmove = 1 #Fullmove number, incremented after black moves
+        self.history = [] #Game state before each move, used by undo
+        self.move_list = [] #Moves played as (from, to, promotion part or None) with (x, y) cordinates
+        self.cur_hash = None #EPD hash of the current position
         self.board = [[0, 0, 0, 0, 0, 0, 0, 0],
                       [0, 0, 0, 0, 0, 0, 0, 0],
                       [0, 0, 0, 0, 0, 0, 0, 0],
@@ -41,7 +77,11 @@ class Chess:
                       [0, 0, 0, 0, 0, 0, 0, 0],
                       [0, 0, 0, 0, 0, 0, 0, 0],
                       [0, 0, 0, 0, 0, 0, 0, 0]] #Generate empty chess board
-        self.load_EPD(EPD) #Load in game starting position
+        if isinstance(EPD, str):
+            self.load_EPD(EPD) #Load in game starting position
+        else:
+            self.load_position(EPD)
+        self.EPD_table[self.cur_hash] = 1 #Starting position counts towards repetitions
 
     """
     Input: None
@@ -65,6 +105,50 @@ class Chess:
         result += '  ----------------\n  a b c d e f g h\n'
         print(result)
 
+    """
+    Input: memo - dictionary used by deepcopy
+    Description: copy the game for search, the board and the state a move changes are copied while the log strings
+                 and history entries, which are never changed in place, are shared instead of cloned
+    Output: Chess object
+    """
+    def __deepcopy__(self, memo):
+        game = copy(self)
+        game.board = [row[:] for row in self.board]
+        game.castling = self.castling[:]
+        game.log = self.log[:]
+        game.EPD_table = self.EPD_table.copy()
+        game.history = self.history[:]
+        game.move_list = self.move_list[:]
+        game.c_escape = self.c_escape.copy()
+        game.prev_move = game.board if self.prev_move is self.board else self.prev_move
+        game.status = None if self.status == None else list(self.status)
+        return game
+
+    """
+    Input: None
+    Description: measure the memory one search node costs, a copy of the game is made for every node
+    Output: integer representing the bytes allocated by one copy of the game
+    """
+    def node_bytes(self):
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        node = deepcopy(self)
+        size = tracemalloc.get_traced_memory()[0] - before
+        if not tracing:
+            tracemalloc.stop()
+        del node
+        return size
+
+    """
+    Input: None
+    Description: take an immutable snapshot of the current position
+    Output: Position object
+    """
+    def position(self):
+        return Position.from_game(self)
+
     """
     Input: cord - string representing the game board cordinate you want to convert
     Description: convert board string cordinate to a matrix index of the cordinate
@@ -78,11 +162,11 @@ class Chess:
             return None
 
     """
-    Input: None
+    Input: clocks - boolean representing if the halfmove clock and fullmove number are added (FEN) (Default=False) [OPTIONAL]
     Description: represent current game state as a EPD hash
     Output: string representing the current game in EPD hash format
     """
-    def EPD_hash(self):
+    def EPD_hash(self, clocks=False):
         result = ''
         for i, rank in enumerate(self.board):
             e_count = 0
@@ -106,7 +190,7 @@ class Chess:
                 result += str(e_count)
             if i < 7:
                 result += '/'
-        if self.p_move == -1:
+        if self.p_move == 1:
             result += ' w'
         else:
             result += ' b'
@@ -127,16 +211,65 @@ class Chess:
             result += '-'
         else:
             result += f'{self.x[self.en_passant[0]]}{self.y[self.en_passant[1]]}'
+        if clocks == True:
+            result += f' {self.halfmove} {self.fullmove}'
         return result
 
     """
-    Input: EPD - string representing the current game in EPD hash format
-    Description: update game state to requirements in supplied EPD hash
+    Input: text - string representing the operations of an EPD record, e.g. 'bm Qxf7#; id "mate 1";'
+    Description: parse EPD operations, operands may be quoted strings
+    Output: dictionary of opcode to list of operand strings
+    """
+    def parse_EPD_operations(self, text):
+        ops = {}
+        opcode = None
+        token = ''
+        quoted = False
+        for c in text + ';':
+            if quoted:
+                if c == '"':
+                    quoted = False
+                    ops[opcode].append(token)
+                    token = ''
+                else:
+                    token += c
+            elif c == '"' and opcode != None:
+                quoted = True
+            elif c.isspace() or c == ';':
+                if token:
+                    if opcode == None:
+                        opcode = token
+                        ops[opcode] = []
+                    else:
+                        ops[opcode].append(token)
+                    token = ''
+                if c == ';':
+                    opcode = None
+            else:
+                token += c
+        return ops
+
+    """
+    Input: EPD - string representing the current game in EPD hash format, FEN halfmove and fullmove fields
+                 or EPD operations (bm, am, id, hmvc, fmvn ...) may follow the four position fields
+    Description: update game state to requirements in supplied EPD hash, operations are kept in EPD_ops
     Output: boolean representing the outcome of the function
     """
     def load_EPD(self, EPD):
-        data = EPD.split(' ')
-        if len(data) == 4:
+        data = EPD.split(None, 4)
+        self.EPD_ops = {} #Operations of the loaded EPD record by opcode
+        if len(data) == 5:
+            rest = data[4].split(None, 2)
+            if len(rest) >= 2 and rest[0].isdigit() and rest[1].isdigit(): #FEN clocks
+                data = data[:4] + rest[:2]
+                rest = rest[2:]
+            else:
+                rest = [data[4]]
+                data = data[:4]
+            self.EPD_ops = self.parse_EPD_operations(rest[0]) if rest else {}
+            if 'hmvc' in self.EPD_ops and len(data) == 4:
+                data += [self.EPD_ops['hmvc'][0], self.EPD_ops.get('fmvn', ['1'])[0]]
+        if len(data) >= 4:
             for x, rank in enumerate(data[0].split('/')):
                 y = 0
                 for p in rank:
@@ -165,10 +298,34 @@ class Chess:
             else:
                 self.castling[3] = 0
             self.en_passant = None if data[3] == '-' else self.board_2_array(data[3])
+            self.halfmove = int(data[4]) if len(data) > 4 and data[4].isdigit() else 0
+            self.fullmove = int(data[5]) if len(data) > 5 and data[4].isdigit() and data[5].isdigit() else 1
+            self.history = []
+            self.move_list = []
+            self.cur_hash = self.EPD_hash()
+            self.status = None
             return True
         else:
             return False
 
+    """
+    Input: position - Position object
+    Description: update game state to a position snapshot, copied square by square without parsing an EPD hash
+    Output: None
+    """
+    def load_position(self, position):
+        self.EPD_ops = {}
+        self.board = [[position.board[y * 8 + x] - 6 for x in range(8)] for y in range(8)]
+        self.p_move = position.p_move
+        self.castling = [position.castling >> i & 1 for i in range(4)]
+        self.en_passant = None if position.en_passant == None else (position.en_passant % 8, position.en_passant // 8)
+        self.halfmove = position.halfmove
+        self.fullmove = position.fullmove
+        self.history = []
+        self.move_list = []
+        self.cur_hash = self.EPD_hash()
+        self.status = None
+
     """
     Input: part - integer representing the peice that was moved
            cur_cord - string representing the current cordinate of the peice
@@ -193,20 +350,124 @@ class Chess:
             move += str(next_cord).lower()
         self.log.append(move)
 
+    """
+    Input: cur_pos - string representing the current cordinate of the peice
+           next_pos - string representing the next cordinate of the peice
+           promotion - string representing the new part if a pawn is promoted (Default=None, queen) [OPTIONAL]
+    Description: standard algebraic notation of a legal move, with disambiguation, O-O castling and check or mate suffix
+    Output: string representing the move or None if the move is not legal
+    """
+    def san(self, cur_pos, next_pos, promotion=None):
+        cp = self.board_2_array(cur_pos)
+        np = self.board_2_array(next_pos)
+        if not self.valid_move(cp, np):
+            return None
+        part = self.board[cp[1]][cp[0]]
+        if abs(part) == 6 and abs(np[0] - cp[0]) == 2:
+            move = 'O-O' if np[0] > cp[0] else 'O-O-O'
+        else:
+            capture = self.is_capture(cp, np)
+            target = f'{self.x[np[0]]}{self.y[np[1]]}'
+            if abs(part) == 1:
+                move = (f'{self.x[cp[0]]}x' if capture else '') + target
+                if np[1] == 0 or np[1] == 7:
+                    move += '=' + str(promotion or 'q').upper()
+            else:
+                move = getattr(Chess, self.parts[abs(part)])().notation
+                rivals = [(x, y) for y in range(8) for x in range(8) if self.board[y][x] == part and (x, y) != cp and self.valid_move((x, y), np)]
+                if rivals:
+                    if all(x != cp[0] for x, _ in rivals):
+                        move += self.x[cp[0]]
+                    elif all(y != cp[1] for _, y in rivals):
+                        move += self.y[cp[1]]
+                    else:
+                        move += self.x[cp[0]] + self.y[cp[1]]
+                move += ('x' if capture else '') + target
+        after = deepcopy(self)
+        after.interactive = False
+        after.move(cur_pos, next_pos, promotion or ('q' if abs(part) == 1 and (np[1] == 0 or np[1] == 7) else None))
+        if after.in_check():
+            move += '#' if after.legal_move_count(limit=1) == 0 else '+'
+        return move
+
+    """
+    Input: san - string representing a move in standard algebraic notation, 0-0 castling is accepted too
+    Description: find the move a SAN string describes, a lone candidate is not checked for legality since play does that
+    Output: tuple of (current x,y cordinate, next x,y cordinate, promotion part or None), None if there is no such move or it is ambiguous
+    """
+    def parse_san(self, san):
+        san = san.rstrip('+#!?')
+        rank = 7 if self.p_move == 1 else 0
+        if san in ['O-O', '0-0']:
+            return ((4, rank), (6, rank), None) if self.valid_move((4, rank), (6, rank)) else None
+        if san in ['O-O-O', '0-0-0']:
+            return ((4, rank), (2, rank), None) if self.valid_move((4, rank), (2, rank)) else None
+        promotion = None
+        if '=' in san:
+            san, promotion = san.split('=', 1)
+            promotion = promotion.lower()
+        elif len(san) > 2 and san[-1] in 'NBRQ' and san[-2] in '18':
+            san, promotion = san[:-1], san[-1].lower() #Promotion written without =
+        if len(san) < 2 or san[-2] not in self.x or san[-1] not in self.y:
+            return None
+        np = (self.x.index(san[-2]), self.y.index(san[-1]))
+        body = san[:-2].replace('x', '')
+        part = 1
+        if body and body[0] in 'NBRQK':
+            part = self.notation[body[0].lower()]
+            body = body[1:]
+        from_x = self.x.index(body[0]) if body and body[0] in self.x else None
+        from_y = self.y.index(body[-1]) if body and body[-1] in self.y else None
+        part *= self.p_move
+        p_name = self.parts[abs(part)]
+        found = []
+        for y in range(8) if from_y == None else [from_y]:
+            for x in range(8) if from_x == None else [from_x]:
+                if self.board[y][x] == part and np in getattr(Chess, p_name).movement(self, self.p_move, (x, y), capture=True):
+                    found.append((x, y))
+        if len(found) > 1:
+            found = [cp for cp in found if not self.leaves_king_in_check(cp, np)] #SAN leaves out pinned pieces
+        if len(found) != 1:
+            return None
+        return found[0], np, promotion
+
     """
     Input: cur_cord - string representing the current cordinate of the peice
            next_pos - string representing the next cordinate of the peice
+           promotion - string representing the new part if a pawn is promoted (Default=None) [OPTIONAL]
     Description: move peice on game board
     Output: boolean representing the state of the function
     """
-    def move(self, cur_pos, next_pos):
-        cp = self.board_2_array(cur_pos)
-        np = self.board_2_array(next_pos)
+    def move(self, cur_pos, next_pos, promotion=None):
+        return self.play(self.board_2_array(cur_pos), self.board_2_array(next_pos), promotion)
+
+    """
+    Input: cp - tuple containing the current x,y cordinate of the peice
+           np - tuple containing the next x,y cordinate of the peice
+           promotion - string representing the new part if a pawn is promoted (Default=None) [OPTIONAL]
+    Description: move peice on game board by cordinates, the integer path used by move and game replay
+    Output: boolean representing the state of the function
+    """
+    def play(self, cp, np, promotion=None):
         if self.valid_move(cp, np) == True:
             part = self.board[cp[1]][cp[0]]
+            n_part = None
+            if (part == 1 and np[1] == 0) or (part == -1 and np[1] == 7):
+                n_part = self.promotion_part(promotion)
+                if n_part == None:
+                    return False
+            self.history.append(([row[:] for row in self.board], self.p_move, self.castling[:], self.en_passant,
+                                 self.halfmove, self.fullmove, self.prev_move, self.cur_hash, len(self.log)))
+            self.move_list.append((cp, np, n_part))
+            if self.is_capture(cp, np) or part == 1 or part == -1:
+                self.halfmove = 0
+            else:
+                self.halfmove += 1
+            if self.p_move == -1:
+                self.fullmove += 1
             if np == self.en_passant and (part == 1 or part == -1):
                 self.board[self.en_passant[1]-(self.p_move*(-1))][self.en_passant[0]] = 0
-            self.log_move(part, cur_pos, next_pos, cp, np)
+            self.log_move(part, f'{self.x[cp[0]]}{self.y[cp[1]]}', f'{self.x[np[0]]}{self.y[np[1]]}', cp, np, n_part)
             self.prev_move = self.board
             if (part == 1 and np[1] == 4) or (part == -1 and np[1] == 3):
                 self.en_passant = (np[0], np[1]+1) if part == 1 else (np[0], np[1]-1)
@@ -237,16 +498,54 @@ class Chess:
                     else:
                         self.castling[2] = 0
             self.board[cp[1]][cp[0]] = 0
-            self.board[np[1]][np[0]] = part
-            hash = self.EPD_hash()
-            if hash in self.EPD_table:
-                self.EPD_table[hash] += 1
-            else:
-                self.EPD_table[hash] = 1
+            self.board[np[1]][np[0]] = part if n_part == None else self.notation[n_part]*self.p_move
             self.p_move = self.p_move * (-1)
+            self.cur_hash = self.EPD_hash()
+            if self.cur_hash in self.EPD_table:
+                self.EPD_table[self.cur_hash] += 1
+            else:
+                self.EPD_table[self.cur_hash] = 1
+            self.status = None
             return True
         return False
 
+    """
+    Input: None
+    Description: take back the last move, restoring the board, clocks and repetition counts
+    Output: boolean representing the state of the function
+    """
+    def undo(self):
+        if len(self.history) == 0:
+            return False
+        if self.cur_hash in self.EPD_table:
+            self.EPD_table[self.cur_hash] -= 1
+            if self.EPD_table[self.cur_hash] <= 0:
+                del self.EPD_table[self.cur_hash]
+        board, self.p_move, castling, self.en_passant, self.halfmove, self.fullmove, self.prev_move, self.cur_hash, log_len = self.history.pop()
+        self.castling = castling[:] #History entries may be shared with copies of the game, never change them
+        for y, row in enumerate(board):
+            self.board[y][:] = row
+        del self.log[log_len:]
+        del self.move_list[len(self.history):]
+        self.status = None
+        return True
+
+    """
+    Input: hash - string representing the game state to count (Default=None, current position) [OPTIONAL]
+    Description: number of times a position has occurred in the game
+    Output: integer representing the repetition count
+    """
+    def repetition_count(self, hash=None):
+        return self.EPD_table.get(self.cur_hash if hash == None else hash, 0)
+
+    """
+    Input: None
+    Description: check if the game could be drawn by the fifty move or three fold rule, never asks for input so it is usable inside search
+    Output: boolean representing if a draw is claimable
+    """
+    def is_claimable_draw(self):
+        return self.halfmove >= 100 or self.repetition_count() >= 3
+
     """
     Input: cur_cord - string representing the current cordinate of the peice
            next_pos - string representing the next cordinate of the peice
@@ -262,34 +561,82 @@ class Chess:
                 v_moves = getattr(Chess, p_name).movement(self, self.p_move, cur_pos, capture=True)
                 
                 if next_pos in v_moves:
-                    # Make temporary move to check if it puts own king in check
-                    temp_board = deepcopy(self)
-                    temp_board.board[next_pos[1]][next_pos[0]] = temp_board.board[cur_pos[1]][cur_pos[0]]
-                    temp_board.board[cur_pos[1]][cur_pos[0]] = 0
-                    
-                    # Find king's position
-                    king_pos = None
-                    for y in range(8):
-                        for x in range(8):
-                            if temp_board.board[y][x] == 6 * self.p_move:
-                                king_pos = (x, y)
-                                break
-                        if king_pos:
-                            break
-                    
-                    # Check if any opponent piece can capture the king
-                    if king_pos:
-                        for y in range(8):
-                            for x in range(8):
-                                opp_piece = temp_board.board[y][x]
-                                if opp_piece * self.p_move < 0:  # opponent's piece
-                                    opp_name = self.parts[abs(opp_piece)]
-                                    opp_moves = getattr(Chess, opp_name).movement(temp_board, -self.p_move, (x, y), capture=True)
-                                    if king_pos in opp_moves:  # King is in check
-                                        return False
-                    return True
+                    # Make sure the move does not put own king in check
+                    return not self.leaves_king_in_check(cur_pos, next_pos)
         return False
 
+    """
+    Input: player - integer representing which player's king to find
+    Description: find the king of a player on the game board
+    Output: tuple of x,y cordinates of the king or None if there is no king
+    """
+    def king_position(self, player):
+        for y, row in enumerate(self.board):
+            for x, part in enumerate(row):
+                if part == 6 * player:
+                    return (x, y)
+        return None
+
+    """
+    Input: target - tuple containing the board cordinate being attacked
+           player - integer representing which player is attacking
+    Description: determine if any peice of a player attacks a board cordinate
+    Output: boolean representing if the cordinate is attacked
+    """
+    def is_attacked(self, target, player):
+        for y, row in enumerate(self.board):
+            for x, part in enumerate(row):
+                if part * player > 0:
+                    p_name = self.parts[abs(part)]
+                    if target in getattr(Chess, p_name).movement(self, player, (x, y), capture=True):
+                        return True
+        return False
+
+    """
+    Input: player - integer representing which player's king to check (Default=None, current player) [OPTIONAL]
+    Description: determine if a player's king is in check
+    Output: boolean representing if the king is in check
+    """
+    def in_check(self, player=None):
+        player = self.p_move if player == None else player
+        k_pos = self.king_position(player)
+        return k_pos != None and self.is_attacked(k_pos, player * (-1))
+
+    """
+    Input: cur_pos - tuple containing the current position of the peice
+           next_pos - tuple containing the next position of the peice
+    Description: determine if a move leaves the moving player's king in check, only the board is copied
+    Output: boolean representing if the king would be in check after the move
+    """
+    def leaves_king_in_check(self, cur_pos, next_pos):
+        part = self.board[cur_pos[1]][cur_pos[0]]
+        player = 1 if part > 0 else -1
+        temp_board = copy(self) #Shallow copy, only the board is changed below
+        temp_board.board = [row[:] for row in self.board]
+        if abs(part) == 1 and next_pos == self.en_passant and cur_pos[0] != next_pos[0]:
+            temp_board.board[next_pos[1]+player][next_pos[0]] = 0
+        temp_board.board[next_pos[1]][next_pos[0]] = part
+        temp_board.board[cur_pos[1]][cur_pos[0]] = 0
+        return temp_board.in_check(player)
+
+    """
+    Input: limit - integer representing the count to stop at (Default=None) [OPTIONAL]
+    Description: count the legal moves of the current player, stopping early once limit is reached
+    Output: integer representing the number of legal moves
+    """
+    def legal_move_count(self, limit=None):
+        count = 0
+        for y, row in enumerate(self.board):
+            for x, part in enumerate(row):
+                if part * self.p_move > 0:
+                    p_name = self.parts[abs(part)]
+                    for move in getattr(Chess, p_name).movement(self, self.p_move, (x, y), capture=True):
+                        if not self.leaves_king_in_check((x, y), move):
+                            count += 1
+                            if limit != None and count >= limit:
+                                return count
+        return count
+
     """
     Input: capture - boolean representing control of if you do not allow moves past peice capture (Default=True) [OPTIONAL]
     Description: determine all possible board moves for current game state
@@ -385,28 +732,62 @@ class Chess:
 
     """
     Input: n_part - string representing the new part you want to promote your pawn to (Default=None) [OPTIONAL]
-    Description: update game board with new part for pawn promotion
-    Output: boolean representing the state of the function
+    Description: choose the part for a pawn promotion, the player is asked when interactive and no part is given otherwise a queen is used
+    Output: string representing the notation of the new part or None if the part is not valid
     """
-    def pawn_promotion(self, n_part=None):
+    def promotion_part(self, n_part=None):
         if n_part == None:
+            if self.interactive == False:
+                return 'q'
             while True:
                 n_part = input('\nPawn Promotion - What peice would you like to switch too:\n\n*Queen[q]\n*Bishop[b]\n*Knight[n]\n*Rook[r]\n')
                 if str(n_part).lower() not in ['q', 'b', 'n', 'r', 'queen', 'bishop', 'knight', 'rook']:
                     print('\nInvalid Option')
                 else:
                     break
-            if len(n_part) > 1:
-                n_part = getattr(Chess, str(n_part).capitalize())().notation
-        part = self.notation[str(n_part).lower()]*self.p_move
+        if str(n_part).lower() not in ['q', 'b', 'n', 'r', 'queen', 'bishop', 'knight', 'rook']:
+            return None
+        if len(n_part) > 1:
+            n_part = getattr(Chess, str(n_part).capitalize())().notation
+        return str(n_part).lower()
+
+    """
+    Input: n_part - string representing the new part you want to promote your pawn to (Default=None) [OPTIONAL]
+    Description: update game board with new part for pawn promotion
+    Output: boolean representing the state of the function
+    """
+    def pawn_promotion(self, n_part=None):
+        n_part = self.promotion_part(n_part)
+        if n_part == None:
+            return False
+        part = self.notation[n_part]*self.p_move
         pos = self.board_2_array(self.log[-1].replace('+', '').split('x')[-1])
         if pos != None:
             self.board[pos[1]][pos[0]] = part
             self.log[-1] += f'={str(n_part).upper()}'
+            self.status = None
             return True
         else:
             return False
 
+    """
+    Input: rule - string representing the draw rule that can be claimed (Choices=['50M','3F'])
+           question - string representing the question asked when the policy is to ask
+    Description: decide if a claimable draw is claimed, following the draw claim policy of the game
+    Output: boolean representing if the draw is claimed
+    """
+    def claim_draw(self, rule, question):
+        policy = self.draw_claim.get(rule, 'ask')
+        if policy == 'ask' and self.interactive == True:
+            while True:
+                choice = input(question)
+                if choice.lower() == 'y' or choice.lower() == 'yes' or choice.lower() == '1':
+                    return True
+                elif choice.lower() == 'n' or choice.lower() == 'no' or choice.lower() == '0':
+                    return False
+                print('Unsupported answer')
+        return policy != 'no'
+
     """
     Input: moves - dictionary containing all possible moves for current game state
            choice - string representing if you want a draw or not (Default=None) (Choices=['y','yes','n','no']) [OPTIONAL]
@@ -414,20 +795,10 @@ class Chess:
     Output: boolean representing the state of the function
     """
     def fifty_move_rule(self, moves, choice=None):
-        if len(self.log) > 100:
-            for m in self.log[-100:]:
-                if 'x' in m or m[0].islower():
-                    return False
-        else:
+        if self.halfmove < 100:
             return False
         if choice == None:
-            while True:
-                choice = input('Fifty move rule - do you want to claim a draw? [Y/N]')
-                if choice.lower() == 'y' or choice.lower() == 'yes' or choice.lower() == '1':
-                    return True
-                elif choice.lower() == 'n' or choice.lower() == 'no' or choice.lower() == '0':
-                    return False
-            print('Unsupported answer')
+            return self.claim_draw('50M', 'Fifty move rule - do you want to claim a draw? [Y/N]')
         if choice.lower() == 'y' or choice.lower() == 'yes' or choice.lower() == '1':
             return True
         elif choice.lower() == 'n' or choice.lower() == 'no' or choice.lower() == '0':
@@ -439,13 +810,7 @@ class Chess:
     Output: boolean representing the state of the function
     """
     def seventy_five_move_rule(self, moves):
-        if len(self.log) > 150:
-            for m in self.log[-150:]:
-                if 'x' in m or m[0].islower():
-                    return False
-        else:
-            return False
-        return True
+        return self.halfmove >= 150
 
     """
     Input: hash - string representing the game state you want to check for in game EPD hash table
@@ -454,14 +819,8 @@ class Chess:
     """
     def three_fold_rule(self, hash):
         if hash in self.EPD_table:
-            if self.EPD_table[hash] == 3:
-                while True:
-                    choice = input('Three fold rule - do you want to claim a draw? [Y/N]')
-                    if choice.lower() == 'y' or choice.lower() == 'yes' or choice.lower() == '1':
-                        return True
-                    elif choice.lower() == 'n' or choice.lower() == 'no' or choice.lower() == '0':
-                        return False
-                    print('Unsupported answer')
+            if self.EPD_table[hash] >= 3:
+                return self.claim_draw('3F', 'Three fold rule - do you want to claim a draw? [Y/N]')
         return False
 
     """
@@ -498,12 +857,12 @@ class Chess:
         return False
 
     """
-    Input: moves - dictionary containing all possible moves for current game state
+    Input: moves - dictionary containing all possible moves for current game state (Default=None, unused) [OPTIONAL]
     Description: check to see if the current state is a stalemate
     Output: boolean representing the state of the function
     """
-    def is_stalemate(self, moves):
-        if False not in [False for p, a in moves.items() if len(a) > 0 and ((self.p_move == 1 and str(p[0]).isupper()) or (self.p_move == -1 and str(p[0]).islower()))]:
+    def is_stalemate(self, moves=None):
+        if self.legal_move_count(limit=1) == 0 and not self.in_check():
             return True
         return False
 
@@ -524,10 +883,12 @@ class Chess:
 
     """
     Input: None
-    Description: check to see if it's the end of the game
+    Description: check to see if it's the end of the game, the result is cached until the position changes
     Output: list containing the state of the game
     """
     def is_end(self):
+        if self.status != None:
+            return list(self.status)
         w_king = False
         b_king = False
         for y, row in enumerate(self.board):
@@ -537,19 +898,18 @@ class Chess:
                 elif self.board[y][x] == self.King().value:
                     w_king = True
         if w_king == False and b_king == False:
-            return [0, 1, 0]
+            self.status = [0, 1, 0]
         elif w_king == False:
-            return [0, 0, 1]
+            self.status = [0, 0, 1]
         elif b_king == False:
-            return [1, 0, 0]
-        moves = self.possible_board_moves(capture=True)
-        check_mate = self.is_checkmate(moves)
-        hash = self.EPD_hash()
-        if sum(check_mate) > 0:
-            return check_mate
-        elif self.is_draw(moves, hash) == True:
-            return [0, 1, 0]
-        return [0, 0, 0]
+            self.status = [1, 0, 0]
+        elif self.legal_move_count(limit=1) == 0 and self.in_check():
+            self.status = [0, 0, 1] if self.p_move == 1 else [1, 0, 0]
+        elif self.is_draw(None, self.cur_hash) == True:
+            self.status = [0, 1, 0]
+        else:
+            self.status = [0, 0, 0]
+        return list(self.status)
 
     """
     Input: hash - string representing the game state you want to check for in game EPD hash table
@@ -563,58 +923,109 @@ class Chess:
             return 'PP' #Pawn promotion
         elif hash in self.EPD_table and self.EPD_table[hash] == 3:
             return '3F' #3 Fold
-        elif len(self.log) > 100:
-            for m in self.log[-100:]:
-                if 'x' in m or m[0].islower():
-                    return None
+        elif self.halfmove >= 100:
             return '50M' #50 move
         else:
             return None
 
     """
     Input: None
-    Description: Suggest a move using the Alpha-Beta pruning algorithm
-    Output: tuple representing the suggested move (start_square, end_square)
+    Description: look the position up in the opening book
+    Output: tuple representing the book move (start_square, end_square[, n_part]), None if there is no book or no entry
     """
-    def get_alpha_beta_move(self, depth=3):
+    def book_move(self):
+        if self.book == None:
+            return None
+        move = self.book.choose(self)
+        if move == None:
+            return None
+        cp, np, n_part = move
+        return self.move_notation(f'{self.x[cp[0]]}{self.y[cp[1]]}', np, n_part)
+
+    """
+    Input: None
+    Description: best move of a position covered by the endgame tablebases, a won ending is converted without searching
+    Output: tuple representing the move (start_square, end_square[, n_part]), None if there are no tablebases or the position is not covered
+    """
+    def tablebase_move(self):
+        if self.tablebase == None:
+            return None
+        move = self.tablebase.best_move(self)
+        if move == None:
+            return None
+        cp, np, n_part = move
+        return self.move_notation(f'{self.x[cp[0]]}{self.y[cp[1]]}', np, n_part)
+
+    """
+    Input: None
+    Description: tablebase score of the position, used in place of searching it
+    Output: integer representing the score for white, None if there are no tablebases or the position is not covered
+    """
+    def tablebase_score(self):
+        return None if self.tablebase == None else self.tablebase.score(self)
+
+    """
+    Input: depth - integer representing the depth of the search (Default=3) [OPTIONAL]
+           quiescence - boolean representing if captures are searched past depth (Default=False) [OPTIONAL]
+           stats - SearchStats object the search is recorded in (Default=None) [OPTIONAL]
+    Description: Suggest a move using the Alpha-Beta pruning algorithm, book and tablebase moves are played without searching
+    Output: tuple representing the suggested move (start_square, end_square), (start_square, end_square, n_part) for promotions
+    """
+    def get_alpha_beta_move(self, depth=3, quiescence=False, stats=None):
         """Get the best move using Alpha-Beta pruning with configurable depth."""
-        _, best_move = self.alpha_beta(depth, float('-inf'), float('inf'), True)
+        book_move = self.book_move() or self.tablebase_move()
+        if book_move != None:
+            return book_move
+        prev_stats, self.stats = self.stats, stats or self.stats
+        score, best_move = self.alpha_beta(depth, float('-inf'), float('inf'), self.p_move == 1, quiescence)
+        if self.stats != None:
+            self.stats.iteration(depth, score, best_move)
+        self.stats = prev_stats
         return best_move if best_move else ("No move", "No move")
 
     """
-    Input: None
-    Description: Suggest a move using an Evolutionary Algorithm
-    Output: tuple representing the suggested move (start_square, end_square)
+    Input: population_size - integer representing the number of moves in the population (Default=10) [OPTIONAL]
+           generations - integer representing the number of generations (Default=3) [OPTIONAL]
+           stats - SearchStats object the search is recorded in, each fitness evaluation is a node (Default=None) [OPTIONAL]
+    Description: Suggest a move using an Evolutionary Algorithm, book and tablebase moves are played without searching
+    Output: tuple representing the suggested move (start_square, end_square), (start_square, end_square, n_part) for promotions
     """
-    def evolutionary_algorithm(self, population_size=10, generations=3):
+    def evolutionary_algorithm(self, population_size=10, generations=3, stats=None):
         """Get the best move using an Evolutionary Algorithm with configurable parameters."""
+        book_move = self.book_move() or self.tablebase_move()
+        if book_move != None:
+            return book_move
         mutation_rate = 0.1
+        stats = stats or self.stats
         
-        # Initialize population with random moves
+        # Initialize population, seeded with the captures that do not lose material (SEE >= 0)
         population = []
         possible_moves = self.possible_board_moves()
+        candidates = self.order_moves(possible_moves, self.p_move, prune_losing=True) or self.order_moves(possible_moves, self.p_move)
+        if not candidates:
+            return ("No move", "No move")
+        captures = [m for m in candidates if self.is_capture(self.board_2_array(m[0]), m[1])]
         
-        for _ in range(population_size):
-            move = None
-            for start_square, moves in possible_moves.items():
-                if ((self.p_move == 1 and start_square[0].isupper()) or 
-                    (self.p_move == -1 and start_square[0].islower())) and moves:
-                    move_coord = moves[0]
-                    move = (start_square, f"{self.x[move_coord[0]]}{self.y[move_coord[1]]}")
-                    break
-            if move:
-                population.append(move)
+        for move in captures[:population_size // 2]:
+            population.append(self.move_notation(*move))
+        while len(population) < population_size:
+            population.append(self.move_notation(*random.choice(candidates)))
         
         # Evolution process
-        for _ in range(generations):
+        for generation in range(generations):
             # Evaluate fitness
             fitness_scores = []
             for move in population:
                 temp_board = deepcopy(self)
-                if temp_board.move(move[0], move[1]):
+                if stats != None:
+                    stats.count_node()
+                if temp_board.move(*move):
                     fitness_scores.append(temp_board.evaluate_position() * self.p_move)
                 else:
                     fitness_scores.append(float('-inf'))
+            if stats != None:
+                best = fitness_scores.index(max(fitness_scores))
+                stats.iteration(generation + 1, fitness_scores[best] * self.p_move, population[best])
             
             # Selection
             selected = []
@@ -632,23 +1043,20 @@ class Chess:
                 
                 # Mutation: randomly select a new move
                 if random.random() < mutation_rate:
-                    for start_square, moves in possible_moves.items():
-                        if ((self.p_move == 1 and start_square[0].isupper()) or 
-                            (self.p_move == -1 and start_square[0].islower())) and moves:
-                            move_coord = random.choice(moves)
-                            child = (start_square, f"{self.x[move_coord[0]]}{self.y[move_coord[1]]}")
-                            break
+                    child = self.move_notation(*random.choice(candidates))
                 
                 new_population.append(child)
             
             population = new_population
+            if self.stop_search != None and self.stop_search():
+                break
         
         # Return best move from final population
         best_move = None
         best_score = float('-inf')
         for move in population:
             temp_board = deepcopy(self)
-            if temp_board.move(move[0], move[1]):
+            if temp_board.move(*move):
                 score = temp_board.evaluate_position() * self.p_move
                 if score > best_score:
                     best_score = score
@@ -657,12 +1065,18 @@ class Chess:
         return best_move if best_move else ("No move", "No move")
 
     """
-    Input: None
-    Description: Suggest a move using Particle Swarm Optimization (PSO)
-    Output: tuple representing the suggested move (start_square, end_square)
+    Input: num_particles - integer representing the number of particles (Default=10) [OPTIONAL]
+           iterations - integer representing the number of iterations (Default=5) [OPTIONAL]
+           stats - SearchStats object the search is recorded in, each fitness evaluation is a node (Default=None) [OPTIONAL]
+    Description: Suggest a move using Particle Swarm Optimization (PSO), book and tablebase moves are played without searching
+    Output: tuple representing the suggested move (start_square, end_square), (start_square, end_square, n_part) for promotions
     """
-    def particle_swarm_optimization(self, num_particles=10, iterations=5):
+    def particle_swarm_optimization(self, num_particles=10, iterations=5, stats=None):
         """Get the best move using PSO with configurable parameters."""
+        book_move = self.book_move() or self.tablebase_move()
+        if book_move != None:
+            return book_move
+        stats = stats or self.stats
         w = 0.7  # Inertia weight
         c1 = 1.5  # Cognitive weight
         c2 = 1.5  # Social weight
@@ -670,12 +1084,10 @@ class Chess:
         possible_moves = self.possible_board_moves()
         valid_moves = []
         
-        # Collect valid moves for current player
-        for start_square, moves in possible_moves.items():
-            if ((self.p_move == 1 and start_square[0].isupper()) or 
-                (self.p_move == -1 and start_square[0].islower())) and moves:
-                for move in moves:
-                    valid_moves.append((start_square, f"{self.x[move[0]]}{self.y[move[1]]}"))
+        # Collect valid moves for current player, captures that lose material (SEE < 0) are pruned
+        candidates = self.order_moves(possible_moves, self.p_move, prune_losing=True) or self.order_moves(possible_moves, self.p_move)
+        for move in candidates:
+            valid_moves.append(self.move_notation(*move))
         
         if not valid_moves:
             return ("No move", "No move")
@@ -697,7 +1109,9 @@ class Chess:
             
             # Initialize personal best
             temp_board = deepcopy(self)
-            if temp_board.move(particle[0], particle[1]):
+            if stats != None:
+                stats.count_node()
+            if temp_board.move(*particle):
                 score = temp_board.evaluate_position() * self.p_move
             else:
                 score = float('-inf')
@@ -710,7 +1124,7 @@ class Chess:
         global_best_position = particles[personal_best_scores.index(global_best_score)]
         
         # PSO iterations
-        for _ in range(iterations):
+        for iteration in range(iterations):
             for i in range(num_particles):
                 # Update velocity
                 r1, r2 = random.random(), random.random()
@@ -724,7 +1138,9 @@ class Chess:
                 
                 # Evaluate new position
                 temp_board = deepcopy(self)
-                if temp_board.move(particles[i][0], particles[i][1]):
+                if stats != None:
+                    stats.count_node()
+                if temp_board.move(*particles[i]):
                     score = temp_board.evaluate_position() * self.p_move
                 else:
                     score = float('-inf')
@@ -738,6 +1154,10 @@ class Chess:
                     if score > global_best_score:
                         global_best_score = score
                         global_best_position = particles[i]
+            if stats != None:
+                stats.iteration(iteration + 1, global_best_score * self.p_move, global_best_position)
+            if self.stop_search != None and self.stop_search():
+                break
         
         return global_best_position
 
@@ -749,14 +1169,6 @@ class Chess:
     def evaluate_position(self):
         """Evaluate the current board position."""
         score = 0
-        piece_values = {
-            1: 100,   # Pawn
-            2: 320,   # Knight
-            3: 330,   # Bishop
-            4: 500,   # Rook
-            5: 900,   # Queen
-            6: 20000  # King
-        }
         
         # Material score
         for y in range(8):
@@ -765,10 +1177,168 @@ class Chess:
                 if piece != 0:
                     piece_type = abs(piece)
                     multiplier = 1 if piece > 0 else -1
-                    score += piece_values[piece_type] * multiplier
+                    score += self.values[piece_type] * multiplier
+                    if self.pst != None:
+                        score += self.pst[piece_type][y * 8 + x if piece > 0 else (7 - y) * 8 + x] * multiplier
         
         return score
 
+    """
+    Input: cur_pos - tuple containing the current position of the peice
+           next_pos - tuple containing the next position of the peice
+    Description: determine if a move captures an opponent peice (en passant included)
+    Output: boolean representing if the move is a capture
+    """
+    def is_capture(self, cur_pos, next_pos):
+        part = self.board[cur_pos[1]][cur_pos[0]]
+        if self.board[next_pos[1]][next_pos[0]] * part < 0:
+            return True
+        return abs(part) == 1 and next_pos == self.en_passant and cur_pos[0] != next_pos[0]
+
+    """
+    Input: target - tuple containing the board cordinate being attacked
+           player - integer representing which player the attacking peices belong to
+    Description: find every peice of a player that attacks a board cordinate
+    Output: list of tuples containing the position of each attacking peice
+    """
+    def attackers(self, target, player):
+        result = []
+        for y, row in enumerate(self.board):
+            for x, part in enumerate(row):
+                if part * player > 0:
+                    p_name = self.parts[abs(part)]
+                    if target in getattr(Chess, p_name).movement(self, player, (x, y), capture=True):
+                        result.append((x, y))
+        return result
+
+    """
+    Input: cur_pos - tuple containing the current position of the capturing peice
+           next_pos - tuple containing the position of the captured peice
+    Description: static exchange evaluation, resolve the capture sequence on next_pos by always
+                 recapturing with the least valuable attacker (x-rays included) without searching it,
+                 a pawn reaching the last rank is counted as promoting to a queen
+    Output: integer representing the material won (positive) or lost (negative) by the moving player
+    """
+    def static_exchange_evaluation(self, cur_pos, next_pos):
+        part = self.board[cur_pos[1]][cur_pos[0]]
+        if part == 0:
+            return 0
+        player = 1 if part > 0 else -1
+        promotes = next_pos[1] in (0, 7) #Only a pawn capturing or moving onto the last rank promotes
+        temp_board = copy(self) #Shallow copy, only the board is changed below
+        temp_board.board = [row[:] for row in self.board]
+        captured = temp_board.board[next_pos[1]][next_pos[0]]
+        if captured == 0 and abs(part) == 1 and next_pos == self.en_passant:
+            temp_board.board[next_pos[1]+player][next_pos[0]] = 0
+            captured = -player
+        on_square = 5 if abs(part) == 1 and promotes else abs(part)
+        gain = [(self.values[abs(captured)] if captured != 0 else 0) + self.values[on_square] - self.values[abs(part)]]
+        temp_board.board[cur_pos[1]][cur_pos[0]] = 0
+        temp_board.board[next_pos[1]][next_pos[0]] = on_square * player
+        side = player * (-1)
+        while True:
+            a_pos = temp_board.attackers(next_pos, side)
+            if not a_pos:
+                break
+            a_pos = min(a_pos, key=lambda p: abs(temp_board.board[p[1]][p[0]])) #Least valuable attacker
+            attacker = abs(temp_board.board[a_pos[1]][a_pos[0]])
+            lands_as = 5 if attacker == 1 and promotes else attacker
+            gain.append(self.values[on_square] + self.values[lands_as] - self.values[attacker] - gain[-1])
+            on_square = lands_as
+            temp_board.board[next_pos[1]][next_pos[0]] = lands_as * side
+            temp_board.board[a_pos[1]][a_pos[0]] = 0
+            side = side * (-1)
+        for d in range(len(gain)-1, 0, -1):
+            gain[d-1] = -max(-gain[d-1], gain[d]) #Either side may stop capturing
+        return gain[0]
+
+    """
+    Input: moves - dictionary containing all possible moves for current game state
+           player - integer representing which player's moves to order
+           captures_only - boolean representing if quiet moves are left out (Default=False) [OPTIONAL]
+           prune_losing - boolean representing if captures that lose material are left out (Default=False) [OPTIONAL]
+    Description: order moves for searching, winning captures and promotions first (best SEE first), then quiet moves, then losing captures,
+                 pawn moves to the last rank are expanded into one move per promotion part
+    Output: list of tuples containing the start square, the move cordinate and the promotion part (None if not a promotion)
+    """
+    def order_moves(self, moves, player, captures_only=False, prune_losing=False):
+        ordered = []
+        for start_square, p_moves in moves.items():
+            if (player == 1 and start_square[0].isupper()) or (player == -1 and start_square[0].islower()):
+                cur_pos = self.board_2_array(start_square)
+                promotes = abs(self.board[cur_pos[1]][cur_pos[0]]) == 1 and cur_pos[1] == (1 if player == 1 else 6)
+                for move in p_moves:
+                    capture = self.is_capture(cur_pos, move)
+                    see = self.static_exchange_evaluation(cur_pos, move) if capture else 0
+                    for n_part in (['q', 'n', 'r', 'b'] if promotes else [None]):
+                        gain = see + (self.values[self.notation[n_part]] - self.values[1] if n_part != None else 0)
+                        if capture or n_part != None:
+                            if gain < 0 and prune_losing:
+                                continue
+                            ordered.append(((0 if gain >= 0 else 2, -gain), start_square, move, n_part))
+                        elif not captures_only:
+                            ordered.append(((1, 0), start_square, move, n_part))
+        ordered.sort(key=lambda m: m[0])
+        return [(start_square, move, n_part) for _, start_square, move, n_part in ordered]
+
+    """
+    Input: start_square - string representing the board cordinate of the peice
+           move - tuple containing the next position of the peice
+           n_part - string representing the promotion part (Default=None) [OPTIONAL]
+    Description: convert a generated move to the arguments of move()
+    Output: tuple of (start_square, end_square) or (start_square, end_square, n_part) for promotions
+    """
+    def move_notation(self, start_square, move, n_part=None):
+        end_square = f"{self.x[move[0]]}{self.y[move[1]]}"
+        return (start_square, end_square) if n_part == None else (start_square, end_square, n_part)
+
+    """
+    Input: alpha - float representing the alpha value for pruning
+           beta - float representing the beta value for pruning
+           maximizing_player - boolean representing if the current player is maximizing or minimizing
+    Description: Quiescence search, only captures that do not lose material (SEE >= 0) are searched,
+                 with delta_margin set captures that win too little to reach alpha (beta for the minimizer) are skipped
+    Output: tuple containing the evaluation score and the best move
+    """
+    def quiescence(self, alpha, beta, maximizing_player):
+        """Search captures until the position is quiet."""
+        if self.stats != None:
+            self.stats.count_node(quiescence=True)
+        stand_pat = self.evaluate_position()
+        if self.stop_search != None and self.stop_search():
+            return stand_pat, None
+        if maximizing_player:
+            if stand_pat >= beta:
+                return stand_pat, None
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat, None
+            beta = min(beta, stand_pat)
+        best_eval = stand_pat
+        best_move = None
+        for start_square, move, n_part in self.order_moves(self.possible_board_moves(), self.p_move, captures_only=True, prune_losing=True):
+            if self.delta_margin != None and n_part == None: #Delta pruning
+                captured = self.board[move[1]][move[0]]
+                gain = self.values[abs(captured)] if captured != 0 else self.values[1] #Empty target is en passant
+                if (stand_pat + gain + self.delta_margin <= alpha) if maximizing_player else (stand_pat - gain - self.delta_margin >= beta):
+                    continue
+            temp_board = deepcopy(self)
+            c_move = self.move_notation(start_square, move, n_part)
+            if temp_board.move(*c_move):
+                eval_score, _ = temp_board.quiescence(alpha, beta, not maximizing_player)
+                if maximizing_player and eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = c_move
+                    alpha = max(alpha, eval_score)
+                elif not maximizing_player and eval_score < best_eval:
+                    best_eval = eval_score
+                    best_move = c_move
+                    beta = min(beta, eval_score)
+                if beta <= alpha:
+                    break
+        return best_eval, best_move
+
     """
     Input: depth - integer representing the depth of the search
            alpha - float representing the alpha value for pruning
@@ -777,49 +1347,123 @@ class Chess:
     Description: Alpha-Beta pruning algorithm for move searching
     Output: tuple containing the evaluation score and the best move
     """
-    def alpha_beta(self, depth, alpha, beta, maximizing_player):
+    def alpha_beta(self, depth, alpha, beta, maximizing_player, quiescence=False):
         """Alpha-Beta pruning algorithm for move searching."""
+        stats = self.stats
+        if stats != None:
+            stats.count_node()
+        if self.stop_search != None and self.stop_search():
+            return self.evaluate_position(), None #Aborted, the caller discards the result
         if depth == 0:
+            if quiescence:
+                return self.quiescence(alpha, beta, maximizing_player)[0], None
             return self.evaluate_position(), None
 
+        tt_move = None
+        if self.tt != None:
+            entry = self.tt.get(self.cur_hash)
+            if stats != None:
+                stats.tt_probes += 1
+                stats.tt_hits += entry != None
+            if entry != None:
+                tt_move = entry[3]
+                if entry[0] >= depth:
+                    if entry[2] == TranspositionTable.EXACT:
+                        return entry[1], tt_move
+                    elif entry[2] == TranspositionTable.LOWER and entry[1] >= beta:
+                        return entry[1], tt_move
+                    elif entry[2] == TranspositionTable.UPPER and entry[1] <= alpha:
+                        return entry[1], tt_move
         possible_moves = self.possible_board_moves()
+        ordered = self.order_moves(possible_moves, self.p_move)
+        if tt_move != None:
+            ordered.sort(key=lambda m: self.move_notation(*m) != tt_move) #Best move from the table first
         best_move = None
+        o_alpha, o_beta = alpha, beta
+        searched = 0
         
         if maximizing_player:
             max_eval = float('-inf')
-            for start_square, moves in possible_moves.items():
-                if (maximizing_player and self.p_move == 1 and start_square[0].isupper()) or \
-                   (maximizing_player and self.p_move == -1 and start_square[0].islower()):
-                    for move in moves:
-                        temp_board = deepcopy(self)
-                        move_str = f"{self.x[move[0]]}{self.y[move[1]]}"
-                        if temp_board.move(start_square, move_str):
-                            eval_score, _ = temp_board.alpha_beta(depth - 1, alpha, beta, False)
-                            if eval_score > max_eval:
-                                max_eval = eval_score
-                                best_move = (start_square, move_str)
-                            alpha = max(alpha, eval_score)
-                            if beta <= alpha:
-                                break
+            for start_square, move, n_part in ordered:
+                temp_board = deepcopy(self)
+                c_move = self.move_notation(start_square, move, n_part)
+                if temp_board.move(*c_move):
+                    searched += 1
+                    if temp_board.is_claimable_draw():
+                        eval_score = 0
+                    else:
+                        eval_score = temp_board.tablebase_score()
+                        if eval_score == None:
+                            eval_score, _ = temp_board.alpha_beta(depth - 1, alpha, beta, False, quiescence)
+                    if eval_score > max_eval:
+                        max_eval = eval_score
+                        best_move = c_move
+                    alpha = max(alpha, eval_score)
+                    if beta <= alpha:
+                        break
+            if searched == 0:
+                return self.no_move_score(depth), None
+            if stats != None:
+                stats.count_expanded(searched, beta <= alpha)
+            self.tt_store(depth, max_eval, o_alpha, o_beta, best_move)
             return max_eval, best_move
         else:
             min_eval = float('inf')
-            for start_square, moves in possible_moves.items():
-                if (not maximizing_player and self.p_move == 1 and start_square[0].islower()) or \
-                   (not maximizing_player and self.p_move == -1 and start_square[0].isupper()):
-                    for move in moves:
-                        temp_board = deepcopy(self)
-                        move_str = f"{self.x[move[0]]}{self.y[move[1]]}"
-                        if temp_board.move(start_square, move_str):
-                            eval_score, _ = temp_board.alpha_beta(depth - 1, alpha, beta, True)
-                            if eval_score < min_eval:
-                                min_eval = eval_score
-                                best_move = (start_square, move_str)
-                            beta = min(beta, eval_score)
-                            if beta <= alpha:
-                                break
+            for start_square, move, n_part in ordered:
+                temp_board = deepcopy(self)
+                c_move = self.move_notation(start_square, move, n_part)
+                if temp_board.move(*c_move):
+                    searched += 1
+                    if temp_board.is_claimable_draw():
+                        eval_score = 0
+                    else:
+                        eval_score = temp_board.tablebase_score()
+                        if eval_score == None:
+                            eval_score, _ = temp_board.alpha_beta(depth - 1, alpha, beta, True, quiescence)
+                    if eval_score < min_eval:
+                        min_eval = eval_score
+                        best_move = c_move
+                    beta = min(beta, eval_score)
+                    if beta <= alpha:
+                        break
+            if searched == 0:
+                return self.no_move_score(depth), None
+            if stats != None:
+                stats.count_expanded(searched, beta <= alpha)
+            self.tt_store(depth, min_eval, o_alpha, o_beta, best_move)
             return min_eval, best_move
 
+    """
+    Input: depth - integer representing the depth left in the search
+    Description: score of a position where the player to move has no legal move, 0 for stalemate and a mate score
+                 for the other player when in check, a mate found with more depth left is nearer the root and scores higher
+    Output: integer representing the score for white
+    """
+    def no_move_score(self, depth):
+        if not self.in_check():
+            return 0
+        return -self.p_move * (MATE_SCORE + depth)
+
+    """
+    Input: depth - integer representing the depth that was searched
+           score - float representing the search score
+           alpha - float representing the alpha value the node was searched with
+           beta - float representing the beta value the node was searched with
+           best_move - tuple representing the best move found
+    Description: store a search result in the transposition table, aborted searches are not stored
+    Output: None
+    """
+    def tt_store(self, depth, score, alpha, beta, best_move):
+        if self.tt == None or best_move == None or (self.stop_search != None and self.stop_search()):
+            return
+        if score <= alpha:
+            flag = TranspositionTable.UPPER
+        elif score >= beta:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self.tt.store(self.cur_hash, depth, score, flag, best_move)
+
     """
     Chess peice object for the king
     """
@@ -1116,6 +1760,487 @@ class Chess:
                 result.append((pos[0]-1, pos[1]-player))
             return result
 
+"""
+Input: path - string representing a JSON file written by chess_texel or chess_tune (Default=EVAL_PARAMS_FILE) [OPTIONAL]
+Description: load tuned evaluation and search parameters
+Output: dictionary containing values (part number to material value), pst (part number to 64 bonuses or None)
+        and delta_margin (integer or None), None if the file does not exist
+"""
+def load_eval_params(path=None):
+    path = EVAL_PARAMS_FILE if path == None else path
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        params = json.load(f)
+    values = {int(part): value for part, value in params['values'].items()}
+    pst = {int(part): bonus for part, bonus in params['pst'].items()} if params.get('pst') else None
+    if sorted(values) != [1, 2, 3, 4, 5, 6] or (pst != None and (sorted(pst) != [1, 2, 3, 4, 5, 6] or any(len(b) != 64 for b in pst.values()))):
+        raise ValueError(f'{path} does not hold values and 64 square tables for parts 1-6')
+    return {'values': values, 'pst': pst, 'delta_margin': params.get('delta_margin')}
+
+"""
+Input: path - string representing the JSON parameter file
+       params - dictionary of fields to write, values and pst may hold only some parts
+Description: merge parameters into the file shared by chess_texel and chess_tune, fields and parts not given keep
+             their saved value so one tuner never drops what the other wrote, the file is replaced atomically
+Output: None
+"""
+def save_eval_params(path, params):
+    saved = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+    for field, value in params.items():
+        if field in ('values', 'pst') and isinstance(value, dict):
+            parts = saved.get(field) if isinstance(saved.get(field), dict) else {}
+            parts.update({str(part): v for part, v in value.items()}) #JSON keys are strings
+            saved[field] = parts
+        else:
+            saved[field] = value
+    with open(path + '.tmp', 'w') as f:
+        json.dump(saved, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+"""
+Evaluation parameters loaded once at import, CHESS_EVAL_PARAMS names another file or is set empty for the built in values
+"""
+EVAL_PARAMS_FILE = os.environ.get('CHESS_EVAL_PARAMS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eval_params.json'))
+EVAL_PARAMS = load_eval_params()
+
+"""
+Zobrist keys for Position.hash, seeded so every process computes the same hash
+"""
+_zobrist = random.Random(20240601)
+ZOBRIST_PIECES = [[_zobrist.getrandbits(64) for _ in range(13)] for _ in range(64)] #By square and part+6
+ZOBRIST_BLACK = _zobrist.getrandbits(64) #Black to move
+ZOBRIST_CASTLING = [_zobrist.getrandbits(64) for _ in range(16)] #By castling bitmask
+ZOBRIST_EN_PASSANT = [_zobrist.getrandbits(64) for _ in range(8)] #By en passant file
+
+"""
+Immutable and hashable snapshot of a position, small enough to hand to threads, processes and caches
+"""
+class Position:
+    __slots__ = ('board', 'p_move', 'castling', 'en_passant', 'halfmove', 'fullmove', 'hash')
+    NOTATION = 'kqrbnp.PNBRQK' #Index part+6 to notation, empty square in the middle
+
+    """
+    Input: board - bytes of 64 squares (a8, b8 ... h1) holding part+6, 6 is an empty square
+           p_move - integer representing the player to move, white = 1 black = -1 (Default=1) [OPTIONAL]
+           castling - integer bitmask of castling rights, bit 0-3 = K Q k q (Default=0) [OPTIONAL]
+           en_passant - integer representing the en passant square index or None (Default=None) [OPTIONAL]
+           halfmove - integer representing the halfmove clock (Default=0) [OPTIONAL]
+           fullmove - integer representing the fullmove number (Default=1) [OPTIONAL]
+    Description: Position initail variables, the position can not be changed afterwards
+    Output: None
+    """
+    def __init__(self, board, p_move=1, castling=0, en_passant=None, halfmove=0, fullmove=1):
+        board = bytes(board)
+        z_hash = ZOBRIST_CASTLING[castling]
+        for i, square in enumerate(board):
+            if square != 6:
+                z_hash ^= ZOBRIST_PIECES[i][square]
+        if p_move == -1:
+            z_hash ^= ZOBRIST_BLACK
+        if en_passant != None:
+            z_hash ^= ZOBRIST_EN_PASSANT[en_passant % 8]
+        for name, value in (('board', board), ('p_move', p_move), ('castling', castling), ('en_passant', en_passant),
+                            ('halfmove', halfmove), ('fullmove', fullmove), ('hash', z_hash)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Position is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Position is immutable')
+
+    """
+    Input: game - Chess object
+    Description: snapshot a game in O(64)
+    Output: Position object
+    """
+    @classmethod
+    def from_game(cls, game):
+        board = bytes(part + 6 for row in game.board for part in row)
+        castling = game.castling[0] | game.castling[1] << 1 | game.castling[2] << 2 | game.castling[3] << 3
+        en_passant = None if game.en_passant == None else game.en_passant[1] * 8 + game.en_passant[0]
+        return cls(board, game.p_move, castling, en_passant, game.halfmove, game.fullmove)
+
+    """
+    Input: fen - string representing the position in EPD/FEN format
+    Description: build a position from an EPD/FEN string
+    Output: Position object, ValueError is raised if the string is not a valid EPD/FEN
+    """
+    @classmethod
+    def from_fen(cls, fen):
+        try:
+            game = Chess(EPD=fen, interactive=False)
+        except (KeyError, IndexError, AttributeError) as e:
+            raise ValueError(f'invalid FEN {fen!r}') from e
+        if game.cur_hash == None: #load_EPD found fewer than four fields
+            raise ValueError(f'invalid FEN {fen!r}')
+        return cls.from_game(game)
+
+    """
+    Input: interactive - boolean passed on to the new game (Default=False) [OPTIONAL]
+    Description: build a game from the position in O(64), the game has no move history
+    Output: Chess object
+    """
+    def to_game(self, interactive=False):
+        return Chess(EPD=self, interactive=interactive)
+
+    """
+    Input: x - integer representing the file (0 = a)
+           y - integer representing the rank row (0 = rank 8)
+    Description: part on a square
+    Output: integer representing the part (0 = empty)
+    """
+    def part(self, x, y):
+        return self.board[y * 8 + x] - 6
+
+    """
+    Input: None
+    Description: represent the position as a FEN string (EPD hash with clocks)
+    Output: string representing the position
+    """
+    def fen(self):
+        ranks = []
+        for y in range(8):
+            rank = ''
+            empty = 0
+            for square in self.board[y * 8:y * 8 + 8]:
+                if square == 6:
+                    empty += 1
+                    continue
+                if empty > 0:
+                    rank += str(empty)
+                    empty = 0
+                rank += Position.NOTATION[square]
+            ranks.append(rank + (str(empty) if empty > 0 else ''))
+        castling = ''.join(c for i, c in enumerate('KQkq') if self.castling >> i & 1) or '-'
+        en_passant = '-' if self.en_passant == None else f"{'abcdefgh'[self.en_passant % 8]}{8 - self.en_passant // 8}"
+        return f"{'/'.join(ranks)} {'w' if self.p_move == 1 else 'b'} {castling} {en_passant} {self.halfmove} {self.fullmove}"
+
+    """
+    Input: None
+    Description: pack the position into 38 bytes, two squares per byte
+    Output: bytes representing the position
+    """
+    def pack(self):
+        squares = bytes(self.board[i] << 4 | self.board[i + 1] for i in range(0, 64, 2))
+        flags = (1 if self.p_move == -1 else 0) | self.castling << 1
+        return squares + struct.pack('>BBHH', flags, 255 if self.en_passant == None else self.en_passant,
+                                     min(self.halfmove, 65535), min(self.fullmove, 65535))
+
+    """
+    Input: data - bytes returned by pack
+    Description: rebuild a packed position
+    Output: Position object
+    """
+    @classmethod
+    def unpack(cls, data):
+        board = bytes(b for packed in data[:32] for b in (packed >> 4, packed & 15))
+        flags, en_passant, halfmove, fullmove = struct.unpack('>BBHH', data[32:38])
+        return cls(board, -1 if flags & 1 else 1, flags >> 1, None if en_passant == 255 else en_passant, halfmove, fullmove)
+
+    def __reduce__(self):
+        #The 38 packed bytes, the reference to _unpack_position is written once per pickle however many positions it holds
+        return (_unpack_position, (self.pack(),))
+
+    def __eq__(self, other):
+        #Clocks are left out, equal positions are the same for repetitions and caches
+        return isinstance(other, Position) and self.hash == other.hash and self.board == other.board and \
+            self.p_move == other.p_move and self.castling == other.castling and self.en_passant == other.en_passant
+
+    def __hash__(self):
+        return self.hash
+
+    def __repr__(self):
+        return f"Position('{self.fen()}')"
+
+"""
+Input: data - bytes returned by Position.pack
+Description: unpickle a Position, a module function pickles as a shorter reference than the classmethod
+Output: Position object
+"""
+def _unpack_position(data):
+    return Position.unpack(data)
+
+"""
+Transposition table, search results by position, shared between threads and every copy of a game
+"""
+class TranspositionTable(dict):
+    EXACT = 0 #Score is exact
+    LOWER = 1 #Score is a lower bound (beta cutoff)
+    UPPER = 2 #Score is an upper bound (no move raised alpha)
+
+    SLOT_BYTES = 64 #Estimated dictionary overhead per entry on top of the key and value objects
+
+    """
+    Input: max_entries - integer representing the number of positions kept before the table is cleared (Default=200000) [OPTIONAL]
+           max_bytes - integer representing the memory the entries may use before the table is cleared (Default=None, no limit) [OPTIONAL]
+    Description: TranspositionTable initail variables
+    Output: None
+    """
+    def __init__(self, max_entries=200000, max_bytes=None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0 #Estimated memory of the entries
+
+    def clear(self):
+        super().clear()
+        self.bytes = 0
+
+    """
+    Input: memo - dictionary used by deepcopy
+    Description: the table is shared, copying a game during search must not copy the table
+    Output: the same table
+    """
+    def __deepcopy__(self, memo):
+        return self
+
+    """
+    Input: key - string representing the position EPD hash
+           depth - integer representing the depth that was searched
+           score - float representing the search score
+           flag - integer representing the bound type of the score (EXACT, LOWER, UPPER)
+           move - tuple representing the best move
+    Description: store an entry, deeper results are kept over shallower ones
+    Output: None
+    """
+    def store(self, key, depth, score, flag, move):
+        entry = self.get(key)
+        if entry == None:
+            size = sys.getsizeof(key) + sys.getsizeof(move) + TranspositionTable.SLOT_BYTES + 88 #88 = 4-tuple with a float score
+            if len(self) >= self.max_entries or (self.max_bytes != None and self.bytes + size > self.max_bytes):
+                self.clear()
+            self.bytes += size
+        if entry == None or entry[0] <= depth:
+            self[key] = (depth, score, flag, move)
+
+"""
+Search statistics, shared by every copy of a game like the transposition table
+"""
+class SearchStats:
+    """
+    Input: callback - function called with the stats after every iteration or generation (Default=None) [OPTIONAL]
+           report_nodes - integer representing how many nodes pass between extra callback calls, 0 = iterations only (Default=0) [OPTIONAL]
+           track_memory - boolean representing if the peak memory of the search is traced with tracemalloc,
+                          this slows the search down (Default=False) [OPTIONAL]
+    Description: SearchStats initail variables, the clock starts when the object is made
+    Output: None
+    """
+    def __init__(self, callback=None, report_nodes=0, track_memory=False):
+        self.callback = callback
+        self.report_nodes = report_nodes
+        self.nodes = 0 #Alpha-beta nodes, or fitness evaluations for the evolutionary algorithm and PSO
+        self.qnodes = 0 #Quiescence nodes
+        self.expanded = 0 #Nodes whose moves were searched
+        self.children = 0 #Moves searched from expanded nodes
+        self.cutoffs = 0 #Expanded nodes that failed high
+        self.first_move_cutoffs = 0 #Cutoffs caused by the first move searched
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.iterations = [] #Dictionary per finished iteration or generation
+        self.track_memory = track_memory
+        self.peak_bytes = None #Peak traced memory above what was allocated when the search started
+        self.node_bytes = None #Bytes allocated by one search node, set by the caller from Chess.node_bytes
+        self.own_tracing = False #tracemalloc was started by these stats and is stopped by close
+        if track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.own_tracing = True
+            tracemalloc.reset_peak()
+            self.memory_base = tracemalloc.get_traced_memory()[0]
+            self.peak_bytes = 0
+        self.start = time.perf_counter()
+        self.mark = (self.start, 0) #Time and node count at the end of the last iteration
+
+    def __deepcopy__(self, memo):
+        return self
+
+    """
+    Input: quiescence - boolean representing if the node belongs to the quiescence search (Default=False) [OPTIONAL]
+    Description: count a visited node
+    Output: None
+    """
+    def count_node(self, quiescence=False):
+        if quiescence:
+            self.qnodes += 1
+        else:
+            self.nodes += 1
+        if self.report_nodes and self.callback != None and (self.nodes + self.qnodes) % self.report_nodes == 0:
+            self.callback(self)
+
+    """
+    Input: searched - integer representing how many moves of the node were searched
+           cutoff - boolean representing if the node failed high
+    Description: count an expanded node for the branching factor and cutoff rates
+    Output: None
+    """
+    def count_expanded(self, searched, cutoff):
+        self.expanded += 1
+        self.children += searched
+        if cutoff:
+            self.cutoffs += 1
+            self.first_move_cutoffs += searched == 1
+
+    """
+    Input: depth - integer representing the finished depth, generation or iteration
+           score - float representing the best score for white
+           move - tuple representing the best move
+    Description: record a finished iteration and report it through the callback
+    Output: None
+    """
+    def iteration(self, depth, score, move):
+        now = time.perf_counter()
+        nodes = self.nodes + self.qnodes
+        self.iterations.append({'depth': depth, 'score': score, 'move': move, 'time': now - self.mark[0], 'nodes': nodes - self.mark[1]})
+        self.mark = (now, nodes)
+        self.update_memory()
+        if self.callback != None:
+            self.callback(self)
+
+    """
+    Input: None
+    Description: record the peak memory traced so far
+    Output: None
+    """
+    def update_memory(self):
+        if self.track_memory and tracemalloc.is_tracing():
+            self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1] - self.memory_base)
+
+    """
+    Input: None
+    Description: finish memory tracking, stops tracemalloc if these stats started it
+    Output: None
+    """
+    def close(self):
+        self.update_memory()
+        if self.own_tracing:
+            tracemalloc.stop()
+            self.own_tracing = False
+        self.track_memory = False
+
+    @property
+    def peak_rss_kb(self):
+        #Peak resident memory of the whole process so far
+        if resource == None:
+            return None
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == 'darwin' else rss
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    @property
+    def nps(self):
+        return int((self.nodes + self.qnodes) / max(self.elapsed, 1e-6))
+
+    @property
+    def branching_factor(self):
+        return self.children / self.expanded if self.expanded else 0.0
+
+    @property
+    def effective_branching_factor(self):
+        #Growth of the node count between the last two iterations (iterative deepening only)
+        if len(self.iterations) < 2 or self.iterations[-2]['nodes'] == 0:
+            return None
+        return self.iterations[-1]['nodes'] / self.iterations[-2]['nodes']
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    """
+    Input: None
+    Description: summary of the search for logs, metrics and JSON
+    Output: dictionary containing the statistics
+    """
+    def as_dict(self):
+        return {'nodes': self.nodes, 'qnodes': self.qnodes, 'time': self.elapsed, 'nps': self.nps,
+                'branching_factor': self.branching_factor, 'effective_branching_factor': self.effective_branching_factor,
+                'cutoffs': self.cutoffs, 'first_move_cutoff_rate': self.first_move_cutoff_rate,
+                'tt_probes': self.tt_probes, 'tt_hit_rate': self.tt_hit_rate, 'peak_bytes': self.peak_bytes,
+                'node_bytes': self.node_bytes, 'peak_rss_kb': self.peak_rss_kb, 'iterations': self.iterations}
+
+"""
+Background alpha-beta search of a position expected after the opponent's reply (pondering)
+"""
+class PonderSearch:
+    """
+    Input: game - Chess object, the position after the expected reply
+           depth - integer representing the deepest iteration
+           tt - TranspositionTable shared with the main search
+           quiescence - boolean representing if captures are searched past depth (Default=False) [OPTIONAL]
+    Description: PonderSearch initail variables, the search starts straight away on its own thread
+    Output: None
+    """
+    def __init__(self, game, depth, tt, quiescence=False):
+        self.game = deepcopy(game)
+        self.game.tt = tt
+        self.game.interactive = False
+        self.stop_event = threading.Event()
+        self.game.stop_search = lambda: self.stop_event.is_set()
+        self.depth = depth
+        self.quiescence = quiescence
+        self.best_move = None
+        self.score = None
+        self.depth_done = 0
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    """
+    Input: None
+    Description: iterative deepening up to depth, every finished iteration fills the shared table
+    Output: None
+    """
+    def run(self):
+        for depth in range(1, self.depth + 1):
+            score, move = self.game.alpha_beta(depth, float('-inf'), float('inf'), self.game.p_move == 1, self.quiescence)
+            if self.stop_event.is_set() or move == None:
+                break
+            self.score, self.best_move, self.depth_done = score, move, depth
+        self.done.set()
+
+    """
+    Input: game - Chess object representing the actual position
+    Description: check if the opponent played the expected reply
+    Output: boolean representing a ponder hit
+    """
+    def is_hit(self, game):
+        return game.cur_hash == self.game.cur_hash and game.halfmove == self.game.halfmove
+
+    """
+    Input: timeout - float representing the most seconds to wait (Default=None, until done) [OPTIONAL]
+    Description: ponder hit, let the running search finish without restarting it
+    Output: tuple representing the best move or ("No move", "No move")
+    """
+    def result(self, timeout=None):
+        self.done.wait(timeout)
+        return self.best_move if self.best_move else ("No move", "No move")
+
+    """
+    Input: None
+    Description: ponder miss, abort the search (the shared table keeps what was found)
+    Output: None
+    """
+    def stop(self):
+        self.stop_event.set()
+        self.done.wait()
+
+if os.environ.get('CHESS_PROFILE'):
+    #Time the engine components for the whole process, see chess_profile
+    import chess_profile
+    chess_profile.enable_from_environment(sys.modules[__name__])
+
 if __name__ == '__main__':
     #chess_game = Chess(EPD='4kb2/rpp1p3/6p1/6Np/3Q1B2/4P2b/PPP2PPP/RN1R2K1 w - -')
     chess_game = Chess(EPD='rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -')
@@ -2,7 +2,9 @@ import pygame
 import os
 import threading
 import time
-from chess_engine import Chess
+from copy import deepcopy
+from chess_engine import Chess, PonderSearch, TranspositionTable
+from chess_suggestions import SuggestionWorkers
 
 class ChessGUI:
     def __init__(self):
@@ -23,11 +25,28 @@ class ChessGUI:
         # Run setup screen first
         self.show_setup_screen()
         
-        # Initialize the chess engine
-        self.chess_game = Chess()
+        # Initialize the chess engine (never block on stdin, pawns auto promote to a queen)
+        self.chess_game = Chess(interactive=False)
+        
+        # Transposition table shared by every search, kept between moves so pondering can reuse it
+        self.tt = TranspositionTable()
+        self.chess_game.tt = self.tt
+        self.ponder = None  # Search of the position after the expected human reply
+        self.ai_depth = 5
         
         # Set up AI variables
         self.is_player_turn = self.player_color == "white"
+        self.AI_MOVE_EVENT = pygame.event.custom_type()  # Posted by the search thread when its move is ready
+        self.min_think_time = 0  # Optional artificial delay in seconds, 0 plays as soon as the search is done
+        self.FPS = 30  # Frame cap, the loop sleeps between frames instead of spinning
+        self.clock = pygame.time.Clock()
+        
+        # Fonts are created once, layers and scaled sprites are rebuilt only when the window size changes
+        self.label_font = pygame.font.Font(None, 36)
+        self.text_font = pygame.font.Font(None, 24)
+        self.layout_size = None
+        self.frame_keys = {}  # What each screen region currently shows, a region is redrawn when its key changes
+        self.static_eval = None  # (position hash, evaluate_position score) for the evaluation bar
         
         # Load images
         self.load_images()
@@ -38,23 +57,10 @@ class ChessGUI:
         self.drag_pos = None
         self.last_move = None
         
-        # AI suggestion variables
-        self.alpha_beta_suggestion = None
-        self.evolutionary_suggestion = None
-        self.pso_suggestion = None
-        self.suggestion_lock = threading.Lock()
-        
-        # Start AI suggestion threads
+        # AI suggestion workers, separate processes fed a snapshot each time the position changes
         self.running = True
-        self.alpha_beta_thread = threading.Thread(target=self.update_alpha_beta_suggestions)
-        self.evolutionary_thread = threading.Thread(target=self.update_evolutionary_suggestions)
-        self.pso_thread = threading.Thread(target=self.update_pso_suggestions)
-        self.alpha_beta_thread.daemon = True
-        self.evolutionary_thread.daemon = True
-        self.pso_thread.daemon = True
-        self.alpha_beta_thread.start()
-        self.evolutionary_thread.start()
-        self.pso_thread.start()
+        self.suggestions = SuggestionWorkers()
+        self.position_changed()
 
         # Add thinking state
         self.ai_thinking = False
@@ -91,8 +97,16 @@ class ChessGUI:
                                 center_y + button_height + 2*padding,
                                 button_width, button_height)
         
-        # Setup font
+        # Setup font and labels, rendered once
         font = pygame.font.Font(None, 32)
+        title = font.render("Chess Game Setup", True, (0, 0, 0))
+        color_text = font.render("Select your color:", True, (0, 0, 0))
+        algo_text = font.render("Select AI algorithm:", True, (0, 0, 0))
+        white_text = font.render("White", True, (0, 0, 0))
+        black_text = font.render("Black", True, (0, 0, 0))
+        alpha_beta_text = font.render("Alpha-Beta", True, (0, 0, 0))
+        evolutionary_text = font.render("Evolutionary", True, (0, 0, 0))
+        pso_text = font.render("PSO", True, (0, 0, 0))
         
         while not self.setup_complete:
             for event in pygame.event.get():
@@ -125,16 +139,13 @@ class ChessGUI:
             self.screen.fill((255, 255, 255))
             
             # Draw title
-            title = font.render("Chess Game Setup", True, (0, 0, 0))
             self.screen.blit(title, (center_x - title.get_width()//2, 50))
             
             # Draw color selection text
-            color_text = font.render("Select your color:", True, (0, 0, 0))
             self.screen.blit(color_text, (center_x - color_text.get_width()//2, 
                                         center_y - button_height - 2*padding - 40))
             
             # Draw algorithm selection text
-            algo_text = font.render("Select AI algorithm:", True, (0, 0, 0))
             self.screen.blit(algo_text, (center_x - algo_text.get_width()//2,
                                        center_y - 20))
             
@@ -168,12 +179,6 @@ class ChessGUI:
                            pso_button)
             
             # Draw button text
-            white_text = font.render("White", True, (0, 0, 0))
-            black_text = font.render("Black", True, (0, 0, 0))
-            alpha_beta_text = font.render("Alpha-Beta", True, (0, 0, 0))
-            evolutionary_text = font.render("Evolutionary", True, (0, 0, 0))
-            pso_text = font.render("PSO", True, (0, 0, 0))
-            
             self.screen.blit(white_text, (white_button.centerx - white_text.get_width()//2,
                                         white_button.centery - white_text.get_height()//2))
             self.screen.blit(black_text, (black_button.centerx - black_text.get_width()//2,
@@ -188,54 +193,70 @@ class ChessGUI:
             pygame.display.flip()
 
     def make_ai_move(self):
-        """Make move based on selected AI algorithm with increased computation time"""
+        """Start the selected AI algorithm on its own thread, the move arrives as an AI_MOVE_EVENT"""
         self.ai_thinking = True
-        move = None
+        position = self.chess_game.cur_hash
         
         # Run AI calculation in a separate thread to avoid freezing the UI
         def calculate_move():
-            nonlocal move
+            start = time.perf_counter()
             if self.ai_algorithm == "alpha-beta":
-                move = self.chess_game.get_alpha_beta_move(depth=5)  # Increased depth
+                if self.ponder and self.ponder.is_hit(self.chess_game):
+                    move = self.ponder.result()  # Ponder hit, keep the running search instead of restarting
+                else:
+                    if self.ponder:
+                        self.ponder.stop()
+                    move = self.chess_game.get_alpha_beta_move(depth=self.ai_depth)  # Increased depth
+                self.ponder = None
             elif self.ai_algorithm == "evolutionary":
                 move = self.chess_game.evolutionary_algorithm(population_size=30, generations=10)  # Increased population and generations
             else:  # PSO
                 move = self.chess_game.particle_swarm_optimization(num_particles=30, iterations=15)  # Increased particles and iterations
             
-            # Add minimum thinking time of 2 seconds
-            time.sleep(2)
-            self.ai_thinking = False
+            # Optional minimum thinking time
+            remaining = self.min_think_time - (time.perf_counter() - start)
+            if remaining > 0:
+                time.sleep(remaining)
+            if self.running:
+                pygame.event.post(pygame.event.Event(self.AI_MOVE_EVENT, move=move, position=position))
         
         # Start calculation thread
         calc_thread = threading.Thread(target=calculate_move)
         calc_thread.daemon = True
         calc_thread.start()
-        
-        # Wait for calculation to complete while keeping UI responsive
-        while self.ai_thinking:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                    return False
-            
-            # Keep UI updated while thinking
-            self.screen.fill((255, 255, 255))
-            self.draw_board()
-            self.draw_pieces()
-            self.draw_suggestions()
-            self.draw_evaluation_bar()
-            self.draw_thinking_indicator()
-            pygame.display.flip()
-            time.sleep(0.05)  # Small delay to prevent high CPU usage
-        
+
+    def finish_ai_move(self, event):
+        """Play the move of a finished search, returns True if it was played"""
+        self.ai_thinking = False
+        if event.position != self.chess_game.cur_hash:
+            return False  # Search was for a position that is gone
+        move = event.move
         if move and move != ("No move", "No move"):
-            if self.chess_game.move(move[0], move[1]):
+            if self.chess_game.move(*move):
                 self.last_move = move
+                self.position_changed()
+                self.start_pondering()
                 return True
         return False
 
+    def position_changed(self):
+        """Hand a snapshot of the new position to the suggestion workers, cancelling work on the old one"""
+        self.suggestions.update(self.chess_game.position())
+
+    def start_pondering(self):
+        """Search the position after the expected human reply while the human is thinking"""
+        if self.ai_algorithm != "alpha-beta" or sum(self.chess_game.is_end()) > 0:
+            return
+        entry = self.tt.get(self.chess_game.cur_hash)  # Best reply found while searching our own move
+        if entry is None or entry[3] is None:
+            return
+        expected = deepcopy(self.chess_game)
+        if expected.move(*entry[3]):
+            self.ponder = PonderSearch(expected, self.ai_depth, self.tt)
+
     def load_images(self):
-        """Load piece images from the 'pieces' folder"""
+        """Load piece images from the 'pieces' folder, scaled copies are made in build_layers"""
+        self.piece_images = {}
         self.pieces = {}
         piece_chars = {'P': 'white-pawn', 'R': 'white-rook', 'N': 'white-knight',
                       'B': 'white-bishop', 'Q': 'white-queen', 'K': 'white-king',
@@ -245,10 +266,7 @@ class ChessGUI:
         try:
             for piece, filename in piece_chars.items():
                 image_path = os.path.join('pieces', f'{filename}.png')
-                self.pieces[piece] = pygame.transform.scale(
-                    pygame.image.load(image_path),
-                    (self.SQUARE_SIZE, self.SQUARE_SIZE)
-                )
+                self.piece_images[piece] = pygame.image.load(image_path).convert_alpha()
         except pygame.error as e:
             print(f"Couldn't load piece images: {e}")
             print("Make sure you have a 'pieces' folder with the required PNG images")
@@ -276,57 +294,101 @@ class ChessGUI:
                     return square
         return None
 
-    def draw_board(self):
-        """Draw the chess board with coordinates"""
-        self.SQUARE_SIZE = min((self.screen.get_width() - 2 * self.MARGIN - 80) // 8, (self.screen.get_height() - self.MARGIN - self.TOP_MARGIN - 140) // 8)
+    def build_layers(self):
+        """Rebuild everything that only depends on the window size: layout, static background, sprites and highlight"""
+        self.layout_size = self.screen.get_size()
+        width, height = self.layout_size
+        square_size = max(10, min((width - 2 * self.MARGIN - 80) // 8, (height - self.MARGIN - self.TOP_MARGIN - 140) // 8))
+        if square_size != self.SQUARE_SIZE or not self.pieces:
+            self.SQUARE_SIZE = square_size
+            self.pieces = {piece: pygame.transform.scale(image, (square_size, square_size))
+                           for piece, image in self.piece_images.items()}
         self.BOARD_SIZE = self.SQUARE_SIZE * 8
+        panel_top = self.BOARD_SIZE + self.MARGIN + self.TOP_MARGIN
 
-        # Draw coordinates
-        font = pygame.font.Font(None, 36)
-        
-        # Draw rank numbers (1-8)
-        for rank in range(8):
-            text = font.render(str(8 - rank), True, (0, 0, 0))
-            self.screen.blit(text, (self.MARGIN//2 - text.get_width()//2, 
-                                  self.TOP_MARGIN + rank * self.SQUARE_SIZE + self.SQUARE_SIZE//2 - text.get_height()//2))
-            
-        # Draw file letters (a-h)
-        for file in range(8):
-            text = font.render(chr(file + 97), True, (0, 0, 0))
-            self.screen.blit(text, (self.MARGIN + file * self.SQUARE_SIZE + self.SQUARE_SIZE//2 - text.get_width()//2,
-                                  self.TOP_MARGIN + 8 * self.SQUARE_SIZE + 5))
-        
-        # Draw the board squares
+        # Static background: board squares, coordinates and the suggestions panel
+        self.background = pygame.Surface(self.layout_size).convert()
+        self.background.fill((255, 255, 255))
         for rank in range(8):
             for file in range(8):
                 color = (255, 206, 158) if (rank + file) % 2 == 0 else (209, 139, 71)
-                rect = pygame.Rect(self.MARGIN + file * self.SQUARE_SIZE, 
-                                 self.TOP_MARGIN + rank * self.SQUARE_SIZE,
-                                 self.SQUARE_SIZE, 
-                                 self.SQUARE_SIZE)
-                pygame.draw.rect(self.screen, color, rect)
-                
-                # Highlight last move if exists
-                if self.last_move:
-                    start_pos = self.chess_game.board_2_array(self.last_move[0])
-                    end_pos = self.chess_game.board_2_array(self.last_move[1])
-                    if (file, rank) in [start_pos, end_pos]:
-                        highlight = pygame.Surface((self.SQUARE_SIZE, self.SQUARE_SIZE))
-                        highlight.set_alpha(128)
-                        highlight.fill((255, 255, 0))
-                        self.screen.blit(highlight, (self.MARGIN + file * self.SQUARE_SIZE, self.TOP_MARGIN + rank * self.SQUARE_SIZE))
+                pygame.draw.rect(self.background, color, (self.MARGIN + file * self.SQUARE_SIZE,
+                                                          self.TOP_MARGIN + rank * self.SQUARE_SIZE,
+                                                          self.SQUARE_SIZE, self.SQUARE_SIZE))
+        for rank in range(8):
+            text = self.label_font.render(str(8 - rank), True, (0, 0, 0))
+            self.background.blit(text, (self.MARGIN//2 - text.get_width()//2,
+                                        self.TOP_MARGIN + rank * self.SQUARE_SIZE + self.SQUARE_SIZE//2 - text.get_height()//2))
+        for file in range(8):
+            text = self.label_font.render(chr(file + 97), True, (0, 0, 0))
+            self.background.blit(text, (self.MARGIN + file * self.SQUARE_SIZE + self.SQUARE_SIZE//2 - text.get_width()//2,
+                                        self.TOP_MARGIN + 8 * self.SQUARE_SIZE + 5))
+        pygame.draw.rect(self.background, (240, 240, 240), (0, panel_top, self.BOARD_SIZE + 2*self.MARGIN, 140))
+
+        # Last move highlight, blitted instead of allocating a surface per square
+        self.highlight = pygame.Surface((self.SQUARE_SIZE, self.SQUARE_SIZE))
+        self.highlight.set_alpha(128)
+        self.highlight.fill((255, 255, 0))
+
+        # Screen regions that are redrawn independently, together they cover the window
+        self.board_rect = pygame.Rect(0, 0, self.BOARD_SIZE + self.MARGIN, panel_top)
+        self.bar_rect = pygame.Rect(self.BOARD_SIZE + self.MARGIN, 0, max(0, width - self.BOARD_SIZE - self.MARGIN), panel_top)
+        self.panel_rect = pygame.Rect(0, panel_top, width, max(0, height - panel_top))
+        self.frame_keys = {}
+
+    def render(self):
+        """Redraw the screen regions whose content changed and update only those rects"""
+        if self.screen.get_size() != self.layout_size:
+            self.build_layers()
+        if self.ai_thinking and pygame.time.get_ticks() - self.thinking_timer > 500:  # Change dots every 500ms
+            self.thinking_dots += 1
+            self.thinking_timer = pygame.time.get_ticks()
+
+        dirty = []
+        board_key = (self.chess_game.cur_hash, self.last_move, self.selected_piece, self.dragging and self.drag_pos,
+                     self.ai_thinking and self.thinking_dots % 3)
+        if self.frame_keys.get('board') != board_key:
+            self.frame_keys['board'] = board_key
+            self.draw_board()
+            self.draw_pieces()
+            self.draw_thinking_indicator()
+            dirty.append(self.board_rect)
+        for rect in (self.draw_evaluation_bar(), self.draw_suggestions()):
+            if rect:
+                dirty.append(rect)
+        if dirty:
+            pygame.display.update(dirty)
+
+    def draw_board(self):
+        """Draw the chess board with coordinates from the cached background"""
+        self.screen.blit(self.background, self.board_rect, self.board_rect)
+        
+        # Highlight last move if exists
+        if self.last_move:
+            for pos in (self.chess_game.board_2_array(self.last_move[0]), self.chess_game.board_2_array(self.last_move[1])):
+                if pos:
+                    self.screen.blit(self.highlight, (self.MARGIN + pos[0] * self.SQUARE_SIZE, self.TOP_MARGIN + pos[1] * self.SQUARE_SIZE))
 
     def draw_pieces(self):
-        """Draw all pieces on the board"""
+        """Draw all pieces on the board, the dragged piece follows the mouse"""
+        dragged = self.chess_game.board_2_array(self.selected_piece) if self.dragging and self.selected_piece else None
         for rank in range(8):
             for file in range(8):
                 piece = self.chess_game.board[rank][file]
                 if piece != 0:
                     piece_char = self.get_piece_char(piece)
-                    if piece_char in self.pieces and (file, rank) != self.selected_piece:
+                    if piece_char in self.pieces and (file, rank) != dragged:
                         self.screen.blit(self.pieces[piece_char],
                                        (self.MARGIN + file * self.SQUARE_SIZE,
                                         self.TOP_MARGIN + rank * self.SQUARE_SIZE))
+        
+        if dragged:
+            piece_char = self.get_piece_char(self.chess_game.board[dragged[1]][dragged[0]])
+            if piece_char in self.pieces:
+                x, y = self.drag_pos
+                self.screen.set_clip(self.board_rect)  # Keep the dragged piece inside its region
+                self.screen.blit(self.pieces[piece_char], (x - self.SQUARE_SIZE//2, y - self.SQUARE_SIZE//2))
+                self.screen.set_clip(None)
 
     def get_piece_char(self, piece):
         """Convert piece number to character representation"""
@@ -335,55 +397,57 @@ class ChessGUI:
         return piece_chars.get(piece, '')
 
     def draw_suggestions(self):
-        """Draw AI move suggestions"""
-        # Draw background for suggestions
-        pygame.draw.rect(self.screen, (240, 240, 240), 
-                        (0, self.BOARD_SIZE + self.MARGIN + self.TOP_MARGIN, 
-                         self.BOARD_SIZE + 2*self.MARGIN, 140))  # Adjusted height
+        """Draw AI move suggestions, returns the redrawn rect or None if nothing changed"""
+        self.suggestions.poll()
+        labels = {"alpha-beta": "Alpha-Beta", "evolutionary": "Evolutionary", "pso": "PSO"}
+        lines = []
+        for algorithm, label in labels.items():
+            move = self.suggestions.suggestions[algorithm]
+            done, total = self.suggestions.progress[algorithm]
+            if move is None:
+                text = f"{label}: thinking..."
+            else:
+                text = f"{label}: {move[0]} → {move[1]}"
+                if done < total:
+                    text += f" (depth {done}/{total})"
+            lines.append(text)
+        if self.frame_keys.get('panel') == lines:
+            return None
+        self.frame_keys['panel'] = lines
         
-        # Draw suggestions text
-        font = pygame.font.Font(None, 24)
-        
-        with self.suggestion_lock:
-            if not self.alpha_beta_suggestion:
-                self.alpha_beta_suggestion = ("No suggestion", "No suggestion")
-            if not self.evolutionary_suggestion:
-                self.evolutionary_suggestion = ("No suggestion", "No suggestion")
-            if not self.pso_suggestion:
-                self.pso_suggestion = ("No suggestion", "No suggestion")
-
-            suggestion_texts = [
-                f"Alpha-Beta: {self.alpha_beta_suggestion[0]} → {self.alpha_beta_suggestion[1]}",
-                f"Evolutionary: {self.evolutionary_suggestion[0]} → {self.evolutionary_suggestion[1]}",
-                f"PSO: {self.pso_suggestion[0]} → {self.pso_suggestion[1]}"
-            ]
-
-            for i, text in enumerate(suggestion_texts):
-                text_surface = font.render(text, True, (0, 0, 0))
-                self.screen.blit(text_surface, (10, self.BOARD_SIZE + self.MARGIN + self.TOP_MARGIN + 20 + i * 40))
+        # Draw background for suggestions
+        self.screen.blit(self.background, self.panel_rect, self.panel_rect)
+        for i, text in enumerate(lines):
+            text_surface = self.text_font.render(text, True, (0, 0, 0))
+            self.screen.blit(text_surface, (10, self.BOARD_SIZE + self.MARGIN + self.TOP_MARGIN + 20 + i * 40))
+        return self.panel_rect
+
+    def position_evaluation(self):
+        """Engine score of the current position in centipawns for white: the newest background search score,
+        otherwise the static evaluation, computed once per position"""
+        score = self.suggestions.scores.get("alpha-beta")
+        if score is not None:
+            return score
+        if self.static_eval is None or self.static_eval[0] != self.chess_game.cur_hash:
+            self.static_eval = (self.chess_game.cur_hash, self.chess_game.evaluate_position())
+        return self.static_eval[1]
 
     def draw_evaluation_bar(self):
-        """Draw the evaluation bar on the side"""
+        """Draw the evaluation bar on the side, returns the redrawn rect or None if nothing changed"""
         bar_width = 40
         bar_height = self.BOARD_SIZE
 
-        # Calculate evaluation based on material difference
-        total_eval = 0
-        piece_values = {1: 1, 2: 3, 3: 3, 4: 5, 5: 9, 6: 0}  # King not counted in material
-        for y in range(8):
-            for x in range(8):
-                piece = self.chess_game.board[y][x]
-                if piece != 0:
-                    sign = 1 if piece > 0 else -1
-                    total_eval += piece_values[abs(piece)] * sign
+        score = self.position_evaluation()
+        if self.frame_keys.get('bar') == score:
+            return None
+        self.frame_keys['bar'] = score
+        self.screen.blit(self.background, self.bar_rect, self.bar_rect)
 
-        # Normalize evaluation to 0-1 range and invert it so white winning is at bottom
-        max_material = 39  # Maximum material difference (excluding kings)
-        normalized_eval = 1 - ((total_eval + max_material) / (2 * max_material))  # Inverted
-        normalized_eval = max(0, min(1, normalized_eval))  # Clamp between 0 and 1
+        # Map the score to white's expected result so white winning is at the bottom
+        white_share = 1 / (1 + 10 ** (max(-4000, min(4000, score)) / -400))
 
         # Draw the black section (top)
-        black_height = int(normalized_eval * bar_height)
+        black_height = int((1 - white_share) * bar_height)
         pygame.draw.rect(self.screen, (0, 0, 0), 
                         (self.BOARD_SIZE + self.MARGIN, self.TOP_MARGIN, 
                          bar_width, black_height))
@@ -398,78 +462,40 @@ class ChessGUI:
                         (self.BOARD_SIZE + self.MARGIN, self.TOP_MARGIN,
                          bar_width, bar_height), 1)
 
-        # Draw evaluation score
-        font = pygame.font.Font(None, 24)
-        score_text = f"{total_eval:+.1f}"
-        text_surface = font.render(score_text, True, (0, 0, 0))
+        # Draw evaluation score in pawns, a king sized score is a forced mate
+        score_text = ("+M" if score > 0 else "-M") if abs(score) >= 10000 else f"{score / 100:+.1f}"
+        text_surface = self.text_font.render(score_text, True, (0, 0, 0))
         self.screen.blit(text_surface, 
                         (self.BOARD_SIZE + self.MARGIN + bar_width + 5,
                          self.TOP_MARGIN + bar_height//2 - text_surface.get_height()//2))
-
-    def update_alpha_beta_suggestions(self):
-        """Continuously update alpha-beta pruning suggestions"""
-        while self.running:
-            if not self.dragging:
-                suggestion = self.chess_game.get_alpha_beta_move()
-                with self.suggestion_lock:
-                    self.alpha_beta_suggestion = suggestion
-            time.sleep(1)  # Update every second
-
-    def update_evolutionary_suggestions(self):
-        """Continuously update evolutionary algorithm suggestions"""
-        while self.running:
-            if not self.dragging:
-                suggestion = self.chess_game.evolutionary_algorithm()
-                with self.suggestion_lock:
-                    self.evolutionary_suggestion = suggestion
-            time.sleep(1)  # Update every second
-
-    def update_pso_suggestions(self):
-        """Continuously update PSO suggestions"""
-        while self.running:
-            if not self.dragging:
-                suggestion = self.chess_game.particle_swarm_optimization()
-                with self.suggestion_lock:
-                    self.pso_suggestion = suggestion
-            time.sleep(1)  # Update every second
-
-    def update_stockfish_evaluation(self):
-        """Placeholder for stockfish evaluation"""
-        while self.running:
-            time.sleep(1)
+        return self.bar_rect
 
     def draw_thinking_indicator(self):
-        """Draw an animated 'Thinking...' indicator when AI is calculating"""
+        """Draw an animated 'Thinking...' indicator when AI is calculating, the dots are advanced in render"""
         if self.ai_thinking:
-            font = pygame.font.Font(None, 36)
             dots = "." * ((self.thinking_dots % 3) + 1)
-            text = font.render(f"{self.ai_algorithm} thinking{dots}", True, (0, 0, 0))
+            text = self.label_font.render(f"{self.ai_algorithm} thinking{dots}", True, (0, 0, 0))
             
             # Draw with background
             bg_rect = pygame.Rect(10, 10, text.get_width() + 20, text.get_height() + 10)
             pygame.draw.rect(self.screen, (255, 255, 255), bg_rect)
             pygame.draw.rect(self.screen, (0, 0, 0), bg_rect, 1)
             self.screen.blit(text, (20, 15))
-            
-            # Update animation
-            if pygame.time.get_ticks() - self.thinking_timer > 500:  # Change dots every 500ms
-                self.thinking_dots += 1
-                self.thinking_timer = pygame.time.get_ticks()
 
     def run(self):
         """Main game loop"""
         running = True
         
-        # Make first move if AI is playing white
-        if not self.is_player_turn:
-            self.make_ai_move()
-            self.is_player_turn = True
-            
         while running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                     self.running = False
+                elif event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                    self.layout_size = None  # Window contents were lost or resized, rebuild and redraw everything
+                elif event.type == self.AI_MOVE_EVENT:
+                    if self.finish_ai_move(event):
+                        self.is_player_turn = True  # Switch back to player's turn
                 
                 # Only process mouse events during player's turn
                 if self.is_player_turn:
@@ -489,6 +515,7 @@ class ChessGUI:
                             if target_square and self.selected_piece:
                                 if self.chess_game.move(self.selected_piece, target_square):
                                     self.last_move = (self.selected_piece, target_square)
+                                    self.position_changed()
                                     self.is_player_turn = False  # Switch to AI's turn
                             
                             self.selected_piece = None
@@ -497,11 +524,6 @@ class ChessGUI:
                     elif event.type == pygame.MOUSEMOTION:
                         self.drag_pos = event.pos
 
-            # If it's AI's turn, make a move
-            if not self.is_player_turn:
-                if self.make_ai_move():
-                    self.is_player_turn = True  # Switch back to player's turn
-
             # Check for game end
             state = self.chess_game.is_end()
             if sum(state) > 0:
@@ -517,26 +539,15 @@ class ChessGUI:
                 running = False
                 break
 
-            # Draw game state
-            self.screen.fill((255, 255, 255))
-            self.draw_board()
-            self.draw_pieces()
-            
-            if self.dragging and self.selected_piece:
-                board_pos = self.chess_game.board_2_array(self.selected_piece)
-                piece = self.chess_game.board[board_pos[1]][board_pos[0]]
-                piece_char = self.get_piece_char(piece)
-                if piece_char in self.pieces:
-                    x, y = self.drag_pos
-                    self.screen.blit(self.pieces[piece_char],
-                                   (x - self.SQUARE_SIZE//2, y - self.SQUARE_SIZE//2))
-            
-            self.draw_suggestions()
-            self.draw_evaluation_bar()
-            if self.ai_thinking:
-                self.draw_thinking_indicator()
-            pygame.display.flip()
+            # If it's AI's turn, start a search, the loop keeps drawing until its move event arrives
+            if not self.is_player_turn and not self.ai_thinking:
+                self.make_ai_move()
+
+            # Draw game state, only regions that changed reach the display
+            self.render()
+            self.clock.tick(self.FPS)
 
+        self.suggestions.close()
         pygame.quit()
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+import argparse
+import multiprocessing
+import queue
+import random
+import threading
+import time
+from copy import deepcopy
+from chess_engine import Chess, Position, SearchStats
+
+"""
+Island model of the evolutionary move search, several populations evolve in separate processes
+
+Every migration interval each island sends its elite moves to its neighbours over multiprocessing queues, together with
+the fitness cache entries it computed since the last migration, and takes the migrants in place of its worst moves.
+Caches are only exchanged at migrations, so between them islands may still evaluate the same move. The search stops
+early when the caller's stop_search hook (the UCI clock or stop) fires, every island then returns its best move so far.
+"""
+
+#Neighbours every island sends its migrants to, by topology name
+TOPOLOGIES = {'ring': lambda i, n: [(i + 1) % n],
+              'bidirectional': lambda i, n: sorted({(i - 1) % n, (i + 1) % n}),
+              'complete': lambda i, n: [j for j in range(n) if j != i]}
+MIGRATION_TIMEOUT = 60 #Seconds an island waits for its migrants before evolving on without them
+POLL_INTERVAL = 0.05 #Seconds between checks of the stop hook and the halt event
+
+"""
+Input: topology - string naming one of TOPOLOGIES, or dictionary of island number to the list of islands it sends to
+       islands - integer representing the number of islands
+Description: the neighbours of every island, an island never sends to itself
+Output: list of lists of island numbers
+"""
+def topology_targets(topology, islands):
+    if isinstance(topology, dict):
+        targets = [sorted(set(topology.get(i, [])) - {i}) for i in range(islands)]
+    elif topology in TOPOLOGIES:
+        targets = [[j for j in TOPOLOGIES[topology](i, islands) if j != i] for i in range(islands)]
+    else:
+        raise ValueError(f'Unknown topology {topology}')
+    if any(j < 0 or j >= islands for t in targets for j in t):
+        raise ValueError(f'topology names islands outside 0-{islands - 1}')
+    return targets
+
+"""
+Input: None
+Description: multiprocessing context for the islands, fork when the caller runs a single thread and otherwise a clean
+             forkserver (spawn where there is none), a fork of a process with threads (the UCI stdin reader) can hang
+             on locks those threads hold
+Output: multiprocessing context
+"""
+def island_context():
+    methods = multiprocessing.get_all_start_methods()
+    if threading.active_count() == 1 and 'fork' in methods:
+        return multiprocessing.get_context('fork')
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    if context.get_start_method() == 'forkserver':
+        context.set_forkserver_preload(['chess_islands'])
+    return context
+
+"""
+Input: parent1 - tuple representing a move
+       parent2 - tuple representing a move
+       legal - set of every candidate move
+Description: crossover, the start square of one parent with the target (and promotion) of the other when that is
+             a candidate move, otherwise one of the parents
+Output: tuple representing the child move
+"""
+def crossover(parent1, parent2, legal):
+    for child in ((parent1[0],) + parent2[1:], (parent2[0],) + parent1[1:]):
+        if child in legal and child != parent1 and child != parent2 and random.random() < 0.5:
+            return child
+    return random.choice([parent1, parent2])
+
+"""
+Input: number - integer representing the island
+       packed - bytes of the Position searched
+       population_size - integer representing the number of moves in the population
+       generations - integer representing the number of generations
+       migration_interval - integer representing the generations between migrations
+       migrants - integer representing how many elite moves are sent to each neighbour
+       inbox - queue the island receives migrants on
+       outboxes - list of the queues of the neighbours
+       senders - integer representing how many islands send to this one
+       results - queue the island puts its result on
+       seed - integer seeding the island
+       halt - event set when the search has to stop, checked after every generation and while waiting for migrants
+Description: evolve one population, selection and mutation as in Chess.evolutionary_algorithm, fitness is cached by move
+Output: None, puts (island number, best move, best fitness, evaluations, cache hits, generations run) on results
+"""
+def run_island(number, packed, population_size, generations, migration_interval, migrants, inbox, outboxes, senders, results, seed, halt):
+    random.seed(seed)
+    game = Position.unpack(packed).to_game()
+    candidates = game.order_moves(game.possible_board_moves(), game.p_move, prune_losing=True) or \
+        game.order_moves(game.possible_board_moves(), game.p_move)
+    candidates = [game.move_notation(*m) for m in candidates]
+    legal = set(candidates)
+    cache, fresh = {}, {} #Move to fitness, fresh holds the entries not sent to the neighbours yet
+    counts = [0, 0] #Evaluations, cache hits
+
+    def fitness(move):
+        if move in cache:
+            counts[1] += 1
+            return cache[move]
+        counts[0] += 1
+        temp_board = deepcopy(game)
+        score = temp_board.evaluate_position() * game.p_move if temp_board.move(*move) else float('-inf')
+        cache[move] = fresh[move] = score
+        return score
+
+    if number == 0: #One island starts like evolutionary_algorithm, the others from random moves
+        captures = [m for m in candidates if game.is_capture(game.board_2_array(m[0]), game.board_2_array(m[1]))]
+        population = captures[:population_size // 2]
+    else:
+        population = []
+    while len(population) < population_size:
+        population.append(random.choice(candidates))
+
+    done = 0
+    for generation in range(1, generations + 1):
+        scores = [fitness(move) for move in population]
+        done = generation
+        if halt.is_set():
+            break
+        if outboxes or senders:
+            if generation % migration_interval == 0 and generation < generations:
+                elite = sorted(zip(population, scores), key=lambda m: -m[1])[:migrants]
+                for outbox in outboxes:
+                    outbox.put((elite, fresh))
+                fresh = {}
+                worst = sorted(range(len(population)), key=lambda i: scores[i])
+                arrived, received, waited = [], 0, 0
+                while received < senders and waited < MIGRATION_TIMEOUT and not halt.is_set():
+                    try:
+                        moves, entries = inbox.get(timeout=POLL_INTERVAL)
+                    except queue.Empty:
+                        waited += POLL_INTERVAL
+                        continue
+                    received += 1
+                    arrived += moves
+                    for move, score in entries.items():
+                        cache.setdefault(move, score)
+                for i, (move, score) in zip(worst, sorted(arrived, key=lambda m: -m[1])):
+                    if score > scores[i]:
+                        population[i], scores[i] = move, score
+
+        # Selection
+        selected = []
+        for _ in range(population_size // 2):
+            tournament = random.sample(list(enumerate(scores)), min(3, len(scores)))
+            selected.append(population[max(tournament, key=lambda x: x[1])[0]])
+
+        # Crossover and Mutation
+        new_population = selected.copy()
+        while len(new_population) < population_size:
+            parent1, parent2 = random.sample(selected, 2) if len(selected) > 1 else (selected[0], selected[0])
+            child = crossover(parent1, parent2, legal)
+            if random.random() < 0.1:
+                child = random.choice(candidates)
+            new_population.append(child)
+        population = new_population
+
+    best = max(population, key=fitness)
+    results.put((number, best, cache[best], counts[0], counts[1], done))
+
+"""
+Input: game - Chess object to search
+       islands - integer representing the number of populations, one process each (Default=4) [OPTIONAL]
+       population_size - integer representing the number of moves in each population (Default=10) [OPTIONAL]
+       generations - integer representing the number of generations (Default=6) [OPTIONAL]
+       migration_interval - integer representing the generations between migrations (Default=2) [OPTIONAL]
+       migrants - integer representing how many elite moves each island sends to each neighbour (Default=2) [OPTIONAL]
+       topology - string naming one of TOPOLOGIES or dictionary of island number to the islands it sends to (Default='ring') [OPTIONAL]
+       stats - SearchStats object the search is recorded in, each fitness evaluation is a node (Default=None) [OPTIONAL]
+       seed - integer seeding the islands (Default=None, drawn from random) [OPTIONAL]
+Description: Suggest a move with the island model, book and tablebase moves are played without searching, the game's
+             stop_search hook is polled while the islands run and ends every island after its current generation
+Output: tuple representing the suggested move (start_square, end_square), (start_square, end_square, n_part) for promotions
+"""
+def island_search(game, islands=4, population_size=10, generations=6, migration_interval=2, migrants=2, topology='ring',
+                  stats=None, seed=None):
+    book_move = game.book_move() or game.tablebase_move()
+    if book_move != None:
+        return book_move
+    stats = stats or game.stats
+    if not game.order_moves(game.possible_board_moves(), game.p_move):
+        return ("No move", "No move")
+    targets = topology_targets(topology, islands)
+    seed = random.getrandbits(32) if seed == None else seed
+    packed = Position.from_game(game).pack()
+    context = island_context()
+    inboxes = [context.Queue() for _ in range(islands)]
+    results = context.Queue()
+    halt = context.Event()
+    processes = []
+    for i in range(islands):
+        senders = sum(i in t for t in targets)
+        processes.append(context.Process(target=run_island, daemon=True,
+                                                 args=(i, packed, population_size, generations, max(1, migration_interval), migrants,
+                                                       inboxes[i], [inboxes[j] for j in targets[i]], senders, results, seed + i, halt)))
+        processes[-1].start()
+    found = []
+    while len(found) < islands:
+        try:
+            found.append(results.get(timeout=POLL_INTERVAL))
+        except queue.Empty:
+            if any(process.exitcode not in (None, 0) for process in processes):
+                raise RuntimeError('an island process failed')
+        if not halt.is_set() and game.stop_search != None and game.stop_search():
+            halt.set()
+    for process in processes:
+        process.join()
+    _, best_move, best_score, _, _, _ = max(found, key=lambda r: r[2])
+    if stats != None:
+        stats.nodes += sum(r[3] for r in found)
+        stats.iteration(max(r[5] for r in found), best_score * game.p_move, best_move)
+    return best_move if best_score != float('-inf') else ("No move", "No move")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the island model with the single population evolutionary algorithm')
+    parser.add_argument('--fen', default='r2q1rk1/pp2bppp/2n1bn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - -')
+    parser.add_argument('--islands', type=int, default=4)
+    parser.add_argument('--population', type=int, default=10, help='population of each island')
+    parser.add_argument('--generations', type=int, default=6)
+    parser.add_argument('--migration-interval', type=int, default=2)
+    parser.add_argument('--migrants', type=int, default=2)
+    parser.add_argument('--topology', choices=list(TOPOLOGIES), default='ring')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    game = Chess(EPD=args.fen, interactive=False)
+    for name, search in [('single population', lambda s: game.evolutionary_algorithm(args.population * args.islands, args.generations, stats=s)),
+                         (f'{args.islands} islands ({args.topology})', lambda s: island_search(game, args.islands, args.population, args.generations,
+                                                                                         args.migration_interval, args.migrants, args.topology, s, args.seed))]:
+        stats = SearchStats()
+        start = time.perf_counter()
+        move = search(stats)
+        score = stats.iterations[-1]['score'] if stats.iterations else None
+        print(f'{name}: {move} score {score} with {stats.nodes} fitness evaluations in {time.perf_counter() - start:.2f}s')
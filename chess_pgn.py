@@ -0,0 +1,228 @@
+import argparse
+import re
+import sys
+import time
+from chess_engine import Chess
+
+"""
+Streaming PGN reader and writer, games are handled one at a time so files of any size are read and written in constant memory
+"""
+
+#Seven tag roster, always written first and in this order
+ROSTER = [('Event', '?'), ('Site', '?'), ('Date', '????.??.??'), ('Round', '?'), ('White', '?'), ('Black', '?'), ('Result', '*')]
+RESULTS = ['1-0', '0-1', '1/2-1/2', '*']
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+TOKEN = re.compile(r'[{;()]|\$\d+|[^\s{};()$]+')
+MOVE_NUMBER = re.compile(r'^\d+(?:\.+|$)') #Move number with its dots, never the zeros of 0-0
+
+"""
+Input: lines - iterable of strings, usually an open PGN file
+Description: parse PGN one game at a time, comments, variations and NAGs are skipped
+Output: generator of (tags, moves) where tags is a dictionary always containing Result and moves is a list of SAN strings
+"""
+def read_games(lines):
+    tags = {}
+    moves = []
+    depth = 0 #Variation nesting
+    in_comment = False
+    for line in lines:
+        pos = 0
+        if in_comment:
+            pos = line.find('}') + 1
+            if pos == 0:
+                continue
+            in_comment = False
+        if pos == 0 and line.startswith('%'):
+            continue #Escape line
+        stripped = line.strip()
+        if stripped.startswith('[') and depth == 0:
+            if moves:
+                yield tags, moves #Previous game had no result terminator
+                tags, moves = {}, []
+            for name, value in TAG.findall(stripped):
+                tags[name] = value.replace('\\"', '"').replace('\\\\', '\\')
+            continue
+        while True:
+            m = TOKEN.search(line, pos)
+            if m == None:
+                break
+            token = m.group()
+            pos = m.end()
+            if token == '{':
+                end = line.find('}', pos)
+                if end == -1:
+                    in_comment = True
+                    break
+                pos = end + 1
+            elif token == ';':
+                break
+            elif token == '(':
+                depth += 1
+            elif token == ')':
+                depth = max(0, depth - 1)
+            elif depth > 0 or token[0] == '$':
+                continue
+            elif token in RESULTS:
+                tags.setdefault('Result', token)
+                yield tags, moves
+                tags, moves, depth = {}, [], 0
+            else:
+                token = MOVE_NUMBER.sub('', token)
+                if token:
+                    moves.append(token)
+    if moves or tags:
+        tags.setdefault('Result', '*')
+        yield tags, moves
+
+"""
+Input: tags - dictionary of the game tags, a FEN tag sets the starting position
+       moves - list of SAN strings
+Description: replay a game through the integer move path of Chess
+Output: Chess object after the last move, ValueError is raised on the first illegal or ambiguous move
+"""
+def replay_game(tags, moves):
+    game = Chess(EPD=tags['FEN'], interactive=False) if 'FEN' in tags else Chess(interactive=False)
+    for san in moves:
+        move = game.parse_san(san)
+        if move == None or not game.play(*move):
+            raise ValueError(f"illegal move {game.fullmove}{'.' if game.p_move == 1 else '...'} {san}")
+    return game
+
+"""
+Input: game - Chess object
+Description: SAN of every move in the game, found by replaying the move list from the starting position
+Output: tuple of (starting Chess object, list of SAN strings, Chess object of the replayed game)
+"""
+def game_san(game):
+    start = Chess(EPD=game.init_pos, interactive=False)
+    replay = Chess(EPD=game.init_pos, interactive=False)
+    moves = []
+    for cp, np, n_part in game.move_list:
+        cur_pos = f'{replay.x[cp[0]]}{replay.y[cp[1]]}'
+        next_pos = f'{replay.x[np[0]]}{replay.y[np[1]]}'
+        moves.append(replay.san(cur_pos, next_pos, n_part))
+        replay.play(cp, np, n_part)
+    return start, moves, replay
+
+"""
+Input: game - Chess object
+Description: PGN result of the game, unfinished games are *
+Output: string representing the result
+"""
+def game_result(game):
+    state = game.is_end()
+    if state == [1, 0, 0]:
+        return '1-0'
+    elif state == [0, 0, 1]:
+        return '0-1'
+    elif state == [0, 1, 0]:
+        return '1/2-1/2'
+    return '*'
+
+"""
+Input: game - Chess object
+       tags - dictionary of extra or overriding tags (Default=None) [OPTIONAL]
+       width - integer representing the longest movetext line (Default=79) [OPTIONAL]
+Description: export a game as PGN with the seven tag roster and SAN movetext
+Output: string representing the game, ending with a blank line
+"""
+def game_pgn(game, tags=None, width=79):
+    start, moves, end = game_san(game)
+    tags = dict(tags or {})
+    tags.setdefault('Result', game_result(end))
+    fen = start.EPD_hash(True)
+    if fen != START_FEN:
+        tags.setdefault('SetUp', '1')
+        tags.setdefault('FEN', fen)
+    lines = []
+    for name, default in ROSTER:
+        lines.append(f'[{name} "{escape_tag(tags.get(name, default))}"]')
+    for name, value in tags.items():
+        if name not in dict(ROSTER):
+            lines.append(f'[{name} "{escape_tag(value)}"]')
+    lines.append('')
+    tokens = []
+    number, p_move = start.fullmove, start.p_move
+    for i, san in enumerate(moves):
+        if p_move == 1:
+            tokens.append(f'{number}.')
+        elif i == 0:
+            tokens.append(f'{number}...')
+        tokens.append(san)
+        if p_move == -1:
+            number += 1
+        p_move *= -1
+    tokens.append(tags['Result'])
+    line = ''
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > width:
+            lines.append(line)
+            line = token
+        else:
+            line = f'{line} {token}' if line else token
+    lines.append(line)
+    return '\n'.join(lines) + '\n\n'
+
+"""
+Input: value - tag value
+Description: escape a tag value for PGN
+Output: string representing the escaped value
+"""
+def escape_tag(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+"""
+Input: f - file object opened for writing
+       game - Chess object
+       tags - dictionary of extra or overriding tags (Default=None) [OPTIONAL]
+Description: append one game to a PGN file
+Output: None
+"""
+def write_game(f, game, tags=None):
+    f.write(game_pgn(game, tags))
+
+"""
+Input: path - string representing the PGN file
+       limit - integer representing the most games to replay (Default=None, all) [OPTIONAL]
+       progress - function called with the running totals every 1000 games (Default=None) [OPTIONAL]
+Description: replay every game of a PGN file, games with illegal moves are counted and skipped
+Output: dictionary containing the games, plies, errors, seconds and games per second
+"""
+def replay_file(path, limit=None, progress=None):
+    totals = {'games': 0, 'plies': 0, 'errors': 0, 'first_error': None}
+    start = time.perf_counter()
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for tags, moves in read_games(f):
+            if limit != None and totals['games'] >= limit:
+                break
+            totals['games'] += 1
+            try:
+                replay_game(tags, moves)
+                totals['plies'] += len(moves)
+            except ValueError as e:
+                totals['errors'] += 1
+                if totals['first_error'] == None:
+                    totals['first_error'] = f"game {totals['games']}: {e}"
+            if progress != None and totals['games'] % 1000 == 0:
+                progress(totals, time.perf_counter() - start)
+    totals['seconds'] = time.perf_counter() - start
+    totals['games_per_second'] = totals['games'] / max(totals['seconds'], 1e-9)
+    return totals
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay the games of a PGN file and report the speed')
+    parser.add_argument('pgn', help='PGN file')
+    parser.add_argument('--limit', type=int, default=None, help='stop after this many games')
+    args = parser.parse_args()
+
+    def progress(totals, seconds):
+        sys.stderr.write(f"\r{totals['games']} games {totals['games'] / max(seconds, 1e-9):.1f} games/s")
+
+    totals = replay_file(args.pgn, args.limit, progress)
+    sys.stderr.write('\n')
+    print(f"{totals['games']} games, {totals['plies']} plies, {totals['errors']} with illegal moves in {totals['seconds']:.2f}s")
+    print(f"{totals['games_per_second']:.1f} games/s, {totals['plies'] / max(totals['seconds'], 1e-9):.0f} plies/s")
+    if totals['first_error']:
+        print(f"first error: {totals['first_error']}")
@@ -0,0 +1,178 @@
+import argparse
+import atexit
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+"""
+Hot path profiling, wall time and call counts of the engine components during a search
+
+The timing wrappers are only installed while a Profiler is enabled, so the engine runs untouched otherwise.
+Set CHESS_PROFILE=1 to profile a whole process (report on stderr at exit) or CHESS_PROFILE=<path> to write the report to a file.
+"""
+
+#Chess methods that are timed
+METHODS = ['move', 'valid_move', 'possible_board_moves', 'order_moves', 'EPD_hash', 'log_move', 'evaluate_position']
+
+#Piece classes whose movement functions are timed together as 'movement'
+PIECES = ['King', 'Queen', 'Rook', 'Bishop', 'Knight', 'Pawn']
+
+class Profiler:
+    """
+    Input: module - engine module to instrument (Default=None, chess_engine) [OPTIONAL]
+    Description: Profiler initail variables
+    Output: None
+    """
+    def __init__(self, module=None):
+        if module == None:
+            import chess_engine as module
+        self.module = module
+        self.calls = {} #Calls by component
+        self.total = {} #Seconds by component, calls to other components included
+        self.own = {} #Seconds by component, calls to other components excluded
+        self.local = threading.local() #Per thread stack of child time of the running components
+        self.patched = [] #(owner, attribute, original) of the installed wrappers
+        self.wall = 0.0
+        self.started = None
+
+    """
+    Input: name - string representing the component the function is counted as
+           func - function to time
+    Description: wrap a function so its calls and time are added to a component
+    Output: function
+    """
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            stack = self.local.__dict__.setdefault('stack', [])
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                child = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self.calls[name] = self.calls.get(name, 0) + 1
+                self.total[name] = self.total.get(name, 0.0) + elapsed
+                self.own[name] = self.own.get(name, 0.0) + elapsed - child
+        return timed
+
+    """
+    Input: None
+    Description: install the timing wrappers
+    Output: None
+    """
+    def enable(self):
+        if self.patched:
+            return
+        targets = [(self.module, 'deepcopy', 'deepcopy')]
+        targets += [(self.module.Chess, method, method) for method in METHODS]
+        targets += [(getattr(self.module.Chess, piece), 'movement', 'movement') for piece in PIECES]
+        for owner, attribute, name in targets:
+            original = getattr(owner, attribute)
+            setattr(owner, attribute, self.wrap(name, original))
+            self.patched.append((owner, attribute, original))
+        self.started = time.perf_counter()
+
+    """
+    Input: None
+    Description: remove the timing wrappers, the collected numbers are kept
+    Output: None
+    """
+    def disable(self):
+        for owner, attribute, original in reversed(self.patched):
+            setattr(owner, attribute, original)
+        self.patched = []
+        if self.started != None:
+            self.wall += time.perf_counter() - self.started
+            self.started = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    """
+    Input: None
+    Description: collected numbers by component
+    Output: dictionary of component to dictionary containing calls, total and own seconds
+    """
+    def as_dict(self):
+        return {name: {'calls': self.calls[name], 'total': self.total[name], 'own': self.own[name]} for name in self.calls}
+
+    """
+    Input: None
+    Description: text table of the components sorted by own time
+    Output: string representing the report
+    """
+    def report(self):
+        wall = self.wall + (time.perf_counter() - self.started if self.started != None else 0.0)
+        lines = [f"{'component':<22}{'calls':>10}{'total s':>10}{'own s':>10}{'own %':>8}{'us/call':>10}"]
+        for name in sorted(self.calls, key=lambda n: -self.own[n]):
+            lines.append(f"{name:<22}{self.calls[name]:>10}{self.total[name]:>10.3f}{self.own[name]:>10.3f}"
+                         f"{100 * self.own[name] / max(wall, 1e-9):>7.1f}%{1e6 * self.total[name] / self.calls[name]:>10.1f}")
+        lines.append(f"{'wall':<22}{'':>10}{wall:>10.3f}")
+        return '\n'.join(lines)
+
+"""
+Input: module - engine module to instrument
+Description: profile the whole process when CHESS_PROFILE is set, the report is written when the process exits
+Output: Profiler object
+"""
+def enable_from_environment(module):
+    profiler = Profiler(module)
+    profiler.enable()
+    target = os.environ.get('CHESS_PROFILE', '1')
+
+    def write_report():
+        profiler.disable()
+        if target.lower() in ['1', 'true', 'yes']:
+            sys.stderr.write(profiler.report() + '\n')
+        else:
+            with open(target, 'w') as f:
+                f.write(profiler.report() + '\n')
+    atexit.register(write_report)
+    return profiler
+
+"""
+Input: fen - string representing the position in EPD/FEN format
+       algorithm - string representing the algorithm to use (Choices=['alpha-beta','evolutionary','pso']) (Default='alpha-beta') [OPTIONAL]
+       budget - integer representing the search depth, generations or iterations (Default=3) [OPTIONAL]
+       pstats_path - string representing a file to dump cProfile stats to instead of timing components (Default=None) [OPTIONAL]
+Description: search one position with profiling on
+Output: tuple of (move, Profiler or pstats.Stats)
+"""
+def profile_search(fen, algorithm='alpha-beta', budget=3, pstats_path=None):
+    from chess_engine import Chess
+    from chess_tournament import BUDGETS, engine_move
+    game = Chess(EPD=fen, interactive=False)
+    options = {BUDGETS[algorithm]: budget}
+    if pstats_path != None:
+        profile = cProfile.Profile()
+        move = profile.runcall(engine_move, game, algorithm, options)
+        profile.dump_stats(pstats_path)
+        return move, pstats.Stats(profile)
+    with Profiler() as profiler:
+        move = engine_move(game, algorithm, options)
+    return move, profiler
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Profile one engine search')
+    parser.add_argument('--fen', default='r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq -')
+    parser.add_argument('--algorithm', choices=['alpha-beta', 'evolutionary', 'pso'], default='alpha-beta')
+    parser.add_argument('--budget', type=int, default=3, help='depth, generations or iterations')
+    parser.add_argument('--pstats', help='write cProfile stats to this file instead of the component report')
+    args = parser.parse_args()
+    move, result = profile_search(args.fen, args.algorithm, args.budget, args.pstats)
+    print(f'move {move}\n')
+    if args.pstats:
+        result.sort_stats('cumulative').print_stats(20)
+        print(f'cProfile stats written to {args.pstats}')
+    else:
+        print(result.report())
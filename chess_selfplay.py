@@ -0,0 +1,248 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+from chess_engine import Chess, Position, SearchStats
+from chess_tournament import ALGORITHMS, OPENINGS, engine_move
+
+"""
+Self-play training data, positions sampled from headless engine games with the search score and the game result
+
+Positions are stored in a fixed-record NumPy memmap (<path>) with a JSON sidecar (<path>.json) holding the record count
+and the number of finished games, so an interrupted run resumes where the last committed batch ended.
+"""
+
+#Fixed record of one sampled position, planes hold one bit per square (y * 8 + x) for each part in PLANES
+RECORD = np.dtype([('planes', np.uint8, (12, 8)), ('side', np.int8), ('castling', np.uint8), ('en_passant', np.int8),
+                   ('halfmove', np.uint8), ('ply', np.uint16), ('hash', np.uint64), ('score', np.int32), ('result', np.int8)])
+PLANES = np.array([1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6], dtype=np.int8) #Part of each plane, white pawn first
+SCORE_LIMIT = 100000 #Search scores are clamped to this, above every mate and tablebase score
+
+"""
+Input: game - Chess object
+Description: legal moves of the side to move
+Output: list of moves (start_square, end_square[, n_part])
+"""
+def legal_moves(game):
+    return [game.move_notation(*m) for m in game.order_moves(game.possible_board_moves(), game.p_move)
+            if game.valid_move(game.board_2_array(m[0]), m[1])]
+
+"""
+Input: job - tuple of (game id, white algorithm, black algorithm, opening EPD, max plies, options, seed, sample rate, skip plies, random plies)
+Description: play one self-play game, random opening moves first for variety, and sample positions that are not in check
+             and whose best move is not a capture with the search score for white
+Output: dictionary containing the game id, the sampled (Position, score, ply) tuples and the result for white (1, 0, -1)
+"""
+def play_training_game(job):
+    game_id, white, black, opening, max_plies, options, seed, sample_rate, skip_plies, random_plies = job
+    random.seed(seed)
+    game = Chess(EPD=opening, interactive=False)
+    for _ in range(random_plies):
+        moves = legal_moves(game)
+        if not moves:
+            break
+        game.move(*random.choice(moves))
+    samples = []
+    plies = 0
+    state = game.is_end()
+    while sum(state) == 0 and plies < max_plies:
+        algorithm = white if game.p_move == 1 else black
+        stats = SearchStats()
+        position = Position.from_game(game)
+        move = engine_move(game, algorithm, dict(options[algorithm], stats=stats))
+        quiet = move != ("No move", "No move") and not game.in_check() and not game.is_capture(game.board_2_array(move[0]), game.board_2_array(move[1]))
+        if move == ("No move", "No move") or not game.move(*move):
+            state = [0, 0, 1] if game.p_move == 1 else [1, 0, 0] #Forfeit
+            break
+        if quiet and stats.iterations and plies >= skip_plies and random.random() < sample_rate:
+            score = stats.iterations[-1]['score']
+            samples.append((position, int(max(-SCORE_LIMIT, min(SCORE_LIMIT, score))), plies))
+        plies += 1
+        state = game.is_end()
+    result = 1 if state == [1, 0, 0] else -1 if state == [0, 0, 1] else 0
+    return {'id': game_id, 'samples': samples, 'result': result, 'plies': plies}
+
+"""
+Input: samples - list of (Position, score, ply, result) tuples
+Description: build records in bulk, the board planes are bit packed
+Output: NumPy structured array of RECORD
+"""
+def encode_samples(samples):
+    records = np.zeros(len(samples), dtype=RECORD)
+    if not samples:
+        return records
+    boards = np.frombuffer(b''.join(s[0].board for s in samples), dtype=np.uint8).reshape(-1, 64).astype(np.int8) - 6
+    records['planes'] = np.packbits(boards[:, None, :] == PLANES[None, :, None], axis=2)
+    records['side'] = [s[0].p_move for s in samples]
+    records['castling'] = [s[0].castling for s in samples]
+    records['en_passant'] = [-1 if s[0].en_passant == None else s[0].en_passant % 8 for s in samples]
+    records['halfmove'] = [min(s[0].halfmove, 255) for s in samples]
+    records['hash'] = [s[0].hash for s in samples]
+    records['score'] = [s[1] for s in samples]
+    records['ply'] = [s[2] for s in samples]
+    records['result'] = [s[3] for s in samples]
+    return records
+
+class TrainingData:
+    """
+    Input: path - string representing the record file
+           capacity - integer representing the record count to allocate for a new file (Default=None, open an existing file) [OPTIONAL]
+           mode - string, 'r+' to append or 'r' to read (Default='r+') [OPTIONAL]
+    Description: TrainingData initail variables, the records are memory mapped
+    Output: None
+    """
+    def __init__(self, path, capacity=None, mode='r+'):
+        self.path = path
+        self.meta_path = path + '.json'
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self.meta = json.load(f)
+            if np.dtype([tuple(field) for field in self.meta['dtype']]) != RECORD:
+                raise ValueError(f'{path} was written with a different record layout')
+            self.records = np.memmap(path, dtype=RECORD, mode=mode, shape=(self.meta['capacity'],))
+        elif os.path.exists(path):
+            raise FileExistsError(f'{path} has no {self.meta_path} sidecar, its record count is unknown') #Never map a new file over it
+        elif capacity != None and mode != 'r':
+            self.meta = {'capacity': capacity, 'count': 0, 'games': 0, 'settings': None,
+                         'dtype': [list(field) for field in RECORD.descr]}
+            self.records = np.memmap(path, dtype=RECORD, mode='w+', shape=(capacity,))
+            self.commit(0)
+        else:
+            raise FileNotFoundError(f'no training data at {path}')
+        self.seen = np.sort(self.records['hash'][:self.count]) #Hashes already stored, kept sorted for dedup
+
+    @property
+    def count(self):
+        return self.meta['count']
+
+    @property
+    def capacity(self):
+        return self.meta['capacity']
+
+    """
+    Input: None
+    Description: the stored records
+    Output: NumPy memmap view of RECORD
+    """
+    def data(self):
+        return self.records[:self.count]
+
+    """
+    Input: records - NumPy structured array of RECORD
+    Description: add records whose position hash is not stored yet, the file is not committed
+    Output: integer representing the records added
+    """
+    def append(self, records):
+        _, first = np.unique(records['hash'], return_index=True)
+        records = records[np.sort(first)]
+        if len(self.seen):
+            at = np.searchsorted(self.seen, records['hash'])
+            records = records[self.seen[np.minimum(at, len(self.seen) - 1)] != records['hash']]
+        records = records[:self.capacity - self.count]
+        self.records[self.count:self.count + len(records)] = records
+        self.meta['count'] += len(records)
+        hashes = np.sort(records['hash'])
+        self.seen = np.insert(self.seen, np.searchsorted(self.seen, hashes), hashes)
+        return len(records)
+
+    """
+    Input: games - integer representing the games whose samples are all stored
+    Description: flush the records and write the sidecar, a run interrupted later resumes from here
+    Output: None
+    """
+    def commit(self, games):
+        self.records.flush()
+        self.meta['games'] = games
+        with open(self.meta_path + '.tmp', 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(self.meta_path + '.tmp', self.meta_path)
+
+"""
+Input: path - string representing the record file, an existing file is resumed
+       positions - integer representing the record count to generate
+       algorithms - list of algorithm names playing each other (Default=['alpha-beta']) [OPTIONAL]
+       options - dictionary of algorithm name to keyword arguments overriding ALGORITHMS (Default=None) [OPTIONAL]
+       workers - integer representing the size of the process pool (Default=None, one per CPU) [OPTIONAL]
+       seed - integer, game n is played with seed + n (Default=0) [OPTIONAL]
+       sample_rate - float representing the chance a position is sampled (Default=0.25) [OPTIONAL]
+       skip_plies - integer representing the searched plies at the start of a game that are never sampled (Default=8) [OPTIONAL]
+       random_plies - integer representing the random moves played from the opening (Default=4) [OPTIONAL]
+       max_plies - integer representing the ply count where a game is adjudicated a draw (Default=200) [OPTIONAL]
+       batch - integer representing the samples written per commit (Default=4096) [OPTIONAL]
+       progress - function called with (records, games, seconds) after each commit (Default=None) [OPTIONAL]
+Description: generate training data with self-play in a process pool, games are committed in game id order so a resumed run
+             plays no game twice, a resumed run keeps the settings the file was started with
+Output: TrainingData object
+"""
+def generate(path, positions, algorithms=None, options=None, workers=None, seed=0, sample_rate=0.25, skip_plies=8,
+             random_plies=4, max_plies=200, batch=4096, progress=None):
+    algorithms = ['alpha-beta'] if algorithms == None else algorithms
+    settings = {a: dict(ALGORITHMS[a], **(options or {}).get(a, {})) for a in algorithms}
+    data = TrainingData(path, positions)
+    if data.meta['settings'] == None:
+        data.meta['settings'] = {'algorithms': settings, 'seed': seed, 'sample_rate': sample_rate, 'skip_plies': skip_plies,
+                                 'random_plies': random_plies, 'max_plies': max_plies}
+    else: #Resume with the settings the file was started with
+        settings = data.meta['settings']['algorithms']
+        algorithms = list(settings)
+        seed, sample_rate, skip_plies, random_plies, max_plies = (data.meta['settings'][k] for k in
+                                                                  ('seed', 'sample_rate', 'skip_plies', 'random_plies', 'max_plies'))
+    games = next_game = data.meta['games']
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    buffer = []
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while data.count < data.capacity:
+            while len(pending) < workers * 2:
+                white = algorithms[next_game % len(algorithms)]
+                black = algorithms[next_game // len(algorithms) % len(algorithms)]
+                pending.append(pool.submit(play_training_game, (next_game, white, black, OPENINGS[next_game % len(OPENINGS)], max_plies,
+                                                                settings, seed + next_game, sample_rate, skip_plies, random_plies)))
+                next_game += 1
+            result = pending.popleft().result()
+            buffer += [(position, score, ply, result['result']) for position, score, ply in result['samples']]
+            games += 1
+            if len(buffer) >= batch:
+                data.append(encode_samples(buffer))
+                data.commit(games)
+                buffer = []
+                if progress != None:
+                    progress(data.count, games, time.perf_counter() - start)
+        for future in pending:
+            future.cancel()
+    if buffer and data.count < data.capacity:
+        data.append(encode_samples(buffer))
+        data.commit(games)
+    return data
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate training positions from self-play games')
+    parser.add_argument('path', help='record file, resumed when it exists')
+    parser.add_argument('--positions', type=int, default=100000, help='records to generate (only used for a new file)')
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=['alpha-beta'])
+    parser.add_argument('--depth', type=int, default=ALGORITHMS['alpha-beta']['depth'], help='alpha-beta search depth')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sample-rate', type=float, default=0.25)
+    parser.add_argument('--skip-plies', type=int, default=8)
+    parser.add_argument('--random-plies', type=int, default=4)
+    parser.add_argument('--max-plies', type=int, default=200)
+    parser.add_argument('--batch', type=int, default=4096)
+    args = parser.parse_args()
+
+    def progress(records, games, seconds):
+        sys.stderr.write(f'\r{records} positions from {games} games, {records / max(seconds, 1e-9):.1f} positions/s')
+
+    try:
+        data = generate(args.path, args.positions, args.algorithms, {'alpha-beta': {'depth': args.depth}}, args.workers, args.seed,
+                        args.sample_rate, args.skip_plies, args.random_plies, args.max_plies, args.batch, progress)
+        sys.stderr.write('\n')
+        print(f"{data.count} positions from {data.meta['games']} games in {args.path}")
+    except KeyboardInterrupt:
+        sys.stderr.write('\nInterrupted, run the same command again to resume from the last committed batch\n')
@@ -0,0 +1,269 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import json
+import time
+from chess_engine import Position, SearchStats
+from chess_tournament import BUDGETS, engine_move
+
+"""
+Local asyncio analysis server, jobs for many concurrent games run on a fixed process pool
+
+Protocol: newline delimited JSON over TCP, one request per line, e.g.
+    {"id": 1, "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -", "algorithm": "alpha-beta", "budget": 3, "timeout": 10}
+answered with
+    {"id": 1, "move": "e2e4", "score": 0, "time": 0.4, "cached": false}
+or  {"id": 1, "error": "..."}
+"""
+
+"""
+Input: position - Position object to analyse
+       algorithm - string representing the algorithm to use (Choices=['alpha-beta','evolutionary','pso'])
+       budget - integer representing the search depth, generations or iterations
+       deadline - float representing the time.time() the search is abandoned at, nobody waits for it afterwards (Default=None) [OPTIONAL]
+Description: analyse one position, runs inside a pool worker process
+Output: dictionary containing the move in UCI notation, the score (alpha-beta only, side to move), the search time,
+        the nodes searched (fitness evaluations for the evolutionary algorithm and PSO) and nodes per second,
+        {'stopped': True} when the deadline passed
+"""
+def analyse(position, algorithm, budget, deadline=None):
+    game = position.to_game()
+    game.stats = SearchStats()
+    if deadline != None:
+        game.stop_search = lambda: time.time() >= deadline
+    start = time.perf_counter()
+    score = None
+    if algorithm == 'alpha-beta':
+        score, move = game.alpha_beta(budget, float('-inf'), float('inf'), game.p_move == 1)
+        move = move if move != None else ("No move", "No move")
+        score = max(-100000, min(100000, score * game.p_move)) if move[0] != "No move" else None
+    else:
+        move = engine_move(game, algorithm, {BUDGETS[algorithm]: budget})
+    if deadline != None and time.time() >= deadline:
+        return {'stopped': True} #The search may have been cut short, the result is neither answered nor cached
+    elapsed = time.perf_counter() - start
+    result = {'move': None, 'score': score, 'time': elapsed, 'nodes': game.stats.nodes + game.stats.qnodes, 'nps': game.stats.nps}
+    if move != ("No move", "No move"):
+        result['move'] = f"{move[0].lower()}{move[1].lower()}{move[2] if len(move) > 2 else ''}"
+    return result
+
+class AnalysisServer:
+    """
+    Input: workers - integer representing the size of the process pool (Default=2) [OPTIONAL]
+           max_queue - integer representing how many distinct jobs may be queued or running before requests are refused (Default=32) [OPTIONAL]
+           cache_size - integer representing how many results are kept (Default=1024) [OPTIONAL]
+           default_timeout - float representing the seconds a request waits for its result, a job nobody waits for any more
+                             is stopped (Default=30) [OPTIONAL]
+           max_budget - integer representing the largest budget accepted (Default=6) [OPTIONAL]
+    Description: AnalysisServer initail variables
+    Output: None
+    """
+    def __init__(self, workers=2, max_queue=32, cache_size=1024, default_timeout=30, max_budget=6):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.max_queue = max_queue
+        self.cache_size = cache_size
+        self.default_timeout = default_timeout
+        self.max_budget = max_budget
+        self.cache = OrderedDict() #LRU cache of finished results by job key
+        self.pending = {} #Future by job key, identical requests share one job
+        self.server = None
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0}
+
+    """
+    Input: request - dictionary containing the request
+    Description: validate a request and build its job key
+    Output: tuple of (job key, timeout) or a string describing the error
+    """
+    def job_key(self, request):
+        fen = request.get('fen')
+        algorithm = request.get('algorithm', 'alpha-beta')
+        budget = request.get('budget', 3)
+        if not isinstance(fen, str):
+            return 'invalid fen'
+        try:
+            position = Position.from_fen(fen) #Equal positions share a job whatever the FEN spacing or clocks
+        except ValueError:
+            return 'invalid fen'
+        if algorithm not in BUDGETS:
+            return f"unknown algorithm, expected one of {', '.join(BUDGETS)}"
+        if not isinstance(budget, int) or isinstance(budget, bool) or budget < 1 or budget > self.max_budget:
+            return f'budget must be an integer from 1 to {self.max_budget}'
+        timeout = request.get('timeout', self.default_timeout)
+        if not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or not 0 < timeout < float('inf'):
+            return 'timeout must be a positive number of seconds'
+        return (position, algorithm, budget), float(timeout)
+
+    """
+    Input: key - tuple of (Position, algorithm, budget)
+           result - dictionary containing the analysis result
+    Description: store a result, dropping the least recently used one when the cache is full
+    Output: None
+    """
+    def remember(self, key, result):
+        self.cache[key] = result
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    """
+    Input: request - dictionary containing the request
+    Description: answer a request from the cache, by joining an identical pending job or by queueing a new job, a job
+                 is stopped at the deadline of the request that queued it so abandoned jobs free their worker
+    Output: dictionary containing the response
+    """
+    async def handle(self, request):
+        self.stats['requests'] += 1
+        checked = self.job_key(request)
+        if isinstance(checked, str):
+            self.stats['errors'] += 1
+            return {'error': checked}
+        key, timeout = checked
+        if key in self.cache:
+            self.stats['cache_hits'] += 1
+            self.cache.move_to_end(key)
+            return dict(self.cache[key], cached=True)
+        deadline = time.time() + timeout
+        while True:
+            future = self.pending.get(key)
+            if future != None and not future.done():
+                self.stats['coalesced'] += 1
+            else:
+                if future == None and len(self.pending) >= self.max_queue:
+                    self.stats['rejected'] += 1
+                    return {'error': 'queue full'}
+                future = asyncio.get_running_loop().run_in_executor(self.pool, analyse, *key, deadline)
+                self.pending[key] = future
+                future.add_done_callback(lambda f, key=key: self.finished(key, f))
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), max(0, deadline - time.time())) #Shielded, other requests may share the job
+            except asyncio.TimeoutError:
+                result = {'stopped': True}
+            except Exception as e:
+                self.stats['errors'] += 1
+                return {'error': str(e)}
+            if not result.get('stopped'):
+                return dict(result, cached=False)
+            if time.time() >= deadline:
+                self.stats['timeouts'] += 1
+                return {'error': 'timeout'}
+            #The shared job was stopped at the deadline of the request that started it, search again until ours
+
+    """
+    Input: key - tuple of (Position, algorithm, budget)
+           future - finished future of the job
+    Description: move a finished job from pending to the cache
+    Output: None
+    """
+    def finished(self, key, future):
+        if self.pending.get(key) is future:
+            del self.pending[key]
+        if not future.cancelled() and future.exception() == None and not future.result().get('stopped'):
+            self.remember(key, future.result())
+
+    """
+    Input: reader - asyncio StreamReader of the connection
+           writer - asyncio StreamWriter of the connection
+    Description: serve one client connection, requests on a connection are answered concurrently
+    Output: None
+    """
+    async def connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def reply(line):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError
+            except ValueError:
+                response = {'error': 'invalid json'}
+            else:
+                if request.get('cmd') == 'stats':
+                    response = dict(self.stats, pending=len(self.pending), cached=len(self.cache))
+                else:
+                    response = await self.handle(request)
+                if 'id' in request:
+                    response['id'] = request['id']
+            async with lock:
+                writer.write((json.dumps(response) + '\n').encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(reply(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    """
+    Input: host - string representing the interface to listen on (Default='127.0.0.1') [OPTIONAL]
+           port - integer representing the port to listen on, 0 picks a free port (Default=8765) [OPTIONAL]
+    Description: start listening
+    Output: integer representing the port the server listens on
+    """
+    async def start(self, host='127.0.0.1', port=8765):
+        self.server = await asyncio.start_server(self.connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    """
+    Input: None
+    Description: stop listening and shut the process pool down
+    Output: None
+    """
+    async def close(self):
+        if self.server != None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+"""
+Input: requests - list of request dictionaries
+       host - string representing the server address (Default='127.0.0.1') [OPTIONAL]
+       port - integer representing the server port (Default=8765) [OPTIONAL]
+Description: send requests over one connection and wait for every answer
+Output: list of response dictionaries in the order the requests were given
+"""
+async def query(requests, host='127.0.0.1', port=8765):
+    reader, writer = await asyncio.open_connection(host, port)
+    for i, request in enumerate(requests):
+        writer.write((json.dumps(dict(request, id=i)) + '\n').encode())
+    await writer.drain()
+    responses = [None] * len(requests)
+    for _ in requests:
+        response = json.loads(await reader.readline())
+        responses[response['id']] = response
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local chess analysis server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-queue', type=int, default=32)
+    parser.add_argument('--cache-size', type=int, default=1024)
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    async def main():
+        server = AnalysisServer(workers=args.workers, max_queue=args.max_queue, cache_size=args.cache_size, default_timeout=args.timeout)
+        port = await server.start(args.host, args.port)
+        print(f'Analysis server listening on {args.host}:{port}')
+        try:
+            await server.server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
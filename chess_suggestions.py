@@ -0,0 +1,126 @@
+import multiprocessing
+import queue
+
+"""
+Move suggestion workers, one process per algorithm working on position snapshots
+"""
+
+#Search settings used for each suggestion
+SETTINGS = {'alpha-beta': {'depth': 3},
+            'evolutionary': {'population_size': 10, 'generations': 3},
+            'pso': {'num_particles': 10, 'iterations': 5}}
+
+"""
+Input: algorithm - string representing the algorithm of this worker (Choices=['alpha-beta','evolutionary','pso'])
+       settings - dictionary containing the keyword arguments of the algorithm
+       jobs - multiprocessing Queue of (job id, Position) snapshots, None stops the worker
+       results - multiprocessing Queue the worker publishes (algorithm, job id, move, score, done, total) to,
+                 score is in centipawns for white (alpha-beta only, None otherwise)
+       latest - multiprocessing Value holding the newest job id, any other job is cancelled
+Description: worker process main loop, only the newest snapshot is searched and a search is abandoned as soon as a newer one arrives
+Output: None
+"""
+def suggestion_worker(algorithm, settings, jobs, results, latest):
+    while True:
+        job = jobs.get()
+        try:
+            while True:
+                job = jobs.get_nowait() #Skip to the newest snapshot
+        except queue.Empty:
+            pass
+        if job == None:
+            break
+        job_id, position = job
+        if latest.value != job_id:
+            continue
+        game = position.to_game()
+        if algorithm == 'alpha-beta':
+            game.stop_search = lambda: latest.value != job_id
+            total = settings.get('depth', 3)
+            for depth in range(1, total + 1):
+                score, move = game.alpha_beta(depth, float('-inf'), float('inf'), game.p_move == 1, settings.get('quiescence', False))
+                if latest.value != job_id:
+                    break
+                score = max(-100000, min(100000, score)) #Kept within the range of mate and tablebase scores
+                results.put((algorithm, job_id, move if move else ("No move", "No move"), score, depth, total))
+        else:
+            if algorithm == 'evolutionary':
+                move = game.evolutionary_algorithm(**settings)
+            else:
+                move = game.particle_swarm_optimization(**settings)
+            if latest.value == job_id:
+                results.put((algorithm, job_id, move, None, 1, 1))
+
+class SuggestionWorkers:
+    """
+    Input: settings - dictionary of algorithm name to keyword arguments (Default=SETTINGS) [OPTIONAL]
+    Description: SuggestionWorkers initail variables, starts one process per algorithm
+    Output: None
+    """
+    def __init__(self, settings=None):
+        self.settings = SETTINGS if settings == None else settings
+        ctx = multiprocessing.get_context('spawn') #Do not fork a process that has a display open
+        self.latest = ctx.Value('i', 0, lock=False)
+        self.results = ctx.Queue()
+        self.jobs = {}
+        self.processes = []
+        self.position = None
+        self.suggestions = {a: None for a in self.settings} #Newest move for the current position by algorithm
+        self.progress = {a: (0, 1) for a in self.settings} #(done, total) for the current position by algorithm
+        self.scores = {a: None for a in self.settings} #Newest search score for the current position by algorithm
+        for algorithm, options in self.settings.items():
+            self.jobs[algorithm] = ctx.Queue()
+            process = ctx.Process(target=suggestion_worker, args=(algorithm, options, self.jobs[algorithm], self.results, self.latest))
+            process.daemon = True
+            process.start()
+            self.processes.append(process)
+
+    """
+    Input: position - Position snapshot of the game
+    Description: hand a new position to every worker, work on the previous position is cancelled, nothing happens if the position did not change
+    Output: boolean representing if the position changed
+    """
+    def update(self, position):
+        if position == self.position:
+            return False
+        self.position = position
+        self.latest.value += 1
+        for algorithm in self.settings:
+            self.suggestions[algorithm] = None
+            self.progress[algorithm] = (0, 1)
+            self.scores[algorithm] = None
+            self.jobs[algorithm].put((self.latest.value, position))
+        return True
+
+    """
+    Input: None
+    Description: collect published results for the current position without blocking
+    Output: boolean representing if any suggestion changed
+    """
+    def poll(self):
+        changed = False
+        while True:
+            try:
+                algorithm, job_id, move, score, done, total = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if job_id == self.latest.value:
+                self.suggestions[algorithm] = move
+                self.progress[algorithm] = (done, total)
+                self.scores[algorithm] = score
+                changed = True
+        return changed
+
+    """
+    Input: None
+    Description: stop every worker process
+    Output: None
+    """
+    def close(self):
+        self.latest.value += 1
+        for algorithm in self.settings:
+            self.jobs[algorithm].put(None)
+        for process in self.processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import argparse
+import json
+import os
+import random
+import time
+from chess_engine import Chess, SearchStats, TranspositionTable
+
+"""
+EPD test-suite runner, solve rate of each algorithm against time with positions searched in a process pool
+"""
+
+#Population settings of the anytime evolutionary algorithm and PSO, they run generations until the time is up
+SETTINGS = {'evolutionary': {'population_size': 20},
+            'pso': {'num_particles': 20}}
+
+"""
+Input: path - string representing the EPD file
+Description: stream the records of a test suite, blank lines and lines starting with # are skipped
+Output: generator of (record number, EPD line)
+"""
+def read_suite(path):
+    with open(path) as f:
+        number = 0
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield number, line
+                number += 1
+
+"""
+Input: san - string representing a move in SAN
+Description: strip check, mate and annotation symbols so moves can be compared
+Output: string representing the bare move
+"""
+def bare_san(san):
+    return san.rstrip('+#!?')
+
+"""
+Input: game - Chess object of the test position
+       algorithm - string representing the algorithm to use (Choices=['alpha-beta','evolutionary','pso'])
+       budget - float representing the seconds the search may use
+       max_depth - integer representing the deepest alpha-beta iteration
+Description: anytime search, the best move is recorded every time an iteration or generation finishes, a result
+             that arrives after the budget is discarded for every algorithm alike
+Output: list of (seconds, move) in the order they were found, all within the budget
+"""
+def timed_search(game, algorithm, budget, max_depth):
+    start = time.perf_counter()
+    deadline = start + budget
+    game.stop_search = lambda: time.perf_counter() >= deadline
+    found = []
+    if algorithm == 'alpha-beta':
+        game.tt = TranspositionTable()
+        for depth in range(1, max_depth + 1):
+            _, move = game.alpha_beta(depth, float('-inf'), float('inf'), game.p_move == 1)
+            if time.perf_counter() >= deadline or move == None:
+                break #An iteration cut short is not trusted
+            found.append((time.perf_counter() - start, move))
+    else:
+        def record(stats):
+            now = time.perf_counter()
+            if now < deadline:
+                found.append((now - start, stats.iterations[-1]['move']))
+        stats = SearchStats(callback=record)
+        if algorithm == 'evolutionary':
+            game.evolutionary_algorithm(generations=10 ** 9, stats=stats, **SETTINGS[algorithm])
+        else:
+            game.particle_swarm_optimization(iterations=10 ** 9, stats=stats, **SETTINGS[algorithm])
+    game.stop_search = None
+    return found
+
+"""
+Input: job - tuple of (record number, EPD line, algorithms, budget, max depth, seed)
+Description: run every algorithm on one test position, runs inside a pool worker process
+Output: dictionary containing the record id and, per algorithm, the final move and the time it was solved at (None = unsolved)
+"""
+def solve_position(job):
+    number, line, algorithms, budget, max_depth, seed = job
+    game = Chess(EPD=line, interactive=False)
+    ops = game.EPD_ops
+    best = {bare_san(m) for m in ops.get('bm', [])}
+    avoid = {bare_san(m) for m in ops.get('am', [])}
+    result = {'number': number, 'id': (ops.get('id') or [str(number)])[0], 'algorithms': {}}
+    if not best and not avoid:
+        result['error'] = 'no bm or am operation'
+        return result
+    for algorithm in algorithms:
+        random.seed(seed)
+        found = timed_search(Chess(EPD=line, interactive=False), algorithm, budget, max_depth)
+        solved_at = None
+        move = None
+        for seconds, move in found:
+            san = game.san(*move)
+            correct = san != None and (bare_san(san) in best if best else bare_san(san) not in avoid)
+            if correct and solved_at == None:
+                solved_at = seconds
+            elif not correct:
+                solved_at = None #Only counts if the answer is kept until the end
+        result['algorithms'][algorithm] = {'move': game.san(*move) if move else None, 'solved_at': solved_at}
+    return result
+
+"""
+Input: path - string representing the EPD test suite
+       algorithms - list of algorithm names (Default=all) [OPTIONAL]
+       budget - float representing the seconds each algorithm gets per position (Default=1.0) [OPTIONAL]
+       cutoffs - list of floats representing the times solve rates are reported at (Default=budget fractions) [OPTIONAL]
+       workers - integer representing the size of the process pool (Default=None, one per CPU) [OPTIONAL]
+       max_depth - integer representing the deepest alpha-beta iteration (Default=64) [OPTIONAL]
+       seed - integer, record n is searched with seed + n (Default=0) [OPTIONAL]
+       out - file object per position results are written to as JSON lines (Default=None) [OPTIONAL]
+       progress - function called with each position result (Default=None) [OPTIONAL]
+Description: run a test suite, at most a few positions per worker are in flight so suites of any size stream through in constant memory
+Output: dictionary containing the positions run and, per algorithm, the solved count at every cutoff
+"""
+def run_suite(path, algorithms=None, budget=1.0, cutoffs=None, workers=None, max_depth=64, seed=0, out=None, progress=None):
+    algorithms = ['alpha-beta', 'evolutionary', 'pso'] if algorithms == None else algorithms
+    cutoffs = sorted(cutoffs or [budget * f for f in (0.1, 0.25, 0.5, 1.0)])
+    summary = {'positions': 0, 'errors': 0, 'budget': budget, 'cutoffs': cutoffs,
+               'solved': {a: [0] * len(cutoffs) for a in algorithms}}
+    jobs = ((number, line, algorithms, budget, max_depth, seed + number) for number, line in read_suite(path))
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = workers * 2
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(solve_position, job))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tally(summary, future.result(), out, progress)
+        for future in pending:
+            tally(summary, future.result(), out, progress)
+    return summary
+
+"""
+Input: summary - dictionary being built by run_suite
+       result - dictionary returned by solve_position
+       out - file object for JSON lines or None
+       progress - function or None
+Description: add one position result to the summary
+Output: None
+"""
+def tally(summary, result, out, progress):
+    summary['positions'] += 1
+    if 'error' in result:
+        summary['errors'] += 1
+    for algorithm, r in result['algorithms'].items():
+        if r['solved_at'] != None:
+            for i, cutoff in enumerate(summary['cutoffs']):
+                if r['solved_at'] <= cutoff:
+                    summary['solved'][algorithm][i] += 1
+    if out != None:
+        out.write(json.dumps(result) + '\n')
+    if progress != None:
+        progress(result)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run an EPD test suite (bm/am operations) against the engines')
+    parser.add_argument('suite', help='EPD file, one position per line')
+    parser.add_argument('--algorithms', nargs='+', choices=['alpha-beta', 'evolutionary', 'pso'], default=['alpha-beta', 'evolutionary', 'pso'])
+    parser.add_argument('--time', type=float, default=1.0, help='seconds per position for each algorithm')
+    parser.add_argument('--cutoffs', type=float, nargs='+', help='times to report the solve rate at (default: 10%%, 25%%, 50%%, 100%% of --time)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-depth', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='write per position results to this file as JSON lines')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+
+    def progress(result):
+        if not args.quiet:
+            moves = '  '.join(f"{a} {r['move']}{' ok' if r['solved_at'] != None else ''}" for a, r in result['algorithms'].items())
+            print(f"{result['number']:>6} {result['id']:<20} {result.get('error', moves)}")
+
+    start = time.perf_counter()
+    out = open(args.out, 'w') if args.out else None
+    try:
+        summary = run_suite(args.suite, args.algorithms, args.time, args.cutoffs, args.workers, args.max_depth, args.seed, out, progress)
+    finally:
+        if out != None:
+            out.close()
+    scored = summary['positions'] - summary['errors']
+    print(f"\n{summary['positions']} positions ({summary['errors']} without bm/am) in {time.perf_counter() - start:.1f}s\n")
+    print(f"{'algorithm':<14}" + ''.join(f'{c:>10.2f}s' for c in summary['cutoffs']))
+    for algorithm, solved in summary['solved'].items():
+        print(f'{algorithm:<14}' + ''.join(f'{100 * n / max(scored, 1):>10.1f}%' for n in solved))
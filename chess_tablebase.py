@@ -0,0 +1,485 @@
+from array import array
+from copy import deepcopy
+from itertools import product
+import argparse
+import mmap
+import os
+import sys
+import time
+
+"""
+Endgame tablebases for small material sets (KQK, KRK, KPK and 4 piece sets such as KQKR), made by retrograde analysis
+
+A table holds one signed byte per index, index = ((side to move * 64 + square of piece 0) * 64 + square of piece 1) ...
+with squares y * 8 + x and pieces ordered white king, white pieces (QRBNP), black king, black pieces (QRBNP).
+0 is a draw (or an illegal index), +(d + 1) a win and -(d + 1) a loss for the side to move with mate in d plies.
+Tables hold no castling rights and no en passant, positions where either is possible are not probed, a castling flag
+left over for a king or rook that is no longer on its square is ignored.
+The generator is pure Python, 3 piece tables take under half a minute, 4 piece tables have 64 times the indexes and need
+well over half an hour and about 4 bytes of memory per index (130MB) plus the work queues.
+"""
+
+MAGIC = b'CHESSTB1'
+HEADER_BYTES = 16 #MAGIC + material name padded to 8 bytes
+LETTERS = '.PNBRQK' #Letter by part number
+ORDER = 'KQRBNP' #Order of pieces within a side
+MATE_SCORE = 50000 #Score of mate in 0, a tablebase win in d plies scores MATE_SCORE - d
+CASTLING_SQUARES = [(7, 7), (7, 0), (0, 7), (0, 0)] #Home row and rook file of each castling right K Q k q, kings start on file 4
+
+"""
+Geometry shared by move and un-move generation
+"""
+def _steps(offsets):
+    return [[(y + dy) * 8 + x + dx for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8] for y in range(8) for x in range(8)]
+
+KING_STEPS = _steps([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy])
+KNIGHT_STEPS = _steps([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+ROOK_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+RAYS = {} #(square, direction) to the squares along the ray
+BETWEEN = {} #(part type, from square, to square) to the squares in between, only for squares a slider is lined up with
+for _sq in range(64):
+    for _d in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+        _x, _y, _ray = _sq % 8 + _d[0], _sq // 8 + _d[1], []
+        while 0 <= _x < 8 and 0 <= _y < 8:
+            _ray.append(_y * 8 + _x)
+            _x, _y = _x + _d[0], _y + _d[1]
+        RAYS[(_sq, _d)] = _ray
+        for _i, _to in enumerate(_ray):
+            for _part in ([4, 5] if _d in ROOK_DIRECTIONS else [3, 5]):
+                BETWEEN[(_part, _sq, _to)] = _ray[:_i]
+SLIDER_DIRECTIONS = {3: BISHOP_DIRECTIONS, 4: ROOK_DIRECTIONS, 5: ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+
+"""
+Input: name - string representing the material, e.g. KQK or KRKP
+Description: parts of a material set in table order
+Output: list of integers representing the parts, white positive
+"""
+def parse_material(name):
+    name = name.upper()
+    split = name.find('K', 1)
+    if not name.startswith('K') or split == -1 or 'K' in name[split + 1:] or any(c not in ORDER for c in name):
+        raise ValueError(f'bad material {name}')
+    white, black = name[1:split], name[split + 1:]
+    return [6] + [LETTERS.index(c) for c in sorted(white, key=ORDER.index)] + \
+           [-6] + [-LETTERS.index(c) for c in sorted(black, key=ORDER.index)]
+
+"""
+Input: parts - list of integers representing the parts
+Description: material name of a list of parts
+Output: string representing the material, e.g. KQK
+"""
+def material_name(parts):
+    white = sorted((LETTERS[p] for p in parts if p > 0), key=ORDER.index)
+    black = sorted((LETTERS[-p] for p in parts if p < 0), key=ORDER.index)
+    return ''.join(white) + ''.join(black)
+
+"""
+Input: name - string representing the material
+Description: tables are stored with the stronger side as white, the other orientation is probed by mirroring the board
+Output: string representing the stored material name
+"""
+def canonical_name(name):
+    split = name.find('K', 1)
+    white, black = name[:split], name[split:]
+    strength = lambda side: (-len(side), sorted(ORDER.index(c) for c in side)) #More pieces, then stronger pieces
+    return name if strength(white) <= strength(black) else black + white
+
+"""
+Input: parts - list of integers representing the parts
+Description: check if no side can ever mate, kings with at most one knight or bishop
+Output: boolean representing if the material is a dead draw
+"""
+def insufficient(parts):
+    others = [abs(p) for p in parts if abs(p) != 6]
+    return len(others) == 0 or (len(others) == 1 and others[0] in [2, 3])
+
+"""
+Input: part - integer representing the attacking part
+       start - integer representing the square of the attacker
+       target - integer representing the attacked square
+       squares - sequence of the occupied squares
+Description: check if a part attacks a square
+Output: boolean representing if the square is attacked
+"""
+def attacks(part, start, target, squares):
+    kind = abs(part)
+    if kind == 6:
+        return target in KING_STEPS[start]
+    if kind == 2:
+        return target in KNIGHT_STEPS[start]
+    if kind == 1:
+        return target // 8 == start // 8 - (1 if part > 0 else -1) and abs(target % 8 - start % 8) == 1
+    between = BETWEEN.get((kind, start, target))
+    return between != None and not any(sq in squares for sq in between)
+
+"""
+Input: parts - list of integers representing the parts
+       squares - list of the square of every part
+       color - integer representing the king to check (1 white, -1 black)
+Description: check if a king is attacked
+Output: boolean representing if the king is in check
+"""
+def in_check(parts, squares, color):
+    king = squares[parts.index(6 * color)]
+    return any(p * color < 0 and attacks(p, squares[i], king, squares) for i, p in enumerate(parts))
+
+"""
+Input: parts - list of integers representing the parts
+       squares - list of the square of every part
+       color - integer representing the side to move
+Description: legal moves of a table position
+Output: generator of (parts, squares) after each move, parts is the same list unless the move captured or promoted
+"""
+def successors(parts, squares, color):
+    for i, part in enumerate(parts):
+        if part * color <= 0:
+            continue
+        kind, start = abs(part), squares[i]
+        targets = []
+        if kind == 6 or kind == 2:
+            targets = (KING_STEPS if kind == 6 else KNIGHT_STEPS)[start]
+        elif kind == 1:
+            step = -8 * color
+            one = start + step
+            if one not in squares:
+                targets.append(one)
+                if start // 8 == (6 if color == 1 else 1) and one + step not in squares:
+                    targets.append(one + step)
+            for dx in (-1, 1):
+                if 0 <= start % 8 + dx < 8 and one + dx in squares:
+                    targets.append(one + dx)
+        else:
+            for d in SLIDER_DIRECTIONS[kind]:
+                for sq in RAYS[(start, d)]:
+                    targets.append(sq)
+                    if sq in squares:
+                        break
+        for target in targets:
+            new_parts, new_squares, k = parts, list(squares), i
+            if target in squares:
+                j = squares.index(target)
+                if parts[j] * color > 0:
+                    continue
+                new_parts = parts[:j] + parts[j + 1:]
+                del new_squares[j]
+                k = i if j > i else i - 1
+            new_squares[k] = target
+            if in_check(new_parts, new_squares, color):
+                continue
+            if kind == 1 and target // 8 in (0, 7):
+                for promotion in (5, 4, 3, 2):
+                    promoted = new_parts[:k] + [promotion * color] + new_parts[k + 1:]
+                    yield promoted, new_squares
+            else:
+                yield new_parts, new_squares
+
+"""
+Endgame tablebase files of one directory, tables are memory mapped when first probed
+"""
+class Tablebases:
+    """
+    Input: directory - string representing the directory holding the .tb files
+    Description: Tablebases initail variables
+    Output: None
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {} #Material name to mmap, None when there is no such table
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for f in os.listdir(directory):
+                if f.endswith('.tb'):
+                    self.max_pieces = max(self.max_pieces, len(f) - 3)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    """
+    Input: name - string representing the stored material name
+    Description: memory map of a table
+    Output: mmap object or None if the table does not exist
+    """
+    def table(self, name):
+        if name not in self.tables:
+            path = os.path.join(self.directory, name + '.tb')
+            self.tables[name] = None
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if data[:8] != MAGIC or data[8:HEADER_BYTES].rstrip(b'\0').decode() != name:
+                    data.close()
+                    raise ValueError(f'{path} is not the {name} tablebase')
+                self.tables[name] = data
+        return self.tables[name]
+
+    """
+    Input: parts - list of integers representing the parts
+           squares - list of the square of every part
+           color - integer representing the side to move
+    Description: value of a position from the side to move, the board is mirrored when the table is stored for the other colour
+    Output: integer in the table format (0 draw, +(d + 1) win, -(d + 1) loss in d plies), None if there is no table
+    """
+    def lookup(self, parts, squares, color):
+        if insufficient(parts):
+            return 0
+        name = material_name(parts)
+        if canonical_name(name) != name:
+            parts = [-p for p in parts]
+            squares = [(7 - sq // 8) * 8 + sq % 8 for sq in squares]
+            color = -color
+            name = material_name(parts)
+        data = self.table(name)
+        if data == None:
+            return None
+        key = sorted(range(len(parts)), key=lambda i: (parts[i] < 0, ORDER.index(LETTERS[abs(parts[i])])))
+        index = 0 if color == 1 else 1
+        for i in key:
+            index = index * 64 + squares[i]
+        value = data[HEADER_BYTES + index]
+        return value - 256 if value > 127 else value
+
+    """
+    Input: game - Chess object
+    Description: look a game position up, positions where castling or an en passant capture is possible or with more pieces
+                 than any table are not probed
+    Output: tuple of (wdl, plies to mate) for the side to move (wdl 1 win, 0 draw, -1 loss), None if the position is not covered
+    """
+    def probe(self, game):
+        for right, (y, rook_x) in enumerate(CASTLING_SQUARES):
+            player = 1 if y == 7 else -1
+            if game.castling[right] == 1 and game.board[y][4] == 6 * player and game.board[y][rook_x] == 4 * player:
+                return None #The king and rook are still home, the right can be used
+        if game.en_passant != None:
+            x, y = game.en_passant
+            row = game.board[y + game.p_move]
+            if (x > 0 and row[x - 1] == game.p_move) or (x < 7 and row[x + 1] == game.p_move):
+                return None
+        parts, squares = [], []
+        for y, row in enumerate(game.board):
+            for x, part in enumerate(row):
+                if part != 0:
+                    if len(parts) == self.max_pieces:
+                        return None
+                    parts.append(part)
+                    squares.append(y * 8 + x)
+        if parts.count(6) != 1 or parts.count(-6) != 1:
+            return None
+        value = self.lookup(parts, squares, game.p_move)
+        if value == None:
+            return None
+        return (0, 0) if value == 0 else (1 if value > 0 else -1, abs(value) - 1)
+
+    """
+    Input: game - Chess object
+    Description: search score of a covered position, quicker mates score higher
+    Output: integer representing the score for white, None if the position is not covered
+    """
+    def score(self, game):
+        result = self.probe(game)
+        if result == None:
+            return None
+        wdl, plies = result
+        return 0 if wdl == 0 else wdl * game.p_move * (MATE_SCORE - plies)
+
+    """
+    Input: game - Chess object
+    Description: best move of a covered position, the quickest mate when winning and the longest defence when losing
+    Output: tuple of (current x,y cordinate, next x,y cordinate, promotion part or None), None if the position is not covered
+    """
+    def best_move(self, game):
+        if self.probe(game) == None:
+            return None
+        best, best_score = None, None
+        for start_square, move, n_part in game.order_moves(game.possible_board_moves(), game.p_move):
+            cp = game.board_2_array(start_square)
+            if not game.valid_move(cp, move):
+                continue
+            child = deepcopy(game)
+            child.play(cp, move, n_part)
+            result = self.probe(child)
+            if result == None:
+                continue
+            wdl, plies = result
+            score = 0 if wdl == 0 else -wdl * (MATE_SCORE - plies - 1)
+            if best_score == None or score > best_score:
+                best, best_score = (cp, move, n_part), score
+        return best
+
+    """
+    Input: name - string representing the material, e.g. KQK
+           progress - function called with a status string (Default=None) [OPTIONAL]
+    Description: generate a table and every table it converts into by retrograde analysis and write it to the directory
+    Output: string representing the path of the table
+    """
+    def generate(self, name, progress=None):
+        parts = parse_material(name)
+        name = canonical_name(material_name(parts))
+        parts = parse_material(name)
+        path = os.path.join(self.directory, name + '.tb')
+        if os.path.exists(path):
+            return path
+        for i, part in enumerate(parts): #Tables reached by a capture or promotion first
+            if abs(part) != 6:
+                for sub in [parts[:i] + parts[i + 1:]] + ([parts[:i] + [p * part] + parts[i + 1:] for p in (5, 4, 3, 2)] if abs(part) == 1 else []):
+                    if not insufficient(sub):
+                        self.generate(material_name(sub), progress)
+        os.makedirs(self.directory, exist_ok=True)
+        start = time.perf_counter()
+        values = retrograde(parts, self.lookup, progress and (lambda s: progress(f'{name}: {s}')))
+        with open(path + '.tmp', 'wb') as f:
+            f.write(MAGIC + name.encode().ljust(HEADER_BYTES - len(MAGIC), b'\0'))
+            values.tofile(f)
+        os.replace(path + '.tmp', path)
+        self.tables.pop(name, None)
+        self.max_pieces = max(self.max_pieces, len(parts))
+        if progress != None:
+            progress(f'{name}: written in {time.perf_counter() - start:.1f}s')
+        return path
+
+    """
+    Input: None
+    Description: unmap every table
+    Output: None
+    """
+    def close(self):
+        for data in self.tables.values():
+            if data != None:
+                data.close()
+        self.tables = {}
+
+"""
+Input: parts - list of integers representing the parts in table order
+       lookup - function (parts, squares, side to move) giving the value of positions outside the table
+       progress - function called with a status string (Default=None) [OPTIONAL]
+Description: retrograde analysis, mates are found first and values spread backwards through un-moves one ply at a time
+Output: array of signed bytes in the table format
+"""
+def retrograde(parts, lookup, progress=None):
+    n = len(parts)
+    size = 2 * 64 ** n
+    values = array('b', bytes(size))
+    done = bytearray(size) #Value is final (illegal indexes are done draws)
+    count = bytearray(size) #Moves that do not lose yet, a position is lost when it reaches 0
+    longest = bytearray(size) #1 + longest mate of a move leaving the table into a win for the opponent
+    buckets = {} #Plies to mate to an array of index * 2 + win
+    for index, (side, *squares) in enumerate(product(range(2), *[range(64)] * n)):
+        color = 1 if side == 0 else -1
+        if len(set(squares)) < n or any(abs(p) == 1 and squares[i] // 8 in (0, 7) for i, p in enumerate(parts)) \
+                or in_check(parts, squares, -color):
+            done[index] = 1
+            continue
+        moves, inside, best_win, escape = 0, 0, None, 0
+        for new_parts, new_squares in successors(parts, squares, color):
+            moves += 1
+            if new_parts is parts:
+                inside += 1
+                continue
+            value = lookup(new_parts, new_squares, -color)
+            if value == None:
+                raise ValueError(f'no table for {material_name(new_parts)}')
+            if value < 0:
+                best_win = -value if best_win == None else min(best_win, -value) #Opponent mated in -value - 1, so mate in -value
+            elif value > 0:
+                longest[index] = max(longest[index], value)
+            else:
+                escape = 1
+        if moves == 0:
+            if in_check(parts, squares, color):
+                buckets.setdefault(0, array('q')).append(index * 2)
+            else:
+                done[index] = 1 #Stalemate
+            continue
+        count[index] = inside + escape + (best_win != None) #A winning or drawing exit is never used up
+        if best_win != None:
+            buckets.setdefault(best_win, array('q')).append(index * 2 + 1)
+        elif count[index] == 0:
+            buckets.setdefault(longest[index], array('q')).append(index * 2)
+        if progress != None and index % 100000 == 0:
+            progress(f'{100 * index // size}% initialised')
+    powers = [64 ** (n - 1 - i) for i in range(n)]
+    while buckets:
+        plies = min(buckets)
+        if plies > 126:
+            raise ValueError('mate too long for the table format')
+        for entry in buckets.pop(plies):
+            index, win = entry >> 1, entry & 1
+            if done[index]:
+                continue
+            done[index] = 1
+            values[index] = plies + 1 if win else -(plies + 1)
+            side, rest = divmod(index, 64 ** n)
+            squares = [rest // p % 64 for p in powers]
+            mover = 1 if side == 1 else -1 #Side that made the last move, to move in every predecessor
+            base = (1 - side) * 64 ** n
+            for i, part in enumerate(parts):
+                if part * mover <= 0:
+                    continue
+                for origin in unmove_origins(part, squares[i], squares):
+                    pred = base + index - side * 64 ** n + (origin - squares[i]) * powers[i]
+                    if done[pred]:
+                        continue
+                    if not win:
+                        buckets.setdefault(plies + 1, array('q')).append(pred * 2 + 1)
+                    else:
+                        count[pred] -= 1
+                        if count[pred] == 0:
+                            buckets.setdefault(max(plies + 1, longest[pred]), array('q')).append(pred * 2)
+        if progress != None:
+            progress(f'mate in {plies} plies done')
+    return values
+
+"""
+Input: part - integer representing the part that moved
+       target - integer representing the square it moved to
+       squares - list of the occupied squares
+Description: squares a part could have come from without capturing, the reverse of a quiet move
+Output: list of squares
+"""
+def unmove_origins(part, target, squares):
+    kind = abs(part)
+    if kind == 6 or kind == 2:
+        return [sq for sq in (KING_STEPS if kind == 6 else KNIGHT_STEPS)[target] if sq not in squares]
+    if kind == 1:
+        color = 1 if part > 0 else -1
+        one = target + 8 * color
+        if not 0 <= one < 64 or one // 8 in (0, 7) or one in squares:
+            return []
+        if target // 8 == (4 if color == 1 else 3) and one + 8 * color not in squares:
+            return [one, one + 8 * color]
+        return [one]
+    result = []
+    for d in SLIDER_DIRECTIONS[kind]:
+        for sq in RAYS[(target, d)]:
+            if sq in squares:
+                break
+            result.append(sq)
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate and probe endgame tablebases')
+    parser.add_argument('--directory', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tablebases'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('generate', help='generate tables, with every table they convert into')
+    command.add_argument('materials', nargs='+', help='material names, e.g. KQK KRK KPK')
+    command = commands.add_parser('probe', help='probe a position')
+    command.add_argument('fen')
+    args = parser.parse_args()
+    tablebases = Tablebases(args.directory)
+    if args.command == 'generate':
+        for material in args.materials:
+            print(tablebases.generate(material, lambda s: sys.stderr.write(f'\r{s:<60}')))
+        sys.stderr.write('\n')
+    else:
+        from chess_engine import Chess
+        game = Chess(EPD=args.fen, interactive=False)
+        result = tablebases.probe(game)
+        if result == None:
+            print('not in the tablebases')
+        else:
+            wdl, plies = result
+            print(['loss', 'draw', 'win'][wdl + 1] + (f' (mate in {plies} plies)' if wdl else ''))
+            move = tablebases.best_move(game)
+            if move != None:
+                cp, np, n_part = move
+                print('best move', game.san(f'{game.x[cp[0]]}{game.y[cp[1]]}', f'{game.x[np[0]]}{game.y[np[1]]}', n_part))
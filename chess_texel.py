@@ -0,0 +1,223 @@
+import argparse
+import math
+import sys
+import time
+import numpy as np
+from chess_engine import EVAL_PARAMS_FILE, Chess, save_eval_params
+from chess_selfplay import TrainingData
+
+"""
+Texel tuning of the material values and piece-square tables of evaluate_position against self-play game results
+
+Features are built in bulk from the bit packed planes of chess_selfplay records: 6 material counts (white - black)
+and 6 * 64 piece-square counts with black pieces on the mirrored square, stored sparsely as one entry per piece.
+The evaluation is their dot product with the weights and the win chance is 1 / (1 + 10 ** (-K * eval / 400)),
+K is fitted first and the weights are then fitted with mini-batch Adam on the logistic (cross entropy) loss.
+The result is merged into the file chess_engine loads at import.
+"""
+
+FEATURES = 6 + 6 * 64
+
+"""
+Input: records - NumPy structured array of chess_selfplay.RECORD
+Description: sparse features of the records, one entry per piece, black planes are turned over by reversing their
+             rank bytes and only the set bytes are unpacked so the cost follows the piece count and not the 768 squares
+Output: tuple of NumPy arrays (record row, part kind * 64 + square, +1 for white and -1 for black)
+"""
+def features(records):
+    planes = records['planes'].copy()
+    planes[:, 6:] = planes[:, 6:, ::-1] #Black pieces on the square seen from black
+    planes = planes.reshape(len(records), 96)
+    rows, byte = np.nonzero(planes)
+    hit, bit = np.nonzero(np.unpackbits(planes[rows, byte][:, None], axis=1))
+    rows, byte = rows[hit], byte[hit]
+    plane = byte // 8
+    return rows, plane % 6 * 64 + byte % 8 * 8 + bit, np.where(plane < 6, 1, -1).astype(np.float32)
+
+"""
+Input: sparse - tuple returned by features
+       weights - NumPy array of FEATURES, material values first
+       count - integer representing the number of records
+Description: evaluation for white of every record
+Output: NumPy float64 array of count
+"""
+def evaluate(sparse, weights, count):
+    rows, index, sign = sparse
+    table = np.repeat(weights[:6], 64) + weights[6:] #Value of a part kind on a square, material included
+    return np.bincount(rows, weights=sign * table[index], minlength=count)
+
+"""
+Input: records - NumPy structured array of chess_selfplay.RECORD
+Description: game result for white of the records
+Output: NumPy float32 array, 1 for a win, 0.5 for a draw and 0 for a loss
+"""
+def targets(records):
+    return (records['result'].astype(np.float32) + 1) / 2
+
+"""
+Input: game - Chess object holding the starting values and tables (Default=None, a new game) [OPTIONAL]
+Description: weight vector of a game's evaluation
+Output: NumPy float64 array of FEATURES
+"""
+def initial_weights(game=None):
+    game = Chess(interactive=False) if game == None else game
+    weights = np.zeros(FEATURES)
+    weights[:6] = [game.values[part] for part in range(1, 7)]
+    if game.pst != None:
+        weights[6:] = np.concatenate([game.pst[part] for part in range(1, 7)])
+    return weights
+
+"""
+Input: evals - NumPy array of evaluations for white
+       results - NumPy array of targets
+       k - float representing the scaling constant
+Description: mean cross entropy of the predicted win chance
+Output: float representing the loss
+"""
+def log_loss(evals, results, k):
+    p = np.clip(1 / (1 + np.power(10, -k * evals / 400)), 1e-7, 1 - 1e-7)
+    return float(-np.mean(results * np.log(p) + (1 - results) * np.log(1 - p)))
+
+"""
+Input: records - NumPy structured array (or memmap) of chess_selfplay.RECORD
+       weights - NumPy array of FEATURES
+       k - float representing the scaling constant
+       batch - integer representing the records evaluated at once (Default=65536) [OPTIONAL]
+Description: loss over every record, evaluated in slices so the memory stays bounded
+Output: float representing the mean loss
+"""
+def dataset_loss(records, weights, k, batch=65536):
+    total = 0
+    for start in range(0, len(records), batch):
+        chunk = records[start:start + batch]
+        total += log_loss(evaluate(features(chunk), weights, len(chunk)), targets(chunk), k) * len(chunk)
+    return total / max(len(records), 1)
+
+"""
+Input: records - NumPy structured array of chess_selfplay.RECORD
+       weights - NumPy array of FEATURES
+       low - float representing the smallest K tried (Default=0.1) [OPTIONAL]
+       high - float representing the largest K tried (Default=4) [OPTIONAL]
+Description: golden section search for the K that fits the weights best, the loss is convex in K
+Output: float representing K
+"""
+def fit_k(records, weights, low=0.1, high=4):
+    evals = np.concatenate([evaluate(features(records[s:s + 65536]), weights, len(records[s:s + 65536]))
+                            for s in range(0, len(records), 65536)])
+    results = targets(records)
+    ratio = (math.sqrt(5) - 1) / 2
+    a, b = low, high
+    for _ in range(40):
+        c, d = b - ratio * (b - a), a + ratio * (b - a)
+        if log_loss(evals, results, c) < log_loss(evals, results, d):
+            b = d
+        else:
+            a = c
+    return (a + b) / 2
+
+"""
+Input: weights - NumPy array of FEATURES
+Description: move the mean of every piece-square table into the material value, the two are interchangeable for the
+             loss so this only makes the tables readable, the king value is kept since both sides always have one
+Output: dictionary containing values and pst as written by export
+"""
+def weights_params(weights):
+    values = weights[:6].copy()
+    pst = weights[6:].reshape(6, 64).copy()
+    for i in range(6):
+        squares = slice(8, 56) if i == 0 else slice(0, 64) #Pawns never stand on the first or last rank
+        mean = pst[i, squares].mean()
+        pst[i, squares] -= mean
+        if i < 5:
+            values[i] += mean
+    return {'values': {part: int(round(values[part - 1])) for part in range(1, 7)},
+            'pst': {part: [int(round(v)) for v in pst[part - 1]] for part in range(1, 7)}}
+
+"""
+Input: path - string representing the parameter file
+       weights - NumPy array of FEATURES
+       info - dictionary of extra fields to record with the parameters (Default=None) [OPTIONAL]
+Description: write tuned parameters in the format chess_engine.load_eval_params reads, merged into an existing file
+             so settings texel tuning does not fit (the delta_margin of chess_tune) are kept
+Output: None
+"""
+def export(path, weights, info=None):
+    params = weights_params(weights)
+    params.update(info or {})
+    save_eval_params(path, params)
+
+"""
+Input: path - string representing the training data written by chess_selfplay
+       epochs - integer representing the passes over the training records (Default=3) [OPTIONAL]
+       batch - integer representing the records per gradient step (Default=16384) [OPTIONAL]
+       learning_rate - float representing the Adam step size in centipawns (Default=1.0) [OPTIONAL]
+       k - float representing the scaling constant (Default=None, fitted to the starting weights) [OPTIONAL]
+       validation - float representing the share of records held out to measure the loss (Default=0.05) [OPTIONAL]
+       seed - integer seeding the shuffle (Default=0) [OPTIONAL]
+       progress - function called with (epoch, records done, seconds) every 64 steps (Default=None) [OPTIONAL]
+Description: fit the evaluation weights, records are read from the memmap in shuffled blocks of 16 batches
+             and shuffled again within the block, so only a block is ever in memory
+Output: dictionary containing the weights, K, loss by epoch and records per second
+"""
+def tune(path, epochs=3, batch=16384, learning_rate=1.0, k=None, validation=0.05, seed=0, progress=None):
+    records = TrainingData(path, mode='r').data()
+    split = len(records) - int(len(records) * validation)
+    train, held_out = records[:split], records[split:]
+    if split == 0:
+        raise ValueError(f'{path} holds no training records')
+    weights = initial_weights()
+    k = fit_k(train[:1000000], weights) if k == None else k
+    rng = np.random.default_rng(seed)
+    moment, velocity = np.zeros(FEATURES), np.zeros(FEATURES)
+    beta1, beta2, step = 0.9, 0.999, 0
+    scale = k * math.log(10) / 400 #d(win chance)/d(eval) = scale * p * (1 - p)
+    block = batch * 16
+    history = [{'epoch': 0, 'train': dataset_loss(train, weights, k), 'validation': dataset_loss(held_out, weights, k) if len(held_out) else None}]
+    start = time.perf_counter()
+    done = 0
+    for epoch in range(1, epochs + 1):
+        for block_start in rng.permutation(range(0, split, block)):
+            chunk = train[block_start:block_start + block]
+            chunk = chunk[rng.permutation(len(chunk))]
+            for s in range(0, len(chunk), batch):
+                sparse, y = features(chunk[s:s + batch]), targets(chunk[s:s + batch])
+                p = 1 / (1 + np.exp(-scale * evaluate(sparse, weights, len(y))))
+                rows, index, sign = sparse
+                square_gradient = np.bincount(index, weights=sign * (p - y)[rows], minlength=6 * 64) * scale / len(y) #Cross entropy through the sigmoid
+                gradient = np.concatenate([square_gradient.reshape(6, 64).sum(axis=1), square_gradient])
+                gradient[5] = 0 #Kings are never captured, keep their value
+                step += 1
+                moment = beta1 * moment + (1 - beta1) * gradient
+                velocity = beta2 * velocity + (1 - beta2) * gradient ** 2
+                weights -= learning_rate * (moment / (1 - beta1 ** step)) / (np.sqrt(velocity / (1 - beta2 ** step)) + 1e-12)
+                done += len(y)
+                if progress != None and step % 64 == 0:
+                    progress(epoch, done, time.perf_counter() - start)
+        history.append({'epoch': epoch, 'train': dataset_loss(train, weights, k),
+                        'validation': dataset_loss(held_out, weights, k) if len(held_out) else None})
+    seconds = time.perf_counter() - start
+    return {'weights': weights, 'k': k, 'history': history, 'records_per_second': done / max(seconds, 1e-9)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune material values and piece-square tables on self-play data')
+    parser.add_argument('data', help='training data written by chess_selfplay')
+    parser.add_argument('--output', default=EVAL_PARAMS_FILE, help='parameter file (default: the file chess_engine loads)')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch', type=int, default=16384)
+    parser.add_argument('--learning-rate', type=float, default=1.0)
+    parser.add_argument('--k', type=float, default=None, help='scaling constant (default: fitted)')
+    parser.add_argument('--validation', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    def progress(epoch, done, seconds):
+        sys.stderr.write(f'\repoch {epoch}: {done} records, {done / max(seconds, 1e-9):.0f} records/s')
+
+    result = tune(args.data, args.epochs, args.batch, args.learning_rate, args.k, args.validation, args.seed, progress)
+    sys.stderr.write('\n')
+    print(f"K = {result['k']:.3f}, {result['records_per_second']:.0f} records/s")
+    for entry in result['history']:
+        validation = '-' if entry['validation'] == None else f"{entry['validation']:.5f}"
+        print(f"epoch {entry['epoch']}: train loss {entry['train']:.5f}, validation loss {validation}")
+    export(args.output, result['weights'], {'k': result['k'], 'history': result['history']})
+    print(f"values {weights_params(result['weights'])['values']} written to {args.output}")
@@ -0,0 +1,243 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from chess_archive import GameArchive
+from chess_book import OpeningBook
+from chess_engine import Chess, Position
+from chess_islands import island_search
+
+"""
+Headless tournament runner comparing Alpha-Beta pruning, the Evolutionary Algorithm, PSO and the island model
+"""
+
+#Starting positions, every pairing plays each one with both colours
+OPENINGS = ['rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -', #Start position
+            'rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq -', #Open game
+            'rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq -', #Sicilian
+            'rnbqkbnr/ppp2ppp/4p3/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq -', #French
+            'rnbqkbnr/pp1ppppp/2p5/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq -', #Caro-Kann
+            'r1bqk1nr/pppp1ppp/2n5/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq -', #Italian
+            'rnbqkbnr/ppp2ppp/4p3/3p4/2PP4/8/PP2PPPP/RNBQKBNR w KQkq -', #Queen's gambit declined
+            'rnbqkb1r/pppppp1p/5np1/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq -'] #King's indian
+
+#Search settings used for each algorithm
+ALGORITHMS = {'alpha-beta': {'depth': 2},
+              'evolutionary': {'population_size': 10, 'generations': 3},
+              'pso': {'num_particles': 10, 'iterations': 5},
+              'islands': {'islands': 4, 'population_size': 10, 'generations': 6}}
+DEFAULT_ALGORITHMS = ['alpha-beta', 'evolutionary', 'pso'] #Islands are opt-in, every island search starts its own processes
+#Keyword argument a single search budget (depth, generations or iterations) is passed as for each algorithm
+BUDGETS = {'alpha-beta': 'depth', 'evolutionary': 'generations', 'pso': 'iterations'}
+
+"""
+Input: game - Chess object to search
+       algorithm - string representing the algorithm to use (Choices=['alpha-beta','evolutionary','pso','islands'])
+       options - dictionary containing the keyword arguments passed to the algorithm (Default=None) [OPTIONAL]
+Description: ask an algorithm for a move in the current position
+Output: tuple representing the move, ("No move", "No move") if there is none
+"""
+def engine_move(game, algorithm, options=None):
+    options = ALGORITHMS[algorithm] if options == None else options
+    if algorithm == 'alpha-beta':
+        return game.get_alpha_beta_move(**options)
+    elif algorithm == 'evolutionary':
+        return game.evolutionary_algorithm(**options)
+    elif algorithm == 'pso':
+        return game.particle_swarm_optimization(**options)
+    elif algorithm == 'islands':
+        return island_search(game, **options)
+    raise ValueError(f'Unknown algorithm {algorithm}')
+
+"""
+Input: job - tuple of (game id, white algorithm, black algorithm, opening EPD, max plies, options, seed, opening book path or None)
+Description: play one headless game between two algorithms, a game that reaches max plies is adjudicated a draw
+             and a side that cannot produce a legal move while the game is not over loses
+Output: dictionary containing the game result, the moves played and the time each algorithm spent per move
+"""
+def play_game(job):
+    game_id, white, black, opening, max_plies, options, seed, book = job
+    random.seed(seed)
+    game = Chess(EPD=opening, interactive=False)
+    if book != None:
+        game.book = OpeningBook(book)
+    latency = {white: [], black: []}
+    plies = 0
+    state = game.is_end()
+    while sum(state) == 0 and plies < max_plies:
+        algorithm = white if game.p_move == 1 else black
+        start = time.perf_counter()
+        move = engine_move(game, algorithm, options.get(algorithm))
+        latency[algorithm].append(time.perf_counter() - start)
+        if move == ("No move", "No move") or not game.move(*move):
+            state = [0, 0, 1] if game.p_move == 1 else [1, 0, 0] #Forfeit
+            break
+        plies += 1
+        state = game.is_end()
+    if game.book != None:
+        game.book.close()
+    if state == [1, 0, 0]:
+        result = '1-0'
+    elif state == [0, 0, 1]:
+        result = '0-1'
+    else:
+        result = '1/2-1/2'
+    return {'id': game_id, 'white': white, 'black': black, 'opening': opening,
+            'result': result, 'plies': plies, 'moves': game.move_list, 'latency': latency}
+
+"""
+Input: wins - integer representing the games won
+       draws - integer representing the games drawn
+       losses - integer representing the games lost
+Description: estimate the Elo difference from a match score with a 95% confidence interval
+Output: tuple of (elo difference, error margin), infinite when the score is 0% or 100%
+"""
+def elo_estimate(wins, draws, losses):
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, float('inf')
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+
+    def elo(p):
+        if p <= 0:
+            return float('-inf')
+        if p >= 1:
+            return float('inf')
+        return -400 * math.log10(1 / p - 1)
+
+    diff = elo(score)
+    if math.isinf(diff):
+        return diff, float('inf')
+    return diff, (elo(min(score + margin, 1)) - elo(max(score - margin, 0))) / 2
+
+"""
+Input: values - list of numbers
+       percent - number between 0 and 100
+Description: nearest rank percentile of a list of numbers
+Output: number representing the percentile or None if the list is empty
+"""
+def percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+"""
+Input: games - list of game dictionaries returned by play_game
+Description: tally win/draw/loss and Elo per pairing and move latency percentiles per algorithm
+Output: dictionary containing the tournament summary
+"""
+def summarize(games):
+    pairings = {}
+    latency = {}
+    for g in games:
+        for algorithm, times in g['latency'].items():
+            latency.setdefault(algorithm, []).extend(times)
+        a, b = sorted([g['white'], g['black']])
+        wdl = pairings.setdefault(f'{a} vs {b}', [0, 0, 0]) #Wins, draws, losses of a
+        if g['result'] == '1/2-1/2':
+            wdl[1] += 1
+        elif (g['result'] == '1-0') == (g['white'] == a):
+            wdl[0] += 1
+        else:
+            wdl[2] += 1
+    summary = {'games': len(games), 'pairings': {}, 'latency': {}}
+    for pairing, (w, d, l) in pairings.items():
+        diff, margin = elo_estimate(w, d, l)
+        summary['pairings'][pairing] = {'wins': w, 'draws': d, 'losses': l,
+                                        'elo': round(diff, 1) + 0.0, 'error': round(margin, 1)}
+    for algorithm, times in latency.items():
+        summary['latency'][algorithm] = {'moves': len(times),
+                                         'p50': percentile(times, 50),
+                                         'p90': percentile(times, 90),
+                                         'p99': percentile(times, 99),
+                                         'max': max(times) if times else None}
+    return summary
+
+"""
+Input: algorithms - list of algorithm names taking part (Default=DEFAULT_ALGORITHMS) [OPTIONAL]
+       openings - list of EPD strings to start games from (Default=OPENINGS) [OPTIONAL]
+       rounds - integer representing how many times each opening is played per colour (Default=1) [OPTIONAL]
+       workers - integer representing the size of the process pool (Default=None, one per CPU, divided by the island
+                 count when islands take part) [OPTIONAL]
+       max_plies - integer representing the ply count where a game is adjudicated a draw (Default=200) [OPTIONAL]
+       options - dictionary of algorithm name to keyword arguments overriding ALGORITHMS (Default=None) [OPTIONAL]
+       seed - integer used to seed every game so runs are repeatable (Default=0) [OPTIONAL]
+       out - string representing the path of the results file (Default=None, not written) [OPTIONAL]
+       archive - string representing a game archive every game is appended to (Default=None, not stored) [OPTIONAL]
+       book - string representing a Polyglot opening book both sides play from (Default=None, no book) [OPTIONAL]
+       progress - function called with each finished game (Default=None) [OPTIONAL]
+Description: play every pair of algorithms against each other concurrently in a process pool
+Output: dictionary containing the games and the tournament summary
+"""
+def run_tournament(algorithms=None, openings=None, rounds=1, workers=None, max_plies=200, options=None, seed=0, out=None, archive=None, book=None, progress=None):
+    algorithms = list(DEFAULT_ALGORITHMS) if algorithms == None else algorithms
+    openings = OPENINGS if openings == None else openings
+    settings = {a: dict(ALGORITHMS[a], **(options or {}).get(a, {})) for a in algorithms}
+    if workers == None and 'islands' in settings: #A game of the island model runs one process per island
+        workers = max(1, (os.cpu_count() or 1) // settings['islands'].get('islands', 4))
+    jobs = []
+    for a, b in itertools.combinations(algorithms, 2):
+        for _ in range(rounds):
+            for opening in openings:
+                for white, black in [(a, b), (b, a)]:
+                    jobs.append((len(jobs), white, black, opening, max_plies, settings, seed + len(jobs), book))
+    games = []
+    store = GameArchive(archive, 'a') if archive != None else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(play_game, job) for job in jobs]):
+            games.append(future.result())
+            g = games[-1]
+            if store != None:
+                store.extend([(Position.from_fen(g['opening']), g.pop('moves'), g['result'],
+                               {'White': g['white'], 'Black': g['black'], 'Round': g['id']})])
+            else:
+                del g['moves']
+            if progress != None:
+                progress(g)
+    if store != None:
+        store.close()
+    games.sort(key=lambda g: g['id'])
+    results = {'settings': settings, 'summary': summarize(games),
+               'games': [[g['white'], g['black'], openings.index(g['opening']), g['result'], g['plies']] for g in games]}
+    if out != None:
+        with open(out, 'w') as f:
+            json.dump(results, f, separators=(',', ':'))
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Play Alpha-Beta, Evolutionary, PSO and island model engines against each other')
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=DEFAULT_ALGORITHMS,
+                        help='islands is opt-in, it starts a process per island on top of the pool')
+    parser.add_argument('--openings', help='file with one EPD/FEN opening per line (default: built in set)')
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-plies', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=ALGORITHMS['alpha-beta']['depth'], help='alpha-beta search depth')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='tournament_results.json')
+    parser.add_argument('--archive', help='append every game to this binary game archive')
+    parser.add_argument('--book', help='Polyglot opening book played from before searching')
+    args = parser.parse_args()
+    openings = None
+    if args.openings:
+        with open(args.openings) as f:
+            openings = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    results = run_tournament(algorithms=args.algorithms, openings=openings, rounds=args.rounds, workers=args.workers,
+                             max_plies=args.max_plies, options={'alpha-beta': {'depth': args.depth}}, seed=args.seed,
+                             out=args.out, archive=args.archive, book=args.book, progress=lambda g: print(f"game {g['id']}: {g['white']} - {g['black']} {g['result']} ({g['plies']} plies)"))
+    summary = results['summary']
+    print(f"\n{summary['games']} games\n")
+    for pairing, r in summary['pairings'].items():
+        print(f"{pairing}: +{r['wins']} ={r['draws']} -{r['losses']}  Elo {r['elo']:+.1f} +/- {r['error']:.1f}")
+    print('\nMove latency (seconds):')
+    for algorithm, r in summary['latency'].items():
+        if r['moves'] > 0:
+            print(f"{algorithm}: p50 {r['p50']:.3f}  p90 {r['p90']:.3f}  p99 {r['p99']:.3f}  max {r['max']:.3f}  ({r['moves']} moves)")
+    print(f'\nResults written to {args.out}')
@@ -0,0 +1,281 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import argparse
+import json
+import math
+import os
+import random
+import time
+from chess_engine import EVAL_PARAMS_FILE, Chess, save_eval_params
+from chess_selfplay import legal_moves
+from chess_tournament import OPENINGS, elo_estimate
+
+"""
+Evolutionary tuning of engine parameters, candidates play short fixed depth matches against the current champion
+
+Every generation mutates and recombines the best candidates, all matches run at the same time in one process pool
+and each match is stopped as soon as a sequential probability ratio test (SPRT) accepts or rejects the candidate.
+The fixed depth search is deterministic, every game pair starts with seeded random moves so no game is a replay.
+The strongest accepted candidate becomes the next champion.
+"""
+
+#Tuned parameters with their bounds, material values by part number and the quiescence delta pruning margin (None = off)
+PARAMETERS = {'pawn': (50, 150), 'knight': (200, 450), 'bishop': (200, 450), 'rook': (350, 700), 'queen': (700, 1200),
+              'delta_margin': (0, 500)}
+PARTS = {'pawn': 1, 'knight': 2, 'bishop': 3, 'rook': 4, 'queen': 5}
+
+"""
+Input: game - Chess object holding the starting values (Default=None, a new game) [OPTIONAL]
+Description: parameter set of a game's evaluation and search settings, a setting that is off stays None
+Output: dictionary of parameter name to integer or None
+"""
+def initial_params(game=None):
+    game = Chess(interactive=False) if game == None else game
+    params = {name: game.values[part] for name, part in PARTS.items()}
+    params['delta_margin'] = game.delta_margin
+    return params
+
+"""
+Input: game - Chess object
+       params - dictionary of parameter name to integer
+Description: set a parameter set on a game, parts not tuned keep their value
+Output: None
+"""
+def apply_params(game, params):
+    game.values = dict(game.values)
+    game.values.update({part: params[name] for name, part in PARTS.items()})
+    game.delta_margin = params['delta_margin']
+
+"""
+Input: parents - list of parameter sets
+       sigma - float representing the mutation step as a share of each parameter's range
+       rng - random.Random object
+Description: uniform crossover of the parents followed by a gaussian mutation of every parameter, clamped to its bounds,
+             a parameter that is off in the chosen parent is switched on at a random value with a chance of sigma
+Output: dictionary of parameter name to integer or None
+"""
+def offspring(parents, sigma, rng):
+    child = {}
+    for name, (low, high) in PARAMETERS.items():
+        value = rng.choice(parents)[name]
+        if value == None:
+            child[name] = rng.randint(low, high) if rng.random() < sigma else None
+            continue
+        value += rng.gauss(0, sigma * (high - low))
+        child[name] = int(round(min(high, max(low, value))))
+    return child
+
+"""
+Input: wins - integer representing the games won
+       draws - integer representing the games drawn
+       losses - integer representing the games lost
+       elo0 - float representing the Elo gain of the null hypothesis
+       elo1 - float representing the Elo gain of the alternative hypothesis
+Description: log likelihood ratio of the match with the normal approximation of the game score, while every game has
+             the same result the variance is 0 and one win and one loss are added as a prior, so a candidate winning
+             every game is still accepted
+Output: float representing the LLR
+"""
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0
+    if wins == games or draws == games or losses == games:
+        wins, losses, games = wins + 1, losses + 1, games + 2
+    score = (wins + 0.5 * draws) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    s0, s1 = 1 / (1 + 10 ** (-elo0 / 400)), 1 / (1 + 10 ** (-elo1 / 400))
+    return games * (s1 - s0) * (2 * score - s0 - s1) / (2 * variance)
+
+"""
+Input: opening - string representing the opening EPD
+       random_plies - integer representing the random moves played from the opening
+       seed - integer seeding the random moves
+Description: starting position of a game pair, the fixed depth search has no randomness so the random moves are
+             what makes the pairs of a match differ once the openings repeat
+Output: Chess object
+"""
+def match_opening(opening, random_plies, seed):
+    rng = random.Random(seed)
+    game = Chess(EPD=opening, interactive=False)
+    for _ in range(random_plies):
+        moves = legal_moves(game)
+        if not moves:
+            break
+        game.move(*rng.choice(moves))
+    return game
+
+"""
+Input: job - tuple of (candidate number, white parameters, black parameters, opening EPD, depth, max plies, random plies, seed)
+Description: play one fixed depth game between two parameter sets from the opening of match_opening, both games of a
+             pair get the same seed, a game that reaches max plies is adjudicated a draw
+Output: tuple of (candidate number, score for white 1, 0.5 or 0)
+"""
+def play_match_game(job):
+    candidate, white, black, opening, depth, max_plies, random_plies, seed = job
+    game = match_opening(opening, random_plies, seed)
+    plies = 0
+    state = game.is_end()
+    while sum(state) == 0 and plies < max_plies:
+        apply_params(game, white if game.p_move == 1 else black)
+        move = game.get_alpha_beta_move(depth=depth, quiescence=True)
+        if move == ("No move", "No move") or not game.move(*move):
+            state = [0, 0, 1] if game.p_move == 1 else [1, 0, 0] #Forfeit
+            break
+        plies += 1
+        state = game.is_end()
+    return candidate, 1 if state == [1, 0, 0] else 0 if state == [0, 0, 1] else 0.5
+
+"""
+Input: champion - dictionary of parameter name to integer
+       candidates - list of parameter sets
+       pool - ProcessPoolExecutor
+       workers - integer representing the size of the pool
+       depth - integer representing the search depth of every move
+       max_plies - integer representing the ply count where a game is adjudicated a draw
+       random_plies - integer representing the random moves played from the opening of every game pair
+       max_games - integer representing the match length when the SPRT does not decide, at most 2 * len(OPENINGS) without random moves
+       elo0 - float representing the Elo gain of the null hypothesis
+       elo1 - float representing the Elo gain of the alternative hypothesis
+       alpha - float representing the false positive rate
+       beta - float representing the false negative rate
+       seed - integer, game seeds are derived from it
+Description: play every candidate against the champion at once, games come in pairs from one opening and the same
+             random moves with colours reversed, two games per worker are queued and a decided match has its queued games cancelled
+Output: list of dictionaries containing the wins, draws, losses, LLR, Elo estimate and decision of each candidate
+"""
+def run_matches(champion, candidates, pool, workers, depth, max_plies, random_plies, max_games, elo0, elo1, alpha, beta, seed):
+    lower, upper = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+    if random_plies == 0: #Without random moves the games replay once the openings repeat
+        max_games = min(max_games, 2 * len(OPENINGS))
+    matches = [{'wins': 0, 'draws': 0, 'losses': 0, 'llr': 0.0, 'decision': None, 'submitted': 0} for _ in candidates]
+    pending = {} #Future to (candidate number, candidate plays white)
+    while True:
+        while len(pending) < workers * 2:
+            open_matches = [i for i, m in enumerate(matches) if m['decision'] == None and m['submitted'] < max_games]
+            if not open_matches:
+                break
+            i = min(open_matches, key=lambda i: matches[i]['submitted']) #Spread the pool over the undecided matches
+            n = matches[i]['submitted']
+            white, black = (candidates[i], champion) if n % 2 == 0 else (champion, candidates[i])
+            job = (i, white, black, OPENINGS[n // 2 % len(OPENINGS)], depth, max_plies, random_plies, seed + i * max_games + n // 2)
+            pending[pool.submit(play_match_game, job)] = (i, n % 2 == 0)
+            matches[i]['submitted'] += 1
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            i, candidate_white = pending.pop(future)
+            m = matches[i]
+            if future.cancelled() or m['decision'] != None:
+                continue
+            _, score = future.result()
+            score = score if candidate_white else 1 - score
+            m['wins' if score == 1 else 'losses' if score == 0 else 'draws'] += 1
+            m['llr'] = sprt_llr(m['wins'], m['draws'], m['losses'], elo0, elo1)
+            if m['llr'] >= upper:
+                m['decision'] = 'accepted'
+            elif m['llr'] <= lower:
+                m['decision'] = 'rejected'
+            if m['decision'] != None:
+                for other, (j, _) in list(pending.items()):
+                    if j == i and other.cancel():
+                        del pending[other]
+    results = []
+    for m in matches:
+        elo, error = elo_estimate(m['wins'], m['draws'], m['losses'])
+        results.append({'wins': m['wins'], 'draws': m['draws'], 'losses': m['losses'], 'llr': round(m['llr'], 3),
+                        'elo': elo, 'error': error, 'decision': m['decision'] or 'inconclusive'})
+    return results
+
+"""
+Input: champion - dictionary of parameter name to integer
+       path - string representing the parameter file
+Description: merge a parameter set into the file chess_engine.load_eval_params reads, only the tuned material values
+             and delta margin are written so the king value and piece-square tables from chess_texel are kept
+Output: None
+"""
+def export(champion, path):
+    values = {part: champion[name] for name, part in PARTS.items()}
+    values[6] = Chess(interactive=False).values[6] #Never tuned, written so a new file still holds every part
+    save_eval_params(path, {'values': values, 'delta_margin': champion['delta_margin']})
+
+"""
+Input: generations - integer representing the generations to run (Default=10) [OPTIONAL]
+       population - integer representing the candidates per generation (Default=6) [OPTIONAL]
+       depth - integer representing the search depth of every move (Default=1) [OPTIONAL]
+       max_plies - integer representing the ply count where a game is adjudicated a draw (Default=120) [OPTIONAL]
+       random_plies - integer representing the random moves played from the opening of every game pair, with 0 a match
+                      has only 2 * len(OPENINGS) different games (Default=4) [OPTIONAL]
+       max_games - integer representing the match length when the SPRT does not decide (Default=200) [OPTIONAL]
+       elo0 - float representing the Elo gain of the null hypothesis (Default=0) [OPTIONAL]
+       elo1 - float representing the Elo gain of the alternative hypothesis (Default=50) [OPTIONAL]
+       alpha - float representing the false positive rate (Default=0.05) [OPTIONAL]
+       beta - float representing the false negative rate (Default=0.05) [OPTIONAL]
+       sigma - float representing the mutation step as a share of each parameter's range (Default=0.1) [OPTIONAL]
+       workers - integer representing the size of the process pool (Default=None, one per CPU) [OPTIONAL]
+       seed - integer seeding the mutations and the games (Default=0) [OPTIONAL]
+       log - string representing a file that gets one JSON line per generation (Default=None) [OPTIONAL]
+       output - string representing the parameter file written whenever the champion changes, never when no candidate was promoted (Default=None) [OPTIONAL]
+       progress - function called with the log entry of every generation (Default=None) [OPTIONAL]
+Description: evolve the parameters, parents are the champion and the candidates of the last generation that scored
+             best against it, the strongest accepted candidate becomes the champion
+Output: dictionary of parameter name to integer representing the final champion
+"""
+def evolve(generations=10, population=6, depth=1, max_plies=120, random_plies=4, max_games=200, elo0=0, elo1=50, alpha=0.05, beta=0.05,
+           sigma=0.1, workers=None, seed=0, log=None, output=None, progress=None):
+    rng = random.Random(seed)
+    workers = workers or os.cpu_count() or 1
+    champion = initial_params()
+    parents = [champion]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for generation in range(1, generations + 1):
+            start = time.perf_counter()
+            candidates = [offspring(parents, sigma, rng) for _ in range(population)]
+            results = run_matches(champion, candidates, pool, workers, depth, max_plies, random_plies, max_games, elo0, elo1, alpha, beta,
+                                  seed + generation * population * max_games)
+            ranked = sorted(zip(candidates, results), key=lambda c: -c[1]['elo'])
+            accepted = [c for c, r in ranked if r['decision'] == 'accepted']
+            previous = champion
+            if accepted:
+                champion = accepted[0]
+                if output != None:
+                    export(champion, output)
+            parents = [champion] + [c for c, r in ranked[:max(1, population // 2)] if c is not champion]
+            entry = {'generation': generation, 'champion': champion, 'promoted': champion is not previous,
+                     'games': sum(r['wins'] + r['draws'] + r['losses'] for r in results),
+                     'seconds': round(time.perf_counter() - start, 2),
+                     'candidates': [dict(r, params=c) for c, r in zip(candidates, results)]}
+            if log != None:
+                with open(log, 'a') as f:
+                    f.write(json.dumps(entry) + '\n')
+            if progress != None:
+                progress(entry)
+    return champion
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evolve evaluation and search parameters with self-play matches')
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--population', type=int, default=6)
+    parser.add_argument('--depth', type=int, default=1, help='alpha-beta search depth of every move')
+    parser.add_argument('--max-plies', type=int, default=120)
+    parser.add_argument('--random-plies', type=int, default=4, help='random moves from the opening of every game pair')
+    parser.add_argument('--max-games', type=int, default=200, help='match length when the SPRT does not decide')
+    parser.add_argument('--elo0', type=float, default=0)
+    parser.add_argument('--elo1', type=float, default=50)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--sigma', type=float, default=0.1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log', default='tune_log.jsonl', help='one JSON line per generation')
+    parser.add_argument('--output', default=EVAL_PARAMS_FILE, help='best parameters (default: the file chess_engine loads)')
+    args = parser.parse_args()
+
+    def progress(entry):
+        decisions = ' '.join(f"{c['decision'][0]}{c['elo']:+.0f}" for c in entry['candidates'])
+        print(f"generation {entry['generation']}: {entry['games']} games in {entry['seconds']:.0f}s [{decisions}]"
+              f"{' new champion' if entry['promoted'] else ''} {entry['champion']}")
+
+    champion = evolve(args.generations, args.population, args.depth, args.max_plies, args.random_plies, args.max_games, args.elo0, args.elo1,
+                      args.alpha, args.beta, args.sigma, args.workers, args.seed, args.log, args.output, progress)
+    print(f"Best parameters {champion}, {'written to ' + args.output if champion != initial_params() else 'no candidate was promoted, nothing written'}")
@@ -0,0 +1,311 @@
+import sys
+import threading
+import time
+from chess_book import OpeningBook
+from chess_engine import MATE_SCORE, Chess, SearchStats, TranspositionTable
+from chess_islands import island_search
+from chess_tablebase import Tablebases
+
+"""
+UCI (Universal Chess Interface) front end so the engine can run under standard match managers
+"""
+class UCI:
+    """
+    Input: output - file object the protocol is written to (Default=sys.stdout) [OPTIONAL]
+    Description: UCI initail variables
+    Output: None
+    """
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.out_lock = threading.Lock() #Search thread and stdin thread both write
+        self.game = Chess(interactive=False)
+        self.options = {'Hash': 16, 'Threads': 1, 'Algorithm': 'alphabeta', 'OwnBook': False, 'BookFile': '', 'TablebasePath': ''}
+        self.book = None #OpeningBook of BookFile
+        self.tablebase = None #Tablebases of TablebasePath
+        self.tt = TranspositionTable(max_entries=float('inf'), max_bytes=self.options['Hash'] << 20) #Kept between moves so a ponder search is reused
+        self.search_thread = None
+        self.stop_event = threading.Event() #Set by stop/quit, checked once per search node
+        self.ponderhit_event = threading.Event() #Set by ponderhit or stop while pondering
+        self.pondering = False
+        self.deadline = None #perf_counter time the search must finish by (None = no limit)
+        self.time_budget = None #Seconds allotted for the move, the deadline starts on ponderhit when pondering
+        self.node_limit = None
+        self.stats = None #SearchStats of the running search, the node limit is checked against its count
+
+    """
+    Input: line - string representing the line to send to the GUI
+    Description: write one protocol line and flush
+    Output: None
+    """
+    def send(self, line):
+        with self.out_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    """
+    Input: None
+    Description: read commands from stdin until quit, searches run on their own thread so stop is handled at once
+    Output: None
+    """
+    def loop(self):
+        for line in sys.stdin:
+            if self.command(line) == False:
+                break
+
+    """
+    Input: line - string representing one command from the GUI
+    Description: handle one UCI command
+    Output: boolean, False when the engine should quit
+    """
+    def command(self, line):
+        tokens = line.split()
+        if not tokens:
+            return True
+        cmd = tokens[0]
+        if cmd == 'uci':
+            self.send('id name Chess-Engine')
+            self.send('id author Musab Suhail')
+            self.send(f"option name Hash type spin default {self.options['Hash']} min 1 max 4096")
+            self.send(f"option name Threads type spin default {self.options['Threads']} min 1 max 64")
+            self.send(f"option name Algorithm type combo default {self.options['Algorithm']} var alphabeta var evolutionary var pso var islands")
+            self.send('option name OwnBook type check default false')
+            self.send('option name BookFile type string default <empty>')
+            self.send('option name TablebasePath type string default <empty>')
+            self.send('uciok')
+        elif cmd == 'isready':
+            self.send('readyok')
+        elif cmd == 'setoption':
+            self.set_option(tokens)
+        elif cmd == 'ucinewgame':
+            self.stop()
+            self.tt.clear()
+            self.game = Chess(interactive=False)
+        elif cmd == 'position':
+            self.stop()
+            self.set_position(tokens)
+        elif cmd == 'go':
+            self.stop()
+            self.go(tokens)
+        elif cmd == 'stop':
+            self.stop()
+        elif cmd == 'ponderhit':
+            self.ponderhit()
+        elif cmd == 'quit':
+            self.stop()
+            return False
+        return True
+
+    """
+    Input: tokens - list of strings from 'setoption name <name> value <value>'
+    Description: update an engine option
+    Output: None
+    """
+    def set_option(self, tokens):
+        if 'name' not in tokens:
+            return
+        v_index = tokens.index('value') if 'value' in tokens else len(tokens)
+        name = ' '.join(tokens[tokens.index('name')+1:v_index])
+        value = ' '.join(tokens[v_index+1:])
+        for option in self.options:
+            if option.lower() == name.lower():
+                if option == 'Algorithm':
+                    if value.lower() in ['alphabeta', 'evolutionary', 'pso', 'islands']:
+                        self.options[option] = value.lower()
+                elif option == 'OwnBook':
+                    self.options[option] = value.lower() == 'true'
+                elif option == 'BookFile':
+                    self.options[option] = '' if value == '<empty>' else value
+                    if self.book != None:
+                        self.book.close()
+                    try:
+                        self.book = OpeningBook(self.options[option]) if self.options[option] else None
+                    except (OSError, ValueError):
+                        self.book = None
+                        self.send(f'info string cannot open book {value}')
+                elif option == 'TablebasePath':
+                    self.options[option] = '' if value == '<empty>' else value
+                    if self.tablebase != None:
+                        self.tablebase.close()
+                    self.tablebase = Tablebases(self.options[option]) if self.options[option] else None
+                elif value.isdigit():
+                    self.options[option] = int(value)
+                    if option == 'Hash':
+                        self.tt = TranspositionTable(max_entries=float('inf'), max_bytes=self.options['Hash'] << 20)
+                        self.game.tt = self.tt #The current game searches with the new table without another position command
+
+    """
+    Input: tokens - list of strings from 'position [startpos | fen <fen>] [moves <move> ...]'
+    Description: set up the game position and play the listed moves
+    Output: None
+    """
+    def set_position(self, tokens):
+        m_index = tokens.index('moves') if 'moves' in tokens else len(tokens)
+        if len(tokens) > 1 and tokens[1] == 'fen':
+            self.game = Chess(EPD=' '.join(tokens[2:m_index]), interactive=False)
+        else:
+            self.game = Chess(interactive=False)
+        for move in tokens[m_index+1:]:
+            if not self.game.move(move[0:2], move[2:4], move[4:5] or None):
+                self.send(f'info string illegal move {move}')
+                break
+        self.game.tt = self.tt
+        self.game.book = self.book if self.options['OwnBook'] else None
+        self.game.tablebase = self.tablebase
+
+    """
+    Input: score - float representing the search score for the side to move
+           depth - integer representing the depth of the iteration
+    Description: UCI score of a search result, a search mate scores MATE_SCORE + the depth left where it was found and a
+                 tablebase win MATE_SCORE - its plies, the plies from the root to the tablebase probe are not known so
+                 a tablebase mate can be a little further away than reported
+    Output: string representing the score, e.g. cp 35 or mate -2
+    """
+    def uci_score(self, score, depth):
+        if abs(score) >= MATE_SCORE:
+            plies = depth - int(abs(score) - MATE_SCORE)
+        elif abs(score) > MATE_SCORE - 1000:
+            plies = int(MATE_SCORE - abs(score))
+        else:
+            return f'cp {int(score)}'
+        plies = max(plies, 1) #A mate score taken from the transposition table may come from another depth
+        return f'mate {(plies + 1) // 2}' if score > 0 else f'mate -{plies // 2}'
+
+    """
+    Input: move - tuple representing an engine move (start_square, end_square[, n_part])
+    Description: convert an engine move to UCI long algebraic notation
+    Output: string representing the move, e.g. e2e4 or e7e8q
+    """
+    def uci_move(self, move):
+        return f"{move[0].lower()}{move[1].lower()}{move[2] if len(move) > 2 else ''}"
+
+    """
+    Input: tokens - list of strings from 'go [depth N] [movetime MS] [wtime MS] [btime MS] [winc MS] [binc MS] [movestogo N] [nodes N] [infinite] [ponder]'
+    Description: start a search on its own thread
+    Output: None
+    """
+    def go(self, tokens):
+        limits = {}
+        for i, token in enumerate(tokens[:-1]):
+            if token in ['depth', 'movetime', 'wtime', 'btime', 'winc', 'binc', 'movestogo', 'nodes'] and tokens[i+1].isdigit():
+                limits[token] = int(tokens[i+1])
+        infinite = 'infinite' in tokens
+        self.pondering = 'ponder' in tokens
+        self.time_budget = None
+        if 'movetime' in limits:
+            self.time_budget = limits['movetime'] / 1000
+        elif not infinite and ('wtime' in limits or 'btime' in limits):
+            remaining = limits.get('wtime' if self.game.p_move == 1 else 'btime', 0)
+            increment = limits.get('winc' if self.game.p_move == 1 else 'binc', 0)
+            self.time_budget = max(0.05, (remaining / limits.get('movestogo', 30) + increment / 2) / 1000)
+        self.deadline = None if self.time_budget == None or self.pondering else time.perf_counter() + self.time_budget
+        self.node_limit = limits.get('nodes')
+        max_depth = limits.get('depth', 64 if infinite or self.time_budget != None or self.node_limit != None or self.pondering else 3)
+        self.stop_event.clear()
+        self.ponderhit_event.clear()
+        self.search_thread = threading.Thread(target=self.search, args=(self.game, max_depth, infinite))
+        self.search_thread.daemon = True
+        self.search_thread.start()
+
+    """
+    Input: None
+    Description: decides if the search has to stop, nodes are counted by the search statistics (once per node) and not here
+                 since a node may ask more than once
+    Output: boolean representing if the search should stop
+    """
+    def should_stop(self):
+        if self.stop_event.is_set():
+            return True
+        if self.node_limit != None and self.stats != None and self.stats.nodes + self.stats.qnodes >= self.node_limit:
+            return True
+        return self.deadline != None and time.perf_counter() >= self.deadline
+
+    """
+    Input: game - Chess object to search
+           max_depth - integer representing the deepest iteration (alpha-beta) or the most generations (evolutionary, pso)
+           infinite - boolean representing if bestmove waits for stop once the search is done
+    Description: iterative deepening search streaming info lines, sends bestmove when done or stopped
+    Output: None
+    """
+    def search(self, game, max_depth, infinite):
+        best_move = None
+        algorithm = self.options['Algorithm']
+        stats = SearchStats()
+        game.stats = self.stats = stats
+        book_move = game.book_move()
+        tablebase_move = game.tablebase_move() if book_move == None else None
+        if book_move != None:
+            best_move = book_move
+            self.send(f'info string book move {self.uci_move(book_move)}')
+        elif tablebase_move != None:
+            best_move = tablebase_move
+            wdl, plies = game.tablebase.probe(game)
+            score = f'mate {(plies + 1) // 2 * wdl}' if wdl else 'cp 0'
+            self.send(f'info depth 1 score {score} pv {self.uci_move(tablebase_move)} string tablebase')
+        elif algorithm == 'alphabeta':
+            game.stop_search = lambda: self.should_stop() #Plain function so deepcopy shares it instead of copying self
+            for depth in range(1, max_depth + 1):
+                score, move = game.alpha_beta(depth, float('-inf'), float('inf'), game.p_move == 1)
+                if self.should_stop() and best_move != None:
+                    break #Iteration was cut short, keep the last complete one
+                if move == None:
+                    break
+                best_move = move
+                stats.iteration(depth, score, move)
+                self.send(f'info depth {depth} score {self.uci_score(score * game.p_move, depth)} nodes {stats.nodes + stats.qnodes} '
+                          f'nps {stats.nps} time {int(stats.elapsed * 1000)} pv {self.uci_move(move)}')
+                if self.stop_event.is_set():
+                    break
+            game.stop_search = None
+            self.send(f'info string ebf {stats.effective_branching_factor or 0:.2f} first move cutoffs {stats.first_move_cutoff_rate:.0%} '
+                      f'tt hits {stats.tt_hit_rate:.0%}')
+        else:
+            limited = infinite or self.pondering or self.time_budget != None or self.node_limit != None
+            generations = max_depth if limited else min(max_depth, 10) #A clock or node limit ends the search through should_stop
+            game.stop_search = lambda: self.should_stop() #Checked after every generation
+            if algorithm == 'evolutionary':
+                move = game.evolutionary_algorithm(generations=generations)
+            elif algorithm == 'islands':
+                move = island_search(game, islands=self.options['Threads'], generations=generations) #One island process per thread
+            else:
+                move = game.particle_swarm_optimization(iterations=generations)
+            game.stop_search = None
+            if move != ("No move", "No move"):
+                best_move = move
+                self.send(f'info depth {stats.iterations[-1]["depth"] if stats.iterations else 0} nodes {stats.nodes} nps {stats.nps} time {int(stats.elapsed * 1000)} pv {self.uci_move(move)}')
+        if best_move == None:
+            moves = game.order_moves(game.possible_board_moves(), game.p_move)
+            for m in moves:
+                if game.valid_move(game.board_2_array(m[0]), m[1]):
+                    best_move = game.move_notation(*m)
+                    break
+        if (infinite or self.pondering) and not self.stop_event.is_set():
+            self.ponderhit_event.wait() #bestmove may only be sent after stop or ponderhit
+        game.stats = None
+        self.send(f'bestmove {self.uci_move(best_move) if best_move != None else "0000"}')
+
+    """
+    Input: None
+    Description: the opponent played the expected move, keep searching but start the clock for this move
+    Output: None
+    """
+    def ponderhit(self):
+        if self.pondering:
+            self.pondering = False
+            if self.time_budget != None:
+                self.deadline = time.perf_counter() + self.time_budget
+            self.ponderhit_event.set()
+
+    """
+    Input: None
+    Description: stop the running search and wait for its bestmove
+    Output: None
+    """
+    def stop(self):
+        if self.search_thread != None and self.search_thread.is_alive():
+            self.stop_event.set()
+            self.ponderhit_event.set()
+            self.search_thread.join()
+        self.search_thread = None
+
+if __name__ == '__main__':
+    UCI().loop()
@@ -0,0 +1,41 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_archive import GameArchive, decode_move, encode_move
+from chess_engine import Chess, Position
+
+PROMOTION_FEN = '4k3/1P6/8/8/8/8/8/4K3 w - -'
+
+def scholars_mate():
+    game = Chess(interactive=False)
+    for start, end in [('e2', 'e4'), ('e7', 'e5'), ('f1', 'c4'), ('b8', 'c6'), ('d1', 'h5'), ('g8', 'f6'), ('h5', 'f7')]:
+        assert game.move(start, end)
+    return game
+
+def test_move_codes():
+    for move in [((4, 6), (4, 4), None), ((1, 1), (0, 0), 'q'), ((7, 6), (7, 7), 'n')]:
+        assert decode_move(encode_move(*move)) == move
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'games.arc')
+    game = scholars_mate()
+    promotion = [((1, 1), (1, 0), 'q')]
+    with GameArchive(path, 'a') as archive:
+        assert archive.append(game, {'White': 'a', 'Black': 'b'}) == 0
+        assert archive.extend([(Position.from_fen(PROMOTION_FEN), promotion, '*', None)]) == [1]
+    with GameArchive(path) as archive:
+        assert len(archive) == 2
+        first, second = archive.read(0), archive.read(-1)
+        assert first['moves'] == game.move_list and first['result'] == '1-0' and first['tags'] == {'White': 'a', 'Black': 'b'}
+        assert first['position'] == Position.from_fen(game.init_pos)
+        assert archive.game(0).board == game.board
+        assert second['position'] == Position.from_fen(PROMOTION_FEN) and second['moves'] == promotion and second['tags'] == {}
+        assert [record['id'] for record in archive] == [0, 1]
+
+def test_lost_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / 'games.arc')
+    with GameArchive(path, 'a') as archive:
+        archive.extend([(Position.from_fen(PROMOTION_FEN), [], '1/2-1/2', None)] * 3)
+    os.remove(path + '.idx')
+    with GameArchive(path) as archive:
+        assert len(archive) == 3 and archive.read(2)['result'] == '1/2-1/2'
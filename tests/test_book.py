@@ -0,0 +1,31 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_book import decode_move, encode_move, polyglot_key
+from chess_engine import Chess
+
+def test_start_position_key():
+    assert polyglot_key(Chess(interactive=False)) == 0x463B96181691FC9C
+
+def test_keys_after_moves():
+    game = Chess(interactive=False)
+    game.move('e2', 'e4')
+    assert polyglot_key(game) == 0x823C9B50FD114196
+    game.move('d7', 'd5')
+    assert polyglot_key(game) == 0x0756B94461C50FB0
+
+def test_move_codes():
+    game = Chess(interactive=False)
+    assert encode_move(game, (4, 6), (4, 4)) == 4 | 3 << 3 | 4 << 6 | 1 << 9 #e2e4
+    assert decode_move(game, encode_move(game, (6, 7), (5, 5))) == ((6, 7), (5, 5), None)
+
+def test_castling_is_king_takes_rook():
+    game = Chess(EPD='r3k2r/8/8/8/8/8/8/R3K2R w KQkq -', interactive=False)
+    assert encode_move(game, (4, 7), (6, 7)) == encode_move(game, (4, 7), (7, 7)) #e1h1
+    for move in [((4, 7), (6, 7), None), ((4, 7), (2, 7), None)]:
+        assert decode_move(game, encode_move(game, *move)) == move
+
+def test_promotion_code():
+    game = Chess(EPD='4k3/1P6/8/8/8/8/8/4K3 w - -', interactive=False)
+    assert encode_move(game, (1, 1), (1, 0), 'n') >> 12 == 1
+    assert decode_move(game, encode_move(game, (1, 1), (1, 0), 'q')) == ((1, 1), (1, 0), 'q')
@@ -0,0 +1,45 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_engine import MATE_SCORE, Chess
+
+VALUES = {1: 100, 2: 320, 3: 330, 4: 500, 5: 900, 6: 20000}
+
+def see(epd, start, end):
+    game = Chess(EPD=epd, interactive=False)
+    game.values, game.pst = dict(VALUES), None #Independent of a tuned eval_params.json
+    return game.static_exchange_evaluation(game.board_2_array(start), game.board_2_array(end))
+
+def test_see_undefended_pawn():
+    assert see('1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - -', 'e1', 'e5') == 100
+
+def test_see_exchange_with_xrays():
+    #Nxe5 Nxe5 Rxe5 Bxe5 Qxe5 Qxe5, the black queen recaptures through the bishop
+    assert see('1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - -', 'd3', 'e5') == -220
+
+def test_see_rook_behind_rook():
+    epd = '4k3/4r3/8/4p3/8/8/4R3/4R1K1 w - -'
+    assert see(epd, 'e2', 'e5') == 100
+    assert see(epd.replace('4R1K1', '6K1'), 'e2', 'e5') == -400 #No rook behind, the exchange loses the rook
+
+def test_see_capture_promotion():
+    assert see('r3k3/1P6/8/8/8/8/8/4K3 w - -', 'b7', 'a8') == 500 + 900 - 100
+    assert see('r3k3/1Pn5/8/8/8/8/8/4K3 w - -', 'b7', 'a8') == 400 #The knight takes the new queen
+
+def test_see_recapture_promotes():
+    #Rxb1 axb1=Q, the pawn recaptures onto the last rank and promotes
+    assert see('4k3/8/8/8/8/8/p7/1n2R1K1 w - -', 'e1', 'b1') == 320 - 500 - (900 - 100)
+
+def test_stalemate_scores_zero():
+    game = Chess(EPD='7k/5Q2/6K1/8/8/8/8/8 b - -', interactive=False)
+    assert game.alpha_beta(2, float('-inf'), float('inf'), False) == (0, None)
+
+def test_checkmate_scores_mate():
+    game = Chess(EPD='7k/6Q1/6K1/8/8/8/8/8 b - -', interactive=False)
+    score, move = game.alpha_beta(2, float('-inf'), float('inf'), False)
+    assert move == None and score >= MATE_SCORE
+
+def test_mate_in_one_is_found():
+    game = Chess(EPD='7k/8/6K1/8/8/8/8/5Q2 w - -', interactive=False)
+    score, move = game.alpha_beta(2, float('-inf'), float('inf'), True)
+    assert score >= MATE_SCORE and game.san(*move) == 'Qf8#'
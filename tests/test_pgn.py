@@ -0,0 +1,29 @@
+import io
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_pgn import game_pgn, read_games, replay_game
+
+CASTLING_WITH_ZEROS = '''[Event "Castling"]
+[Result "*"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. 0-0 d6 5. d3 Bg4 6. Nc3 Qd7 7. Be3 0-0-0 *
+'''
+
+def test_move_numbers_are_stripped():
+    (tags, moves), = read_games(io.StringIO('1.e4 e5 2... Nf3 3 Nc6 *\n'))
+    assert moves == ['e4', 'e5', 'Nf3', 'Nc6']
+
+def test_castling_with_zeros():
+    (tags, moves), = read_games(io.StringIO(CASTLING_WITH_ZEROS))
+    assert moves[6] == '0-0' and moves[13] == '0-0-0'
+    game = replay_game(tags, moves)
+    assert game.board[7][6] == 6 and game.board[7][5] == 4 #White king g1, rook f1
+    assert game.board[0][2] == -6 and game.board[0][3] == -4 #Black king c8, rook d8
+
+def test_round_trip():
+    (tags, moves), = read_games(io.StringIO(CASTLING_WITH_ZEROS))
+    game = replay_game(tags, moves)
+    (tags2, moves2), = read_games(io.StringIO(game_pgn(game, {'Result': '*'})))
+    assert 'O-O' in moves2 and 'O-O-O' in moves2
+    assert replay_game(tags2, moves2).EPD_hash() == game.EPD_hash()
@@ -0,0 +1,20 @@
+import os
+import sys
+import numpy as np
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_selfplay import RECORD, TrainingData
+
+def test_missing_sidecar_keeps_the_records(tmp_path):
+    path = str(tmp_path / 'train.bin')
+    data = TrainingData(path, capacity=8)
+    records = np.zeros(3, dtype=RECORD)
+    records['hash'] = [1, 2, 3]
+    assert data.append(records) == 3
+    data.commit(1)
+    del data
+    assert TrainingData(path, mode='r').count == 3
+    os.remove(path + '.json')
+    with pytest.raises(FileExistsError):
+        TrainingData(path, capacity=8)
+    assert list(np.memmap(path, dtype=RECORD, mode='r')['hash'][:3]) == [1, 2, 3]
@@ -0,0 +1,53 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_engine import Position
+from chess_server import AnalysisServer, query
+
+START = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -'
+
+def test_job_key_validation():
+    server = AnalysisServer(workers=1)
+    try:
+        assert server.job_key({'fen': START}) == ((Position.from_fen(START), 'alpha-beta', 3), 30.0)
+        assert server.job_key({'fen': START + ' 0 1'})[0] == server.job_key({'fen': '  ' + START})[0]
+        assert server.job_key({}) == 'invalid fen'
+        assert server.job_key({'fen': 42}) == 'invalid fen'
+        assert server.job_key({'fen': 'not a fen'}) == 'invalid fen'
+        assert server.job_key({'fen': START, 'algorithm': 'minimax'}).startswith('unknown algorithm')
+        for budget in [0, 7, 2.5, True, '3']:
+            assert server.job_key({'fen': START, 'budget': budget}).startswith('budget must be')
+        for timeout in [0, -1, float('inf'), 'soon', False]:
+            assert server.job_key({'fen': START, 'timeout': timeout}).startswith('timeout must be')
+    finally:
+        server.pool.shutdown()
+
+def test_identical_requests_share_one_job():
+    async def run():
+        server = AnalysisServer(workers=1)
+        try:
+            request = {'fen': START, 'budget': 2}
+            answers = await asyncio.gather(server.handle(request), server.handle(dict(request, fen=START + ' 0 1')))
+            answers.append(await server.handle(request))
+            return server.stats, answers
+        finally:
+            await server.close()
+
+    stats, (first, second, third) = asyncio.run(run())
+    assert stats['coalesced'] == 1 and stats['cache_hits'] == 1
+    assert first['move'] != None and first['move'] == second['move'] == third['move']
+    assert not first['cached'] and not second['cached'] and third['cached']
+
+def test_protocol_answers_by_id():
+    async def run():
+        server = AnalysisServer(workers=1)
+        try:
+            port = await server.start(port=0)
+            return await query([{'fen': START, 'budget': 1}, {'fen': 'bad'}, {'fen': START, 'budget': 99}], port=port)
+        finally:
+            await server.close()
+
+    answers = asyncio.run(run())
+    assert [answer['id'] for answer in answers] == [0, 1, 2]
+    assert 'move' in answers[0] and answers[1]['error'] == 'invalid fen' and answers[2]['error'].startswith('budget')
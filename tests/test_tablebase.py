@@ -0,0 +1,41 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_engine import Chess
+from chess_tablebase import Tablebases
+
+@pytest.fixture(scope='module')
+def tablebases(tmp_path_factory):
+    tablebases = Tablebases(str(tmp_path_factory.mktemp('tablebases')))
+    for name in ['KQK', 'KRK']:
+        tablebases.generate(name) #Pure Python retrograde analysis, about 15 seconds a table
+    return Tablebases(tablebases.directory)
+
+def probe(tablebases, fen):
+    return tablebases.probe(Chess(EPD=fen, interactive=False))
+
+def test_stale_castling_rights_are_ignored(tablebases):
+    plain = probe(tablebases, '4k3/8/8/8/8/8/8/R3K3 w - -')
+    assert plain != None and plain[0] == 1
+    assert probe(tablebases, '4k3/8/8/8/8/8/8/R3K3 w Kkq -') == plain #No rook on h1, no black rooks
+
+def test_live_castling_rights_skip_the_tables(tablebases):
+    assert probe(tablebases, '4k3/8/8/8/8/8/8/R3K3 w Q -') == None
+
+def test_kqk_probes(tablebases):
+    assert probe(tablebases, 'k7/8/1K6/8/8/8/8/6Q1 w - -') == (1, 1)
+    assert probe(tablebases, 'k7/1Q6/1K6/8/8/8/8/8 b - -') == (-1, 0) #Checkmated
+    win, loss = probe(tablebases, '4k3/8/8/8/8/8/8/3QK3 w - -'), probe(tablebases, '4k3/8/8/8/8/8/8/3QK3 b - -')
+    assert win[0] == 1 and loss[0] == -1 and 0 < win[1] <= 20 and 0 < loss[1] <= 21
+
+def test_krk_probes(tablebases):
+    assert probe(tablebases, 'k7/1R6/8/8/8/8/8/4K3 b - -') == (0, 0) #Kxb7
+    win = probe(tablebases, '8/8/8/8/8/2k5/8/R3K3 w - -')
+    assert win[0] == 1 and win[1] <= 32 #KRK is won in at most 16 moves
+    assert probe(tablebases, '8/8/8/8/8/2k5/8/R3K3 b - -')[0] == -1
+
+def test_best_move_mates(tablebases):
+    game = Chess(EPD='k7/8/1K6/8/8/8/8/6Q1 w - -', interactive=False)
+    assert tablebases.best_move(game) == ((6, 7), (6, 0), None) #Qg8#
+    assert tablebases.score(game) > 0 and tablebases.score(Chess(EPD='k7/1Q6/1K6/8/8/8/8/8 b - -', interactive=False)) > 0
@@ -0,0 +1,36 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import chess_texel
+import chess_tune
+from chess_engine import load_eval_params
+from chess_tournament import OPENINGS
+from chess_tune import initial_params, match_opening, play_match_game, sprt_llr
+
+def test_seeds_give_different_games():
+    positions = {match_opening(OPENINGS[0], 4, seed).EPD_hash() for seed in range(8)}
+    assert len(positions) > 1
+    assert match_opening(OPENINGS[0], 4, 3).EPD_hash() == match_opening(OPENINGS[0], 4, 3).EPD_hash() #Both games of a pair
+
+def test_match_game_scores():
+    params = initial_params()
+    candidate, score = play_match_game((5, params, params, OPENINGS[0], 1, 4, 2, 0))
+    assert candidate == 5 and score in (0, 0.5, 1)
+
+def test_sprt_decides_one_sided_matches():
+    assert sprt_llr(10, 0, 0, 0, 50) > 2.94 #log(0.95 / 0.05)
+    assert sprt_llr(0, 0, 10, 0, 50) < -2.94
+
+def test_exports_merge_into_one_file(tmp_path):
+    path = str(tmp_path / 'eval_params.json')
+    weights = chess_texel.initial_weights()
+    weights[6 + 64 + 27] += 64 #A knight bonus on d5 only chess_texel writes
+    chess_texel.export(path, weights, {'k': 1.5})
+    texel = load_eval_params(path)
+    champion = dict(initial_params(), knight=400, delta_margin=150)
+    chess_tune.export(champion, path)
+    params = load_eval_params(path)
+    assert params['pst'] == texel['pst'] and params['values'][6] == texel['values'][6]
+    assert params['values'][2] == 400 and params['delta_margin'] == 150
+    chess_texel.export(path, weights)
+    assert load_eval_params(path)['delta_margin'] == 150
@@ -0,0 +1,56 @@
+import io
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chess_engine import MATE_SCORE
+from chess_uci import UCI
+
+def lines(uci):
+    return uci.output.getvalue().splitlines()
+
+def test_position_startpos_moves():
+    uci = UCI(output=io.StringIO())
+    uci.command('position startpos moves e2e4 e7e5 g1f3')
+    assert uci.game.move_list == [((4, 6), (4, 4), None), ((4, 1), (4, 3), None), ((6, 7), (5, 5), None)]
+    assert uci.game.p_move == -1 and uci.game.tt is uci.tt
+
+def test_position_fen_promotion():
+    uci = UCI(output=io.StringIO())
+    uci.command('position fen 4k3/1P6/8/8/8/8/8/4K3 w - - 0 1 moves b7b8n')
+    assert uci.game.board[0][1] == 2 and uci.game.p_move == -1
+
+def test_illegal_move_is_reported():
+    uci = UCI(output=io.StringIO())
+    uci.command('position startpos moves e2e5 e7e5')
+    assert uci.game.move_list == [] and lines(uci) == ['info string illegal move e2e5']
+
+def test_go_depth():
+    uci = UCI(output=io.StringIO())
+    uci.command('position fen 7k/8/6K1/8/8/8/8/5Q2 w - -')
+    uci.command('go depth 2')
+    uci.search_thread.join()
+    output = lines(uci)
+    assert any(line.startswith('info depth 2 score mate 1 ') for line in output)
+    assert output[-1] == 'bestmove f1f8'
+
+def test_go_time_controls():
+    uci = UCI(output=io.StringIO())
+    uci.command('position startpos moves e2e4')
+    uci.command('go wtime 1000 btime 60000 winc 0 binc 1000 movestogo 20')
+    assert abs(uci.time_budget - (60000 / 20 + 1000 / 2) / 1000) < 1e-9 and uci.deadline != None
+    uci.command('stop')
+    uci.command('go movetime 250 nodes 400')
+    assert uci.time_budget == 0.25 and uci.node_limit == 400
+    uci.command('go ponder movetime 250')
+    assert uci.pondering and uci.deadline == None
+    uci.command('ponderhit')
+    assert not uci.pondering and uci.deadline != None
+    uci.command('stop')
+    assert sum(line.startswith('bestmove ') for line in lines(uci)) == 3
+
+def test_mate_scores():
+    uci = UCI(output=io.StringIO())
+    assert uci.uci_score(35, 4) == 'cp 35'
+    assert uci.uci_score(MATE_SCORE + 3, 4) == 'mate 1' #Mate found with 3 plies left of 4
+    assert uci.uci_score(-(MATE_SCORE + 2), 4) == 'mate -1'
+    assert uci.uci_score(MATE_SCORE - 5, 1) == 'mate 3' #Tablebase win in 5 plies